@@ -9,6 +9,7 @@ import models
 
 from langchain_core.prompt_values import ChatPromptValue
 from python.helpers import extract_tools, rate_limiter, files, errors, history, tokens
+from python.helpers.changes import CHAT_LIST, notifier
 from python.helpers.print_style import PrintStyle
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
@@ -25,6 +26,7 @@ class AgentContext:
 
     _contexts: dict[str, "AgentContext"] = {}
     _counter: int = 0
+    _registry_changed: int = 0  # notifier version of the last added or removed context
 
     def __init__(
         self,
@@ -41,10 +43,14 @@ class AgentContext:
         self.name = name
         self.config = config
         self.log = log or Log.Log()
+        # items dropped from RAM go next to the saved chat, see persist_chat
+        self.log.journal = files.get_abs_path("tmp/chats", self.id, "log.jsonl")
         self.agent0 = agent0 or Agent(0, self.config, self)
         self.paused = paused
         self.streaming_agent = streaming_agent
         self.task: DeferredTask | None = None
+        # called with stream events (chunks, tool start/end) of all agents in this context
+        self.stream_listeners: list[Callable[[dict], None]] = []
         AgentContext._counter += 1
         self.no = AgentContext._counter
 
@@ -52,6 +58,7 @@ class AgentContext:
         if existing:
             AgentContext.remove(self.id)
         self._contexts[self.id] = self
+        AgentContext._registry_changed = notifier.notify(CHAT_LIST)  # chat list changed
 
     @staticmethod
     def get(id: str):
@@ -68,12 +75,29 @@ class AgentContext:
         context = AgentContext._contexts.pop(id, None)
         if context and context.task:
             context.task.kill()
+        AgentContext._registry_changed = notifier.notify(CHAT_LIST)
         return context
 
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    @paused.setter
+    def paused(self, paused: bool):
+        self._paused = paused
+        self.changed = notifier.notify(self, CHAT_LIST)  # web clients show the pause state
+
     def kill_process(self):
         if self.task:
             self.task.kill()
 
+    def emit_stream_event(self, event: dict):
+        for listener in list(self.stream_listeners):
+            try:
+                listener(event)
+            except Exception:
+                pass  # a broken listener must not break the agent
+
     def reset(self):
         self.kill_process()
         self.log.reset()
@@ -280,6 +304,9 @@ class Agent:
                             if chunk:
                                 printer.stream(chunk)
                                 self.log_from_stream(full, log)
+                                self.context.emit_stream_event(
+                                    {"type": "chunk", "agent": self.agent_name, "text": chunk}
+                                )
 
                         # store as last context window content
                         self.set_data(Agent.DATA_NAME_CTX_WINDOW, prompt.format())
@@ -632,11 +659,17 @@ class Agent:
             tool = self.get_tool(tool_name, tool_args, msg)
 
             await self.handle_intervention()  # wait if paused and handle intervention message if needed
+            self.context.emit_stream_event(
+                {"type": "tool_start", "agent": self.agent_name, "tool": tool_name, "args": tool_args}
+            )
             await tool.before_execution(**tool_args)
             await self.handle_intervention()  # wait if paused and handle intervention message if needed
             response = await tool.execute(**tool_args)
             await self.handle_intervention()  # wait if paused and handle intervention message if needed
             await tool.after_execution(response)
+            self.context.emit_stream_event(
+                {"type": "tool_end", "agent": self.agent_name, "tool": tool_name, "result": response.message}
+            )
             await self.handle_intervention()  # wait if paused and handle intervention message if needed
             if response.break_loop:
                 return response.message
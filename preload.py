@@ -1,5 +1,5 @@
 import asyncio
-from python.helpers import runtime, whisper, settings
+from python.helpers import runtime, whisper, settings, static_assets
 from python.helpers.print_style import PrintStyle
 
 PrintStyle().print("Running preload...")
@@ -11,9 +11,13 @@ async def preload():
         set = settings.get_default_settings()
 
         # async tasks to preload
-        tasks = [whisper.preload(set["stt_model_size"])]
+        tasks = [
+            whisper.preload(set["stt_model_size"]),
+            # hashes and gzip/brotli variants of the webui files
+            asyncio.to_thread(static_assets.assets.build),
+        ]
 
-        return asyncio.gather(*tasks, return_exceptions=True)
+        return await asyncio.gather(*tasks, return_exceptions=True)
     except Exception as e:
         PrintStyle().print(f"Error in preload: {e}")
 
@@ -1,12 +1,11 @@
-import base64
-from io import BytesIO
-
 from python.helpers.api import ApiHandler, Input, Output, Request, Response
 from flask import send_file
 
-from python.helpers import files, runtime
+from python.helpers import files, runtime, file_transfer
 from python.api import file_info
 import os
+from typing import Iterator
+from urllib.parse import quote
 
 
 class DownloadFile(ApiHandler):
@@ -25,29 +24,18 @@ class DownloadFile(ApiHandler):
             raise Exception(f"File {file_path} not found")
 
         if file["is_dir"]:
-            zip_file = await runtime.call_development_function(files.zip_dir, file["abs_path"])
+            # streamed while it is compressed, no temp zip and the download starts at once
             if runtime.is_development():
-                b64 = await runtime.call_development_function(fetch_file, zip_file)
-                file_data = BytesIO(base64.b64decode(b64))
-                return send_file(
-                    file_data,
-                    as_attachment=True,
-                    download_name=os.path.basename(zip_file),
-                )
+                zip_stream = file_transfer.download_zip(file["abs_path"])
             else:
-                return send_file(
-                    zip_file,
-                    as_attachment=True,
-                    download_name=f"{os.path.basename(file_path)}.zip",
-                )
+                zip_stream = files.zip_dir_stream(file["abs_path"])
+            return stream_response(zip_stream, f"{os.path.basename(os.path.normpath(file['abs_path']))}.zip")
         elif file["is_file"]:
             if runtime.is_development():
-                b64 = await runtime.call_development_function(fetch_file, file["abs_path"])
-                file_data = BytesIO(base64.b64decode(b64))
-                return send_file(
-                    file_data,
-                    as_attachment=True,
-                    download_name=os.path.basename(file_path),
+                return stream_response(
+                    file_transfer.download(file["abs_path"]),
+                    os.path.basename(file_path),
+                    file["size"],
                 )
             else:
                 return send_file(
@@ -58,7 +46,14 @@ class DownloadFile(ApiHandler):
         raise Exception(f"File {file_path} not found")
 
 
-async def fetch_file(path):
-    with open(path, "rb") as file:
-        file_content = file.read()
-        return base64.b64encode(file_content).decode("utf-8")
+def stream_response(chunks: Iterator[bytes], download_name: str, size: int | None = None) -> Response:
+    # without a size the response goes out with chunked transfer encoding
+    headers = {"Content-Disposition": f"attachment; filename={quote(download_name)}"}
+    if size is not None:
+        headers["Content-Length"] = str(size)
+    return Response(
+        chunks,
+        mimetype="application/octet-stream",
+        headers=headers,
+    )
+
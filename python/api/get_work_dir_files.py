@@ -1,7 +1,7 @@
 from python.helpers.api import ApiHandler
 from flask import Request, Response
 
-from python.helpers.file_browser import FileBrowser
+from python.helpers.file_browser import FileBrowser, PAGE_SIZE
 from python.helpers import files, runtime
 
 
@@ -17,10 +17,24 @@ class GetWorkDirFiles(ApiHandler):
 
         # browser = FileBrowser()
         # result = browser.get_files(current_path)
-        result = await runtime.call_development_function(get_files, current_path)
+        result = await runtime.call_development_function(
+            get_files, current_path, **listing_args(request.args)
+        )
 
         return {"data": result}
 
-async def get_files(path):
+
+def listing_args(args) -> dict:
+    # page, sort and filter of the file browser listing
+    return {
+        "cursor": args.get("cursor", ""),
+        "limit": int(args.get("limit", PAGE_SIZE)),
+        "sort_by": args.get("sort", "name"),
+        "sort_direction": args.get("direction", "asc"),
+        "filter": args.get("filter", ""),
+    }
+
+
+async def get_files(path, **kwargs):
     browser = FileBrowser()
-    return browser.get_files(path)
\ No newline at end of file
+    return browser.get_files(path, **kwargs)
\ No newline at end of file
@@ -1,17 +1,34 @@
+import json
 from python.helpers.api import ApiHandler
 from flask import Request, Response
-from python.helpers import errors
 
 from python.helpers import git
+from python.helpers.memory import Memory
+from python.helpers import memory_dedup
+from python.helpers import rfc
 
 class HealthCheck(ApiHandler):
+    on_event_loop = True  # cached and in-memory state only
 
     async def process(self, input: dict, request: Request) -> dict | Response:
-        gitinfo = None
-        error = None
-        try:
-            gitinfo = git.get_git_info()
-        except Exception as e:
-            error = errors.error_text(e)
+        gitinfo, error = git.get_git_info_cached()  # probes must not spawn git
 
-        return {"gitinfo": gitinfo, "error": error}
+        ready = Memory.is_ready()
+        result = {
+            "gitinfo": gitinfo,
+            "error": error,
+            "ready": ready,
+            "memory": {
+                subdir: status.output() for subdir, status in Memory.status.items()
+            },
+            "memory_resident": Memory.get_resident_sizes(),
+            "memory_dedup": memory_dedup.stats.output(),
+            "rfc": rfc.metrics.output(),  # latency per remote function, development mode
+        }
+
+        # load balancers ask with ?ready=1 and get 503 until memory is warmed up
+        if not ready and (request.args.get("ready") or input.get("ready")):
+            return Response(
+                response=json.dumps(result), status=503, mimetype="application/json"
+            )
+        return result
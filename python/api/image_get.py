@@ -1,5 +1,8 @@
+import asyncio
 import os
 from python.helpers.api import ApiHandler
+from python.helpers import files
+from python.helpers.image_cache import images, choose_format, MISSING_IMAGE
 from flask import Request, Response, send_file
 
 
@@ -10,7 +13,34 @@ class ImageGet(ApiHandler):
             if not path:
                 raise ValueError("No path provided")
 
-            # send file
-            return send_file(path)
+            # original file unless a size is requested
+            size = int(input.get("size", request.args.get("size", 0)) or 0)
+            if not size:
+                if not os.path.isfile(path):
+                    return self.missing()
+                return send_file(path)
 
-            
\ No newline at end of file
+            # resized variant, encoded once and cached
+            format = choose_format(
+                request.headers.get("Accept", ""), request.args.get("format", "")
+            )
+            try:
+                variant, etag = await asyncio.wrap_future(images.variant(path, size, format))
+            except FileNotFoundError:
+                return self.missing()
+            headers = {
+                "ETag": f'"{etag}"',
+                "Cache-Control": "no-cache",  # same path may get a new screenshot, revalidated by etag
+                "Vary": "Accept",
+            }
+            if etag in request.if_none_match:
+                return Response(status=304, headers=headers)
+            response = send_file(variant, etag=False, conditional=False, max_age=None)
+            response.headers.update(headers)
+            return response
+
+    def missing(self) -> Response:
+        # screenshots are evicted after BROWSER_SCREENSHOTS_MAX_HOURS, chats keep their links
+        response = send_file(files.get_abs_path(MISSING_IMAGE), max_age=None)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
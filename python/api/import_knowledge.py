@@ -3,9 +3,13 @@ from flask import Request, Response
 
 from python.helpers.file_browser import FileBrowser
 from python.helpers import files, memory
+from python.helpers.defer import DeferredTask
 import os
 from werkzeug.utils import secure_filename
 
+# keep references to running imports, deferred tasks are killed when garbage collected
+_import_tasks: list[DeferredTask] = []
+
 
 class ImportKnowledge(ApiHandler):
     async def process(self, input: dict, request: Request) -> dict | Response:
@@ -22,18 +26,33 @@ class ImportKnowledge(ApiHandler):
         KNOWLEDGE_FOLDER = files.get_abs_path(memory.get_custom_knowledge_subdir_abs(context.agent0),"main")
 
         saved_filenames = []
+        saved_paths = []
 
         for file in file_list:
             if file:
                 filename = secure_filename(file.filename)  # type: ignore
-                file.save(os.path.join(KNOWLEDGE_FOLDER, filename))
+                path = os.path.join(KNOWLEDGE_FOLDER, filename)
+                file.save(path)
                 saved_filenames.append(filename)
-
-        #reload memory to re-import knowledge
-        await memory.Memory.reload(context.agent0)
-        context.log.set_initial_progress()
+                saved_paths.append(path)
+
+        # import only the uploaded files into the live index, in background
+        log_item = context.log.log(
+            type="util",
+            heading=f"Importing {len(saved_paths)} knowledge files...",
+        )
+        _import_tasks[:] = [t for t in _import_tasks if t.is_alive()]
+        task = DeferredTask(thread_name="KnowledgeImport")
+        _import_tasks.append(task)
+        task.start_task(
+            memory.Memory.import_knowledge,
+            context.agent0,
+            saved_paths,
+            {"area": memory.Memory.Area.MAIN.value},
+            log_item,
+        )
 
         return {
-            "message": "Knowledge Imported",
+            "message": "Knowledge import started",
             "filenames": saved_filenames[:5]
-        }
\ No newline at end of file
+        }
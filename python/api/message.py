@@ -3,13 +3,17 @@ from python.helpers.api import ApiHandler
 from flask import Request, Response
 
 from python.helpers import files
+import asyncio
 import os
+from typing import Callable
 from werkzeug.utils import secure_filename
 from python.helpers.defer import DeferredTask
 from python.helpers.print_style import PrintStyle
 
 
 class Message(ApiHandler):
+    on_event_loop = True  # waits for the agent, file work goes to threads
+
     async def process(self, input: dict, request: Request) -> dict | Response:
         task, context = await self.communicate(input=input, request=request)
         return await self.respond(task, context)
@@ -21,9 +25,15 @@ class Message(ApiHandler):
             "context": context.id,
         }
 
-    async def communicate(self, input: dict, request: Request):
+    async def communicate(
+        self,
+        input: dict,
+        request: Request,
+        stream_listener: Callable[[dict], None] | None = None,
+    ):
         # Handle both JSON and multipart/form-data
         if request.content_type.startswith("multipart/form-data"):
+            await asyncio.to_thread(lambda: request.files)  # parses the spooled body
             text = request.form.get("text", "")
             ctxid = request.form.get("context", "")
             message_id = request.form.get("message_id", None)
@@ -34,13 +44,13 @@ class Message(ApiHandler):
             upload_folder_ext = files.get_abs_path("tmp/uploads")
 
             if attachments:
-                os.makedirs(upload_folder_ext, exist_ok=True)
+                await asyncio.to_thread(os.makedirs, upload_folder_ext, exist_ok=True)
                 for attachment in attachments:
                     if attachment.filename is None:
                         continue
                     filename = secure_filename(attachment.filename)
                     save_path = files.get_abs_path(upload_folder_ext, filename)
-                    attachment.save(save_path)
+                    await asyncio.to_thread(attachment.save, save_path)
                     attachment_paths.append(os.path.join(upload_folder_int, filename))
         else:
             # Handle JSON request as before
@@ -54,7 +64,7 @@ class Message(ApiHandler):
         message = text
 
         # Obtain agent context
-        context = self.get_context(ctxid)
+        context = await self.get_context_async(ctxid)
 
         # Store attachments in agent data
         # context.agent0.set_data("attachments", attachment_paths)
@@ -85,4 +95,8 @@ class Message(ApiHandler):
             id=message_id,
         )
 
+        # registered before the agent starts, no early chunk is missed
+        if stream_listener:
+            context.stream_listeners.append(stream_listener)
+
         return context.communicate(UserMessage(message, attachment_paths)), context
\ No newline at end of file
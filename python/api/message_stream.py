@@ -0,0 +1,150 @@
+import asyncio
+import json
+import queue
+from concurrent.futures import Future
+
+from flask import Request, Response
+
+from agent import AgentContext
+from python.api.message import Message
+from python.helpers.errors import error_text
+
+# Streaming variant of /message: server-sent events with the agents' stream chunks,
+# tool start/end and finally the response, as they happen.
+# Events are JSON objects with a "type": start, chunk, tool_start, tool_end, response, error.
+
+KEEPALIVE_SECONDS = 15
+
+
+class MessageStream(Message):
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        events = EventQueue()
+        task, context = await self.communicate(
+            input=input, request=request, stream_listener=events.put
+        )
+
+        def on_done(future: Future):
+            try:
+                events.put({"type": "response", "message": future.result()})
+            except BaseException as e:
+                events.put({"type": "error", "message": error_text(e) or "Task cancelled"})  # type: ignore
+            events.put(None)
+            remove_listener(context, events)  # also if the client never read the stream
+
+        task.add_done_callback(on_done)
+        return Response(
+            EventStream(context, events),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
+class EventQueue:
+    # filled by agent threads, read by a server thread (WSGI) or the event loop (ASGI)
+    def __init__(self):
+        self.queue: queue.Queue = queue.Queue()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.ready = asyncio.Event()
+
+    def put(self, event: dict | None):
+        self.queue.put(event)
+        if self.loop:
+            try:
+                self.loop.call_soon_threadsafe(self.ready.set)
+            except RuntimeError:
+                pass  # loop closed, nobody reads anymore
+
+    def get(self, timeout: float) -> dict | None:
+        return self.queue.get(timeout=timeout)
+
+    async def get_async(self, timeout: float) -> dict | None:
+        self.loop = asyncio.get_running_loop()
+        while True:
+            self.ready.clear()
+            try:
+                return self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                raise queue.Empty from None
+
+    def drain(self, event: dict | None) -> list[dict | None]:
+        # everything queued meanwhile goes out in one write
+        batch = [event]
+        while event is not None and not self.queue.empty():
+            event = self.queue.get_nowait()
+            batch.append(event)
+        return batch
+
+
+class EventStream:
+    # iterated in a server thread under WSGI, on the event loop under ASGI (no thread held)
+    def __init__(self, context: AgentContext, events: EventQueue):
+        self.context = context
+        self.events = events
+
+    def __iter__(self):
+        try:
+            yield format_event({"type": "start", "context": self.context.id})
+            while True:
+                try:
+                    event = self.events.get(KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                text, done = format_batch(self.events.drain(event))
+                yield text
+                if done:
+                    return
+        finally:
+            remove_listener(self.context, self.events)
+
+    async def __aiter__(self):
+        try:
+            yield format_event({"type": "start", "context": self.context.id})
+            while True:
+                try:
+                    event = await self.events.get_async(KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                text, done = format_batch(self.events.drain(event))
+                yield text
+                if done:
+                    return
+        finally:
+            remove_listener(self.context, self.events)
+
+
+def remove_listener(context: AgentContext, events: EventQueue):
+    if events.put in context.stream_listeners:
+        context.stream_listeners.remove(events.put)
+
+
+def format_batch(batch: list[dict | None]) -> tuple[str, bool]:
+    # the batch ends with None once the response was sent
+    return "".join(format_event(event) for event in coalesce(batch) if event), batch[-1] is None
+
+
+def coalesce(events: list[dict | None]) -> list[dict | None]:
+    # a slow client gets adjacent chunks of one agent as a single event
+    result: list[dict | None] = []
+    for event in events:
+        last = result[-1] if result else None
+        if (
+            event
+            and last
+            and event["type"] == "chunk"
+            and last["type"] == "chunk"
+            and event["agent"] == last["agent"]
+        ):
+            result[-1] = {**last, "text": last["text"] + event["text"]}
+        else:
+            result.append(event)
+    return result
+
+
+def format_event(event: dict) -> str:
+    return f"data: {json.dumps(event)}\n\n"
@@ -1,40 +1,107 @@
+import time
+
 from python.helpers.api import ApiHandler
+from python.helpers.changes import notifier
 from flask import Request, Response
 
 from agent import AgentContext
 
+MAX_WAIT = 30  # seconds a long poll may block, below common proxy timeouts
+
+
 class Poll(ApiHandler):
+    on_event_loop = True
+
     async def process(self, input: dict, request: Request) -> dict | Response:
         ctxid = input.get("context", None)
         from_no = input.get("log_from", 0)
+        # notifier version of the previous response, 0 = first poll
+        since = int(input.get("changes", 0) or 0)
+        # seconds to wait for a change, 0 = answer immediately like before
+        wait = min(float(input.get("wait", 0) or 0), MAX_WAIT)
 
         # context instance - get or create
-        context = self.get_context(ctxid)
-
-        logs = context.log.output(start=from_no)
-
-        # loop AgentContext._contexts
-        ctxs = []
-        for ctx in AgentContext._contexts.values():
-            ctxs.append(
-                {
-                    "id": ctx.id,
-                    "no": ctx.no,
-                    "log_guid": ctx.log.guid,
-                    "log_version": len(ctx.log.updates),
-                    "log_length": len(ctx.log.logs),
-                    "paused": ctx.paused,
+        context = await self.get_context_async(ctxid)
+
+        # long poll: block until this chat, its progress or the chat list changed
+        deadline = time.monotonic() + wait
+        changes = notifier.version
+        while not has_changed(context, since, from_no):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # nothing changed, tiny body instead of the full state
+                return {
+                    "context": context.id,
+                    "changes": changes,
+                    "unchanged": True,
+                    "log_guid": context.log.guid,
+                    "log_version": context.log.version,
                 }
-            )
+            changes = await notifier.wait_async(changes, remaining)
 
         # data from this server
         return {
-            "context": context.id,
-            "contexts": ctxs,
-            "logs": logs,
-            "log_guid": context.log.guid,
-            "log_version": len(context.log.updates),
-            "log_progress": context.log.progress,
-            "log_progress_active": context.log.progress_active,
-            "paused": context.paused,
-        }
\ No newline at end of file
+            **output_context(context, from_no),
+            **output_contexts_since(since),
+            "changes": changes,
+        }
+
+
+def has_changed(context: AgentContext, since: int, from_no: int) -> bool:
+    # other chats' log changes do not wake the poll, they are sent with the next response
+    return (
+        since == 0
+        or since > notifier.version  # server restarted
+        or context.log.version != from_no
+        or context.log.changed > since
+        or context.changed > since
+        or AgentContext._registry_changed > since
+    )
+
+
+def output_context(context: AgentContext, from_no: int) -> dict:
+    # shared with poll_stream, both send the same payload
+    # the version is read first, changes made meanwhile are sent next time
+    version = context.log.version
+    return {
+        "context": context.id,
+        "logs": context.log.output(start=from_no, end=version),
+        "log_guid": context.log.guid,
+        "log_version": version,
+        "log_progress": context.log.progress,
+        "log_progress_active": context.log.progress_active,
+        "paused": context.paused,
+    }
+
+
+def output_contexts_since(since: int) -> dict:
+    # full list after chats were added or removed, otherwise only the chats that changed
+    if not since or since > notifier.version or AgentContext._registry_changed > since:
+        return {"contexts": output_contexts()}
+    return {
+        "contexts": output_contexts(
+            [
+                ctx
+                for ctx in list(AgentContext._contexts.values())
+                if max(ctx.changed, ctx.log.changed) > since
+            ]
+        ),
+        "contexts_partial": True,
+    }
+
+
+def output_contexts(contexts: list[AgentContext] | None = None) -> list[dict]:
+    # loop AgentContext._contexts
+    ctxs = []
+    for ctx in contexts if contexts is not None else list(AgentContext._contexts.values()):
+        ctxs.append(
+            {
+                "id": ctx.id,
+                "no": ctx.no,
+                "log_guid": ctx.log.guid,
+                "log_version": ctx.log.version,
+                "log_length": ctx.log.next_no,
+                "paused": ctx.paused,
+            }
+        )
+    return ctxs
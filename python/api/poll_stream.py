@@ -0,0 +1,103 @@
+import asyncio
+import json
+import time
+
+from flask import Request, Response
+
+from agent import AgentContext
+from python.api.poll import output_context, output_contexts
+from python.helpers.api import ApiHandler
+from python.helpers.changes import CHAT_LIST, notifier
+
+# Server-sent events version of /poll, the web UI falls back to /poll if it fails.
+# Each event carries the same payload as /poll, but only once something changed.
+
+COALESCE_SECONDS = 0.05  # chunks streamed within this window go out as one event
+KEEPALIVE_SECONDS = 15  # comment line to detect closed connections and keep proxies open
+
+
+class PollStream(ApiHandler):
+    on_event_loop = True
+
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        # EventSource can only send GET requests, parameters come in the query string
+        ctxid = request.args.get("context", "")
+        log_guid = request.args.get("log_guid", "")
+        log_from = int(request.args.get("log_from", 0) or 0)
+
+        # browsers resume with the id of the last event they received
+        last_event = request.headers.get("Last-Event-ID", "")
+        if ":" in last_event:
+            log_guid, _, version = last_event.rpartition(":")
+            log_from = int(version or 0)
+
+        context = await self.get_context_async(ctxid)
+        return Response(
+            EventStream(context, log_guid, log_from),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
+class EventStream:
+    # iterated in a server thread under WSGI, on the event loop under ASGI (no thread held)
+    def __init__(self, context: AgentContext, log_guid: str, log_from: int):
+        self.context = context
+        self.log_guid = log_guid
+        self.log_from = log_from
+
+    def topics(self) -> list:
+        # other chats' logs do not wake the stream, their changes are not sent
+        return [self.context, self.context.log, CHAT_LIST]
+
+    def __iter__(self):
+        with notifier.subscribe(self.topics()) as changes:
+            for event in self.events():
+                if event:
+                    yield event
+                elif changes.wait(KEEPALIVE_SECONDS):
+                    time.sleep(COALESCE_SECONDS)
+                else:
+                    yield ": keepalive\n\n"
+
+    async def __aiter__(self):
+        with notifier.subscribe(self.topics(), asyncio.get_running_loop()) as changes:
+            for event in self.events():
+                if event:
+                    yield event
+                elif await changes.wait_async(KEEPALIVE_SECONDS):
+                    await asyncio.sleep(COALESCE_SECONDS)
+                else:
+                    yield ": keepalive\n\n"
+
+    def events(self):
+        # yields an event when something changed, then "" to wait for the next change;
+        # one generator per client, a slow client gets fewer events with larger deltas
+        context = self.context
+        log_guid, log_from = self.log_guid, self.log_from
+        contexts = None
+        state = None
+        while True:
+            if log_guid != context.log.guid:
+                log_from = 0  # chat was reset or replaced, client clears its history
+            output = output_context(context, log_from)
+
+            # the chat list is only sent when it changed, log versions alone do not count
+            current = output_contexts()
+            summary = [(ctx["id"], ctx["no"], ctx["paused"]) for ctx in current]
+            if summary != contexts:
+                contexts = summary
+                output["contexts"] = current
+
+            current_state = (
+                output["log_guid"],
+                output["log_version"],
+                output["log_progress"],
+                output["log_progress_active"],
+                output["paused"],
+            )
+            if current_state != state or "contexts" in output:
+                state = current_state
+                log_guid, log_from = output["log_guid"], output["log_version"]
+                yield f"id: {log_guid}:{log_from}\ndata: {json.dumps(output)}\n\n"
+            yield ""
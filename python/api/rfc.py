@@ -1,9 +1,13 @@
 from python.helpers.api import ApiHandler
 from flask import Request, Response
 
-from python.helpers import runtime
+from python.helpers import runtime, rfc
 
 class RFC(ApiHandler):
     async def process(self, input: dict, request: Request) -> dict | Response:
+        if request.headers.get("Content-Encoding") == "gzip":
+            # large calls arrive compressed, see rfc.encode_body
+            input = rfc.decode_body(request.get_data(), "gzip")
         result = await runtime.handle_rfc(input) # type: ignore
-        return result
+        body, headers = rfc.encode_body(result)
+        return Response(response=body, status=200, headers=headers)
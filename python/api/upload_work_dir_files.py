@@ -1,10 +1,10 @@
-import base64
 from werkzeug.datastructures import FileStorage
 from python.helpers.api import ApiHandler
 from flask import Request, Response, send_file
 
 from python.helpers.file_browser import FileBrowser
-from python.helpers import files, runtime
+from python.helpers import files, runtime, file_transfer
+from python.helpers.print_style import PrintStyle
 from python.api import get_work_dir_files
 import os
 
@@ -26,7 +26,11 @@ class UploadWorkDirFiles(ApiHandler):
             raise Exception("All uploads failed")
 
         # result = browser.get_files(current_path)
-        result = await runtime.call_development_function(get_work_dir_files.get_files, current_path)
+        result = await runtime.call_development_function(
+            get_work_dir_files.get_files,
+            current_path,
+            **get_work_dir_files.listing_args(request.form),
+        )
 
         return {
             "message": (
@@ -45,13 +49,12 @@ async def upload_files(uploaded_files: list[FileStorage], current_path: str):
         successful = []
         failed = []
         for file in uploaded_files:
-            file_content = file.stream.read()
-            base64_content = base64.b64encode(file_content).decode("utf-8")
-            if await runtime.call_development_function(
-                upload_file, current_path, file.filename, base64_content
-            ):
+            try:
+                # chunked, memory stays bounded for large files
+                await file_transfer.upload(file.stream, current_path, file.filename or "")
                 successful.append(file.filename)
-            else:
+            except Exception as e:
+                PrintStyle.error(f"Error uploading file {file.filename}: {e}")
                 failed.append(file.filename)
     else:
         browser = FileBrowser()
@@ -59,8 +62,3 @@ async def upload_files(uploaded_files: list[FileStorage], current_path: str):
 
     return successful, failed
 
-
-async def upload_file(current_path: str, filename: str, base64_content: str):
-    browser = FileBrowser()
-    return browser.save_file_b64(current_path, filename, base64_content)
-
@@ -1,7 +1,9 @@
 import asyncio
 from python.helpers.extension import Extension
 from python.helpers.memory import Memory
+from python.helpers import memory_recall
 from agent import LoopData
+from python.helpers.log import LogItem
 
 DATA_NAME_TASK = "_recall_memories_task"
 
@@ -43,6 +45,47 @@ class RecallMemories(Extension):
             heading="Searching memories...",
         )
 
+        if memory_recall.use_fast_recall():
+            # no utility llm, embed recent messages directly, search is shared with solutions
+            memories = await memory_recall.recall(
+                self.agent,
+                loop_data,
+                areas=[Memory.Area.MAIN.value, Memory.Area.FRAGMENTS.value],  # exclude solutions
+                limit=RecallMemories.RESULTS,
+                threshold=RecallMemories.THRESHOLD,
+            )
+        else:
+            memories = await self.search_by_query(loop_data, log_item)
+
+        # log the short result
+        if not isinstance(memories, list) or len(memories) == 0:
+            log_item.update(
+                heading="No useful memories found",
+            )
+            return
+        else:
+            log_item.update(
+                heading=f"{len(memories)} memories found",
+            )
+
+        # concatenate memory.page_content in memories:
+        memories_text = ""
+        for memory in memories:
+            memories_text += memory.page_content + "\n\n"
+        memories_text = memories_text.strip()
+
+        # log the full results
+        log_item.update(memories=memories_text)
+
+        # place to prompt
+        memories_prompt = self.agent.parse_prompt(
+            "agent.system.memories.md", memories=memories_text
+        )
+
+        # append to prompt
+        extras["memories"] = memories_prompt
+
+    async def search_by_query(self, loop_data: LoopData, log_item: LogItem):
         # get system message and chat history for util llm
         # msgs_text = self.agent.concat_messages(
         #     self.agent.history[-RecallMemories.HISTORY :]
@@ -72,34 +115,7 @@ class RecallMemories(Extension):
             threshold=RecallMemories.THRESHOLD,
             filter=f"area == '{Memory.Area.MAIN.value}' or area == '{Memory.Area.FRAGMENTS.value}'",  # exclude solutions
         )
-
-        # log the short result
-        if not isinstance(memories, list) or len(memories) == 0:
-            log_item.update(
-                heading="No useful memories found",
-            )
-            return
-        else:
-            log_item.update(
-                heading=f"{len(memories)} memories found",
-            )
-
-        # concatenate memory.page_content in memories:
-        memories_text = ""
-        for memory in memories:
-            memories_text += memory.page_content + "\n\n"
-        memories_text = memories_text.strip()
-
-        # log the full results
-        log_item.update(memories=memories_text)
-
-        # place to prompt
-        memories_prompt = self.agent.parse_prompt(
-            "agent.system.memories.md", memories=memories_text
-        )
-
-        # append to prompt
-        extras["memories"] = memories_prompt
+        return memories
 
     # except Exception as e:
     #     err = errors.format_error(e)
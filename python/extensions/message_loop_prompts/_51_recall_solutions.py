@@ -1,7 +1,9 @@
 import asyncio
 from python.helpers.extension import Extension
 from python.helpers.memory import Memory
+from python.helpers import memory_recall
 from agent import LoopData
+from python.helpers.log import LogItem
 
 DATA_NAME_TASK = "_recall_solutions_task"
 
@@ -43,6 +45,54 @@ class RecallSolutions(Extension):
             heading="Searching memory for solutions...",
         )
 
+        if memory_recall.use_fast_recall():
+            # no utility llm, reuses the embedding and search of memories recall
+            solutions = await memory_recall.recall(
+                self.agent,
+                loop_data,
+                areas=[Memory.Area.SOLUTIONS.value],
+                limit=RecallSolutions.SOLUTIONS_COUNT,
+                threshold=RecallSolutions.THRESHOLD,
+            )
+            instruments = await memory_recall.recall(
+                self.agent,
+                loop_data,
+                areas=[Memory.Area.INSTRUMENTS.value],
+                limit=RecallSolutions.INSTRUMENTS_COUNT,
+                threshold=RecallSolutions.THRESHOLD,
+            )
+        else:
+            solutions, instruments = await self.search_by_query(loop_data, log_item)
+
+        log_item.update(
+            heading=f"{len(instruments)} instruments, {len(solutions)} solutions found",
+        )
+
+        if instruments:
+            instruments_text = ""
+            for instrument in instruments:
+                instruments_text += instrument.page_content + "\n\n"
+            instruments_text = instruments_text.strip()
+            log_item.update(instruments=instruments_text)
+            instruments_prompt = self.agent.read_prompt(
+                "agent.system.instruments.md", instruments=instruments_text
+            )
+            loop_data.system.append(instruments_prompt)
+
+        if solutions:
+            solutions_text = ""
+            for solution in solutions:
+                solutions_text += solution.page_content + "\n\n"
+            solutions_text = solutions_text.strip()
+            log_item.update(solutions=solutions_text)
+            solutions_prompt = self.agent.parse_prompt(
+                "agent.system.solutions.md", solutions=solutions_text
+            )
+
+            # append to prompt
+            extras["solutions"] = solutions_prompt
+
+    async def search_by_query(self, loop_data: LoopData, log_item: LogItem):
         # get system message and chat history for util llm
         # msgs_text = self.agent.concat_messages(
         #     self.agent.history[-RecallSolutions.HISTORY :]
@@ -76,34 +126,7 @@ class RecallSolutions(Extension):
             threshold=RecallSolutions.THRESHOLD,
             filter=f"area == '{Memory.Area.INSTRUMENTS.value}'",
         )
-
-        log_item.update(
-            heading=f"{len(instruments)} instruments, {len(solutions)} solutions found",
-        )
-
-        if instruments:
-            instruments_text = ""
-            for instrument in instruments:
-                instruments_text += instrument.page_content + "\n\n"
-            instruments_text = instruments_text.strip()
-            log_item.update(instruments=instruments_text)
-            instruments_prompt = self.agent.read_prompt(
-                "agent.system.instruments.md", instruments=instruments_text
-            )
-            loop_data.system.append(instruments_prompt)
-
-        if solutions:
-            solutions_text = ""
-            for solution in solutions:
-                solutions_text += solution.page_content + "\n\n"
-            solutions_text = solutions_text.strip()
-            log_item.update(solutions=solutions_text)
-            solutions_prompt = self.agent.parse_prompt(
-                "agent.system.solutions.md", solutions=solutions_text
-            )
-
-            # append to prompt
-            extras["solutions"] = solutions_prompt
+        return solutions, instruments
 
     # except Exception as e:
     #     err = errors.format_error(e)
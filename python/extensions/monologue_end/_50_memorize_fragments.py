@@ -4,11 +4,16 @@ from python.helpers.memory import Memory
 from python.helpers.dirty_json import DirtyJson
 from agent import LoopData
 from python.helpers.log import LogItem
+from python.helpers import history
+
+# last history message already analysed, persisted with the chat
+DATA_NAME_WATERMARK = "memorized_fragments_until"
 
 
 class MemorizeMemories(Extension):
 
     REPLACE_THRESHOLD = 0.9
+    MAX_INPUT_TOKENS = 8000  # newest messages first if there is more to analyse
 
     async def execute(self, loop_data: LoopData = LoopData(), **kwargs):
         # try:
@@ -31,7 +36,18 @@ class MemorizeMemories(Extension):
 
         # get system message and chat history for util llm
         system = self.agent.read_prompt("memory.memories_sum.sys.md")
-        msgs_text = self.agent.concat_messages(self.agent.history)
+        # only messages added since the last memorization, summaries replace compressed parts
+        watermark = self.agent.get_data(DATA_NAME_WATERMARK) or 0
+        until = self.agent.history.counter
+        if watermark > until:
+            watermark = 0  # history was reset
+        msgs = self.agent.history.output_since(watermark)
+        if not msgs:
+            log_item.update(heading="No new messages to memorize.")
+            return
+        msgs_text = history.output_text_tail(
+            msgs, self.MAX_INPUT_TOKENS, ai_label="assistant", human_label="user"
+        )
 
         # log query streamed by LLM
         async def log_callback(content):
@@ -49,6 +65,7 @@ class MemorizeMemories(Extension):
 
         if not isinstance(memories, list) or len(memories) == 0:
             log_item.update(heading="No useful information to memorize.")
+            self.agent.set_data(DATA_NAME_WATERMARK, until)
             return
         else:
             log_item.update(heading=f"{len(memories)} entries to memorize.")
@@ -58,12 +75,18 @@ class MemorizeMemories(Extension):
 
         memories_txt = ""
         rem = []
+        skipped = 0
         for memory in memories:
             # solution to plain text:
             txt = f"{memory}"
             memories_txt += "\n\n" + txt
             log_item.update(memories=memories_txt.strip())
 
+            # near-identical fragment already stored, no need to embed it again
+            if await db.find_duplicate(txt, Memory.Area.FRAGMENTS.value):
+                skipped += 1
+                continue
+
             # remove previous fragments too similiar to this one
             if self.REPLACE_THRESHOLD > 0:
                 rem += await db.delete_documents_by_query(
@@ -79,11 +102,16 @@ class MemorizeMemories(Extension):
             await db.insert_text(text=txt, metadata={"area": Memory.Area.FRAGMENTS.value})
 
         log_item.update(
-            result=f"{len(memories)} entries memorized.",
-            heading=f"{len(memories)} entries memorized.",
+            result=f"{len(memories) - skipped} entries memorized.",
+            heading=f"{len(memories) - skipped} entries memorized.",
         )
         if rem:
             log_item.stream(result=f"\nReplaced {len(rem)} previous memories.")
+        if skipped:
+            log_item.stream(result=f"\nSkipped {skipped} near-duplicate memories, already memorized.")
+
+        # next memorization starts after the messages analysed now
+        self.agent.set_data(DATA_NAME_WATERMARK, until)
 
     # except Exception as e:
     #     err = errors.format_error(e)
@@ -4,11 +4,16 @@ from python.helpers.memory import Memory
 from python.helpers.dirty_json import DirtyJson
 from agent import LoopData
 from python.helpers.log import LogItem
+from python.helpers import history
+
+# last history message already analysed, persisted with the chat
+DATA_NAME_WATERMARK = "memorized_solutions_until"
 
 
 class MemorizeSolutions(Extension):
 
     REPLACE_THRESHOLD = 0.9
+    MAX_INPUT_TOKENS = 8000  # newest messages first if there is more to analyse
 
     async def execute(self, loop_data: LoopData = LoopData(), **kwargs):
         # try:
@@ -30,7 +35,18 @@ class MemorizeSolutions(Extension):
     async def memorize(self, loop_data: LoopData, log_item: LogItem, **kwargs):
         # get system message and chat history for util llm
         system = self.agent.read_prompt("memory.solutions_sum.sys.md")
-        msgs_text = self.agent.concat_messages(self.agent.history)
+        # only messages added since the last memorization, summaries replace compressed parts
+        watermark = self.agent.get_data(DATA_NAME_WATERMARK) or 0
+        until = self.agent.history.counter
+        if watermark > until:
+            watermark = 0  # history was reset
+        msgs = self.agent.history.output_since(watermark)
+        if not msgs:
+            log_item.update(heading="No new messages to memorize.")
+            return
+        msgs_text = history.output_text_tail(
+            msgs, self.MAX_INPUT_TOKENS, ai_label="assistant", human_label="user"
+        )
 
         # log query streamed by LLM
         async def log_callback(content):
@@ -48,6 +64,7 @@ class MemorizeSolutions(Extension):
 
         if not isinstance(solutions, list) or len(solutions) == 0:
             log_item.update(heading="No successful solutions to memorize.")
+            self.agent.set_data(DATA_NAME_WATERMARK, until)
             return
         else:
             log_item.update(
@@ -59,11 +76,17 @@ class MemorizeSolutions(Extension):
 
         solutions_txt = ""
         rem = []
+        skipped = 0
         for solution in solutions:
             # solution to plain text:
             txt = f"# Problem\n {solution['problem']}\n# Solution\n {solution['solution']}"
             solutions_txt += txt + "\n\n"
 
+            # near-identical solution already stored, no need to embed it again
+            if await db.find_duplicate(txt, Memory.Area.SOLUTIONS.value):
+                skipped += 1
+                continue
+
             # remove previous solutions too similiar to this one
             if self.REPLACE_THRESHOLD > 0:
                 rem += await db.delete_documents_by_query(
@@ -81,11 +104,16 @@ class MemorizeSolutions(Extension):
         solutions_txt = solutions_txt.strip()
         log_item.update(solutions=solutions_txt)
         log_item.update(
-            result=f"{len(solutions)} solutions memorized.",
-            heading=f"{len(solutions)} solutions memorized.",
+            result=f"{len(solutions) - skipped} solutions memorized.",
+            heading=f"{len(solutions) - skipped} solutions memorized.",
         )
         if rem:
             log_item.stream(result=f"\nReplaced {len(rem)} previous solutions.")
+        if skipped:
+            log_item.stream(result=f"\nSkipped {skipped} near-duplicate solutions, already memorized.")
+
+        # next memorization starts after the messages analysed now
+        self.agent.set_data(DATA_NAME_WATERMARK, until)
 
     # except Exception as e:
     #     err = errors.format_error(e)
@@ -1,4 +1,5 @@
 from abc import abstractmethod
+import asyncio
 import json
 import threading
 from typing import Union, TypedDict, Dict, Any
@@ -16,6 +17,10 @@ Output = Union[Dict[str, Any], Response, TypedDict]
 
 
 class ApiHandler:
+    # ASGI mode: handlers that only await (long polls, streams, agent results) run on the
+    # server's event loop, all others in a worker thread where blocking calls stall nothing
+    on_event_loop = False
+
     def __init__(self, app: Flask, thread_lock: threading.Lock):
         self.app = app
         self.thread_lock = thread_lock
@@ -62,3 +67,7 @@ class ApiHandler:
             if got:
                 return got
             return AgentContext(config=initialize(), id=ctxid)
+
+    async def get_context_async(self, ctxid: str):
+        # for handlers on the event loop, waits for the lock and loads settings in a thread
+        return await asyncio.to_thread(self.get_context, ctxid)
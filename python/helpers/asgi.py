@@ -0,0 +1,210 @@
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+
+from flask import Flask, Response
+
+from python.helpers.print_style import PrintStyle
+
+# ASGI serving mode for the web UI (WEB_UI_ASGI=true).
+# API handlers marked on_event_loop run on the server's long-lived event loop, the other
+# handlers and everything else (static files, index, socketio polling) in worker threads.
+
+BODY_SPOOL_SIZE = 1024 * 1024  # request bodies above this go to a temp file
+WSGI_THREADS = 256  # static files, socketio polling, handlers with blocking calls, file streams
+
+_executor = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix="AsgiWsgi")
+
+ApiRoute = Callable[[], Awaitable[Any]]
+ApiRoutes = dict[str, tuple[ApiRoute, bool]]  # path -> (handler, runs on the event loop)
+
+
+class AsgiApp:
+    def __init__(self, app: Flask, api_routes: ApiRoutes):
+        self.app = app
+        self.api_routes = api_routes
+
+    async def __call__(self, scope: dict, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            environ = build_environ(scope, await read_body(receive))
+            route = self.api_routes.get(scope["path"])
+            if route and scope["method"] in ("GET", "POST"):
+                await self._call_api(*route, environ, receive, send)
+            else:
+                await self._call_wsgi(environ, receive, send)
+        elif scope["type"] == "websocket":
+            # socketio runs on the WSGI app, which has no websockets here;
+            # refused during the handshake, its clients stay on http long-polling
+            await receive()  # websocket.connect
+            await send({"type": "websocket.close", "code": 1003})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _call_api(
+        self, route: ApiRoute, on_event_loop: bool, environ: dict, receive, send
+    ):
+        if on_event_loop:
+            # the request context lives in contextvars, it follows the awaits of this task
+            with self.app.request_context(environ):
+                response = self.app.make_response(await route())
+        else:
+            # handlers with blocking calls get a worker thread and a loop of their own,
+            # like every handler in the threaded WSGI server
+            response = await run_sync(self._call_api_sync, route, environ)
+        await send_response(
+            receive, send, response.status_code, list(response.headers.items()), response
+        )
+
+    def _call_api_sync(self, route: ApiRoute, environ: dict) -> Response:
+        with self.app.request_context(environ):
+            return self.app.make_response(asyncio.run(route()))
+
+    async def _call_wsgi(self, environ: dict, receive, send):
+        started: dict[str, Any] = {}
+
+        def start_response(status: str, headers: list, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = headers
+            return lambda data: None  # write() is not used by Flask
+
+        body = await run_sync(self.app, environ, start_response)
+        await send_response(receive, send, started["status"], started["headers"], body)
+
+
+async def read_body(receive):
+    body = tempfile.SpooledTemporaryFile(max_size=BODY_SPOOL_SIZE)
+    more = True
+    while more:
+        message = await receive()
+        body.write(message.get("body", b""))
+        more = message.get("more_body", False)
+    body.seek(0)
+    return body
+
+
+def build_environ(scope: dict, body) -> dict:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.input_terminated": True,  # body was read completely, chunked uploads included
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        key = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            environ[key] = value
+        else:
+            key = "HTTP_" + key
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def send_response(receive, send, status: int, headers: list, body):
+    iterator = None
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (name.lower().encode("latin-1"), str(value).encode("latin-1"))
+                for name, value in headers
+            ],
+        }
+    )
+    try:
+        if isinstance(body, Response) and not body.is_streamed:
+            await send({"type": "http.response.body", "body": body.get_data()})
+            return
+        disconnected = asyncio.create_task(wait_disconnect(receive))
+        source = body.response if isinstance(body, Response) else body
+        if hasattr(source, "__aiter__"):
+            # event streams that wait on the loop, no worker thread per client
+            iterator = source.__aiter__()
+            next_chunk = lambda: until_disconnect(anext(iterator, None), disconnected)
+        else:
+            # other streamed bodies (files) may block, pull them in a thread
+            iterator = iter(source)
+            next_chunk = lambda: run_sync(next, iterator, None)
+        while not disconnected.done():
+            chunk = await next_chunk()
+            if chunk is None:
+                break
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        disconnected.cancel()
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        if iterator is not None and hasattr(iterator, "aclose"):
+            await iterator.aclose()  # leaves the stream's subscription
+        if hasattr(body, "close"):
+            body.close()
+
+
+async def run_sync(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+async def until_disconnect(awaitable, disconnected: asyncio.Task):
+    # a waiting stream stops right away when the client leaves, not at its keepalive
+    task = asyncio.ensure_future(awaitable)
+    await asyncio.wait([task, disconnected], return_when=asyncio.FIRST_COMPLETED)
+    if task.done():
+        return task.result()
+    task.cancel()
+    await asyncio.wait([task])  # let the generator finish before it is closed
+    return None
+
+
+async def wait_disconnect(receive):
+    # endless streams stop at their next chunk once the client is gone
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+class AsgiServer:
+    """uvicorn behind the interface run_ui and process use for the werkzeug server."""
+
+    def __init__(self, app: AsgiApp, host: str, port: int):
+        import uvicorn  # only needed in ASGI mode
+
+        self.host = host
+        self.port = port
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host=host, port=port, access_log=False, log_level="warning")
+        )
+
+    def log_startup(self):
+        PrintStyle().print(f"Serving ASGI on http://{self.host}:{self.port}")
+
+    def serve_forever(self):
+        self.server.run()
+
+    def shutdown(self):
+        self.server.should_exit = True
@@ -6,6 +6,7 @@ from typing import Dict, List, Optional, Tuple
 from werkzeug.utils import secure_filename
 
 from python.helpers.print_style import PrintStyle
+from python.helpers.image_cache import images
 
 class AttachmentManager:
   ALLOWED_EXTENSIONS = {
@@ -73,20 +74,10 @@ class AttachmentManager:
 
   def generate_image_preview(self, image_path: str, max_size: int = 800) -> Optional[str]:
       try:
-          with Image.open(image_path) as img:
-              # Convert image if needed
-              if img.mode in ('RGBA', 'P'):
-                  img = img.convert('RGB')
-              
-              # Resize for preview
-              img.thumbnail((max_size, max_size))
-              
-              # Save to buffer
-              buffer = io.BytesIO()
-              img.save(buffer, format="JPEG", quality=70, optimize=True)
-              
-              # Convert to base64
-              return base64.b64encode(buffer.getvalue()).decode('utf-8')
+          # resized once in the image cache, reused for the same content
+          preview_path, _ = images.variant_sync(image_path, max_size, "jpeg")
+          with open(preview_path, "rb") as f:
+              return base64.b64encode(f.read()).decode('utf-8')
       except Exception as e:
           PrintStyle.error(f"Error generating preview for {image_path}: {e}")
           return None
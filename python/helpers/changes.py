@@ -0,0 +1,106 @@
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Hashable, Iterable
+
+# Process-wide change signal for the web UI: logs, progress and the chat list bump it,
+# push and poll endpoints wait on it instead of polling the state in a loop.
+
+CHAT_LIST = "chat_list"  # topic of chats added, removed or paused
+
+
+class Subscription:
+    # wakes one stream on changes of its topics (a log, a context, CHAT_LIST),
+    # created before the state is read so a change made meanwhile is not missed
+    def __init__(self, topics: Iterable[Hashable], loop: asyncio.AbstractEventLoop | None):
+        self.topics = set(topics)
+        self.loop = loop
+        self._event = threading.Event()
+        self._async_event = asyncio.Event()
+
+    def _set(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._async_event.set)
+        else:
+            self._event.set()
+
+    def wait(self, timeout: float) -> bool:
+        # True if a topic changed, False after the timeout
+        changed = self._event.wait(timeout)
+        self._event.clear()
+        return changed
+
+    async def wait_async(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._async_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        changed = self._async_event.is_set()
+        self._async_event.clear()
+        return changed
+
+
+class ChangeNotifier:
+    def __init__(self):
+        self.version = 0
+        self._condition = threading.Condition()
+        self._events: list[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        self._subscriptions: list[Subscription] = []
+
+    def notify(self, *topics: Hashable) -> int:
+        # version waiters wake on every change, subscriptions only on their topics
+        with self._condition:
+            self.version += 1
+            self._condition.notify_all()
+            for loop, event in self._events:
+                try:
+                    loop.call_soon_threadsafe(event.set)
+                except RuntimeError:
+                    pass  # loop already closed, its waiter is gone
+            for subscription in self._subscriptions:
+                if topics and subscription.topics.isdisjoint(topics):
+                    continue
+                try:
+                    subscription._set()
+                except RuntimeError:
+                    pass
+            return self.version
+
+    @contextmanager
+    def subscribe(
+        self, topics: Iterable[Hashable], loop: asyncio.AbstractEventLoop | None = None
+    ):
+        # pass the running loop to wait with wait_async, otherwise it blocks the thread
+        subscription = Subscription(topics, loop)
+        with self._condition:
+            self._subscriptions.append(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._condition:
+                self._subscriptions.remove(subscription)
+
+    def wait(self, version: int, timeout: float) -> int:
+        # blocks until something changed after version or the timeout passed
+        with self._condition:
+            self._condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    async def wait_async(self, version: int, timeout: float) -> int:
+        # same for request handlers, waits on an asyncio.Event of the calling loop
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._condition:
+            if self.version != version:
+                return self.version
+            self._events.append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._condition:
+                self._events.remove(waiter)
+        return self.version
+
+
+notifier = ChangeNotifier()
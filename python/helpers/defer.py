@@ -82,6 +82,12 @@ class DeferredTask:
     async def _run(self):
         return await self.func(*self.args, **self.kwargs)
 
+    def add_done_callback(self, callback: Callable[[Future], Any]) -> None:
+        # called from the task's thread with the future of the current run
+        if not self._future:
+            raise RuntimeError("Task hasn't been started")
+        self._future.add_done_callback(callback)
+
     def is_ready(self) -> bool:
         return self._future.done() if self._future else False
 
@@ -99,19 +105,15 @@ class DeferredTask:
         if not self._future:
             raise RuntimeError("Task hasn't been started")
 
-        loop = asyncio.get_running_loop()
-
-        def _get_result():
-            try:
-                result = self._future.result(timeout)  # type: ignore
-                # self.kill()
-                return result
-            except TimeoutError:
-                raise TimeoutError(
-                    "The task did not complete within the specified timeout."
-                )
-
-        return await loop.run_in_executor(None, _get_result)
+        # await the task's future on the caller's loop, no thread is parked meanwhile
+        # shield: a cancelled or timed out caller must not cancel the task itself
+        future = asyncio.shield(asyncio.wrap_future(self._future))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                "The task did not complete within the specified timeout."
+            )
 
     def kill(self, terminate_thread: bool = False) -> None:
         """Kill the task and optionally terminate its thread."""
@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.stores import ByteStore
+
+from python.helpers import dotenv
+
+QUERY_CACHE_SIZE = 2048  # max query vectors kept in RAM across all models
+DIMENSION_PROBE = "example"
+
+
+class QueryCache:
+    def __init__(self, max_items: int = QUERY_CACHE_SIZE):
+        self.max_items = max_items
+        self._items: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> list[float] | None:
+        with self._lock:
+            vector = self._items.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)  # mark as recently used
+            self.hits += 1
+            return vector
+
+    def set(self, key: str, vector: list[float]):
+        with self._lock:
+            self._items[key] = vector
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)  # evict least recently used
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+# shared by all memory indexes and vector dbs in this process
+query_cache = QueryCache()
+_dimensions: dict[str, int] = {}
+
+
+def get_query_store_items() -> int:
+    # query vectors kept in the persistent store per model, 0 = memory tier only
+    return int(dotenv.get_dotenv_value("EMBEDDING_QUERY_STORE_ITEMS", 0) or 0)
+
+
+def get_namespace(model: Embeddings) -> str:
+    return getattr(model, "model", getattr(model, "model_name", "default"))
+
+
+def query_prefix(namespace: str) -> str:
+    return f"query/{_safe_namespace(namespace)}/"
+
+
+def query_key(namespace: str, text: str) -> str:
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    return query_prefix(namespace) + digest
+
+
+def dimension_key(namespace: str) -> str:
+    return f"dimension/{_safe_namespace(namespace)}"
+
+
+def _safe_namespace(namespace: str) -> str:
+    # file stores only accept a limited charset in keys (ollama names contain ":")
+    return re.sub(r"[^a-zA-Z0-9_.\-]", "_", namespace)
+
+
+class QueryCachedEmbeddings(Embeddings):
+    """Embeddings wrapper that caches query vectors in a shared LRU and optionally in a byte store."""
+
+    def __init__(
+        self,
+        embedder: Embeddings,
+        namespace: str,
+        store: ByteStore | None = None,
+        cache: QueryCache | None = None,
+        store_items: int = 0,
+    ):
+        self.embedder = embedder
+        self.namespace = namespace
+        self.store = store  # model dimension, and query vectors when store_items is set
+        self.cache = cache or query_cache
+        self.store_items = store_items if store else 0
+        self._stored_since_prune = -1  # prune once on the first write
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embedder.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embedder.aembed_documents(texts)
+
+    def cached_documents(self, texts: List[str]) -> List[List[float] | None]:
+        # document vectors already in the cache, never calls the model
+        store = getattr(self.embedder, "document_embedding_store", None)
+        if store is None:
+            return [None] * len(texts)
+        return store.mget(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = query_key(self.namespace, text)
+        vector = self.cache.get(key)
+        if vector is None and self.store_items:
+            vector = self._load_stored(key)
+        if vector is None:
+            vector = self.embedder.embed_query(text)
+            self._set_cached(key, vector)
+            if self.store_items:
+                self._store(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        # the persistent tier is file i/o, kept off the event loop
+        key = query_key(self.namespace, text)
+        vector = self.cache.get(key)
+        if vector is None and self.store_items:
+            vector = await asyncio.to_thread(self._load_stored, key)
+        if vector is None:
+            vector = await self.embedder.aembed_query(text)
+            self._set_cached(key, vector)
+            if self.store_items:
+                await asyncio.to_thread(self._store, key, vector)
+        return vector
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        # concurrent single-query calls, not one provider batch (queries must take the query path)
+        return list(await asyncio.gather(*[self.aembed_query(text) for text in texts]))
+
+    def get_dimension(self) -> int:
+        # memory first, then persistent store, embed a probe only as last resort
+        dim = _dimensions.get(self.namespace)
+        if dim:
+            return dim
+        if self.store:
+            stored = self.store.mget([dimension_key(self.namespace)])[0]
+            if stored:
+                dim = int(stored.decode("utf-8"))
+        if not dim:
+            dim = len(self.embed_query(DIMENSION_PROBE))  # also stores the dimension
+        _dimensions[self.namespace] = dim
+        return dim
+
+    def _load_stored(self, key: str) -> list[float] | None:
+        stored = self.store.mget([key])[0]  # type: ignore
+        if not stored:
+            return None
+        vector = json.loads(stored.decode("utf-8"))
+        self.cache.set(key, vector)  # promote to memory tier
+        return vector
+
+    def _set_cached(self, key: str, vector: list[float]):
+        self.cache.set(key, vector)
+        if self.namespace not in _dimensions:
+            _dimensions[self.namespace] = len(vector)
+            if self.store:
+                self.store.mset(
+                    [(dimension_key(self.namespace), str(len(vector)).encode("utf-8"))]
+                )
+
+    def _store(self, key: str, vector: list[float]):
+        self.store.mset([(key, json.dumps(vector).encode("utf-8"))])  # type: ignore
+        self._stored_since_prune += 1
+        if not self._stored_since_prune or self._stored_since_prune >= max(self.store_items // 10, 1):
+            self._stored_since_prune = 0
+            self._prune()
+
+    def _prune(self):
+        # least recently written query vectors go first, down to the configured count
+        keys = list(self.store.yield_keys(prefix=query_prefix(self.namespace)))  # type: ignore
+        if len(keys) <= self.store_items:
+            return
+        root = getattr(self.store, "root_path", None)
+        if root is not None:
+            keys.sort(key=lambda key: _mtime(os.path.join(root, key)))
+        self.store.mdelete(keys[: len(keys) - self.store_items])  # type: ignore
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
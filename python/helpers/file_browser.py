@@ -3,6 +3,10 @@ from pathlib import Path
 import shutil
 import tempfile
 import base64
+import threading
+import time
+from collections import OrderedDict
+from stat import S_ISDIR
 from typing import Dict, List, Tuple, Optional, Any
 import zipfile
 from werkzeug.utils import secure_filename
@@ -11,6 +15,93 @@ from datetime import datetime
 from python.helpers import files, runtime
 from python.helpers.print_style import PrintStyle
 
+PAGE_SIZE = 200
+MAX_PAGE_SIZE = 5000
+LISTING_CACHE_SIZE = 32  # directories
+LISTING_MAX_AGE = 10  # seconds, file sizes and times do not change the directory mtime
+
+PART_SUFFIX = ".part"  # unfinished uploads of file_transfer, not listed
+
+ListingEntry = Tuple[str, bool, int, float]  # name, is_dir, size, mtime
+
+
+class ListingCache:
+    """Directory listings reused until the directory mtime changes, with their sort orders."""
+
+    def __init__(self, size: int = LISTING_CACHE_SIZE):
+        self.size = size
+        self.lock = threading.Lock()
+        self.items: OrderedDict[str, dict] = OrderedDict()
+
+    def get(self, path: str, sort_by: str, sort_direction: str) -> List[ListingEntry]:
+        mtime = os.stat(path).st_mtime_ns
+        with self.lock:
+            item = self.items.get(path)
+            if item and (item["mtime"] != mtime or time.monotonic() - item["time"] > LISTING_MAX_AGE):
+                item = None
+            if item:
+                self.items.move_to_end(path)
+        if not item:
+            # scanned outside the lock, other directories are served meanwhile
+            item = {"mtime": mtime, "time": time.monotonic(), "entries": _scan(path), "sorted": {}}
+            with self.lock:
+                self.items[path] = item
+                while len(self.items) > self.size:
+                    self.items.popitem(last=False)
+
+        key = (sort_by, sort_direction)
+        if key not in item["sorted"]:
+            item["sorted"][key] = _sort(item["entries"], sort_by, sort_direction)
+        return item["sorted"][key]
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+def _scan(path: str) -> List[ListingEntry]:
+    entries = []
+    with os.scandir(path) as iterator:
+        for entry in iterator:
+            try:
+                stat = entry.stat()  # one stat per entry, follows links like before
+            except OSError:
+                stat = entry.stat(follow_symlinks=False)  # broken link
+            is_dir = S_ISDIR(stat.st_mode)
+            if not is_dir and entry.name.endswith(PART_SUFFIX):
+                continue
+            entries.append((entry.name, is_dir, 0 if is_dir else stat.st_size, stat.st_mtime))
+    return entries
+
+
+def _sort(entries: List[ListingEntry], sort_by: str, sort_direction: str) -> List[ListingEntry]:
+    index = {"size": 2, "date": 3}.get(sort_by)
+    reverse = sort_direction == "desc"
+    result = sorted(entries, key=lambda entry: entry[0].lower(), reverse=reverse)
+    if index:
+        result.sort(key=lambda entry: entry[index], reverse=reverse)  # stable, ties by name
+    result.sort(key=lambda entry: not entry[1])  # folders always come first
+    return result
+
+
+def _cursor_start(entries: List[ListingEntry], cursor: str) -> int:
+    # cursor is "<offset>:<last name>", the name keeps pages aligned when entries
+    # before it were added or removed since the previous page
+    if not cursor:
+        return 0
+    offset, _, name = cursor.partition(":")
+    offset = int(offset) if offset.isdigit() else 0
+    if 0 < offset <= len(entries) and entries[offset - 1][0] == name:
+        return offset
+    for index, entry in enumerate(entries):
+        if entry[0] == name:
+            return index + 1
+    return min(offset, len(entries))
+
+
+listing_cache = ListingCache()
+
+
 class FileBrowser:
     ALLOWED_EXTENSIONS = {
         'image': {'jpg', 'jpeg', 'png', 'bmp'},
@@ -122,65 +213,64 @@ class FileBrowser:
     def _get_file_extension(self, filename: str) -> str:
         return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
         
-    def get_files(self, current_path: str = "") -> Dict:
+    def get_files(
+        self,
+        current_path: str = "",
+        cursor: str = "",
+        limit: int = PAGE_SIZE,
+        sort_by: str = "name",
+        sort_direction: str = "asc",
+        filter: str = "",
+    ) -> Dict:
         try:
             # Resolve the full path while preventing directory traversal
             full_path = (self.base_dir / current_path).resolve()
             if not str(full_path).startswith(str(self.base_dir)):
                 raise ValueError("Invalid path")
 
-            files = []
-            folders = []
-
-            # List all entries in the current directory
-            for entry in os.scandir(full_path):
-                entry_data: Dict[str, Any] = {
-                    "name": entry.name,
-                    "path": str(Path(entry.path).relative_to(self.base_dir)),
-                    "modified": datetime.fromtimestamp(entry.stat().st_mtime).isoformat()
-                }
-
-                if entry.is_file():
-                    entry_data.update({
-                        "type": self._get_file_type(entry.name),
-                        "size": entry.stat().st_size,
-                        "is_dir": False
-                    })
-                    files.append(entry_data)
-                else:
-                    entry_data.update({
-                        "type": "folder",
-                        "size": 0,  # Directories show as 0 bytes
-                        "is_dir": True
-                    })
-                    folders.append(entry_data)
-
-            # Combine folders and files, folders first
-            all_entries = folders + files
+            # sorted and filtered on the server, the client gets one page at a time
+            entries = listing_cache.get(str(full_path), sort_by, sort_direction)
+            if filter:
+                filter = filter.lower()
+                entries = [entry for entry in entries if filter in entry[0].lower()]
+            limit = max(1, min(limit, MAX_PAGE_SIZE))
+            start = _cursor_start(entries, cursor)
+            page = entries[start : start + limit]
+            end = start + len(page)
 
             # Get parent directory path if not at root
             parent_path = ""
             if current_path:
                 try:
-                    # Get the absolute path of current directory
-                    current_abs = (self.base_dir / current_path).resolve()
-
                     # parent_path is empty only if we're already at root
-                    if str(current_abs) != str(self.base_dir):
+                    if str(full_path) != str(self.base_dir):
                         parent_path = str(Path(current_path).parent)
                     
                 except Exception as e:
                     parent_path = ""
 
             return {
-                "entries": all_entries,
+                "entries": [self._entry_data(full_path, entry) for entry in page],
                 "current_path": current_path,
-                "parent_path": parent_path
+                "parent_path": parent_path,
+                "total": len(entries),
+                "next_cursor": f"{end}:{page[-1][0]}" if end < len(entries) else "",
             }
 
         except Exception as e:
             PrintStyle.error(f"Error reading directory: {e}")
-            return {"entries": [], "current_path": "", "parent_path": ""}
+            return {"entries": [], "current_path": "", "parent_path": "", "total": 0, "next_cursor": ""}
+
+    def _entry_data(self, full_path: Path, entry: "ListingEntry") -> Dict[str, Any]:
+        name, is_dir, size, mtime = entry
+        return {
+            "name": name,
+            "path": str((full_path / name).relative_to(self.base_dir)),
+            "modified": datetime.fromtimestamp(mtime).isoformat(),
+            "type": "folder" if is_dir else self._get_file_type(name),
+            "size": size,  # Directories show as 0 bytes
+            "is_dir": is_dir,
+        }
         
     def get_full_path(self, file_path: str, allow_dir: bool = False) -> str:
         """Get full file path if it exists and is within base_dir"""
@@ -0,0 +1,212 @@
+import base64
+import glob
+import hashlib
+import os
+import time
+import uuid
+from typing import IO, Iterator
+
+from python.helpers import files, runtime
+from python.helpers.defer import EventLoopThread
+from python.helpers.file_browser import PART_SUFFIX, FileBrowser
+
+# Chunked file transfer over RFC (development mode).
+# Files move in fixed-size chunks, each with its sha256, so neither side holds more
+# than a couple of chunks in memory. Each upload writes its own "{name}.{upload_id}.part"
+# file next to the target, so concurrent uploads of one name do not mix. A part file
+# left by a failed transfer is taken over by the next upload of the same name, which
+# resumes from it once the already sent prefix is verified.
+
+CHUNK_SIZE = 1024 * 1024
+MAX_RETRIES = 3  # per chunk, on transport or checksum errors
+STALE_SECONDS = 60  # part files unchanged this long belong to no running upload
+
+_thread = EventLoopThread("FileTransfer")  # prefetches download chunks
+
+
+def checksum(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# --- functions called over RFC, they run on the side that owns the files ---
+
+
+def upload_status(current_path: str, filename: str, upload_id: str) -> dict:
+    # size and checksum of a partial upload left by an earlier attempt, taken over by this one
+    target = _target_path(current_path, filename)
+    part = _part_path(target, upload_id)
+    leftovers = glob.glob(glob.escape(target) + ".*" + PART_SUFFIX)
+    for old in sorted(leftovers, key=_mtime, reverse=True):
+        if time.time() - _mtime(old) < STALE_SECONDS:
+            continue  # still being written by another upload
+        try:
+            os.rename(old, part)  # no other upload writes to it from now on
+            break
+        except FileNotFoundError:
+            continue  # taken over by a concurrent upload
+    if not os.path.isfile(part):
+        return {"offset": 0, "checksum": checksum(b"")}
+    hash = hashlib.sha256()
+    with open(part, "rb") as f:
+        while data := f.read(CHUNK_SIZE):
+            hash.update(data)
+    return {"offset": os.path.getsize(part), "checksum": hash.hexdigest()}
+
+
+def upload_chunk(
+    current_path: str, filename: str, upload_id: str, offset: int, data: str, hash: str
+) -> int:
+    content = base64.b64decode(data)
+    if checksum(content) != hash:
+        raise ValueError(f"Checksum mismatch in {filename} at offset {offset}")
+    part = _part_path(_target_path(current_path, filename), upload_id)
+    if offset and not os.path.isfile(part):
+        raise ValueError(f"Upload of {filename} was discarded")
+    os.makedirs(os.path.dirname(part), exist_ok=True)
+    with open(part, "r+b" if os.path.exists(part) else "wb") as f:
+        # a resent chunk overwrites its own range, anything after it is stale
+        f.truncate(offset)
+        f.seek(offset)
+        f.write(content)
+    return offset + len(content)
+
+
+def upload_finish(current_path: str, filename: str, upload_id: str, size: int) -> bool:
+    target = _target_path(current_path, filename)
+    part = _part_path(target, upload_id)
+    if not os.path.isfile(part) or os.path.getsize(part) != size:
+        raise ValueError(f"Incomplete upload of {filename}")
+    os.replace(part, target)
+    return True
+
+
+def upload_discard(current_path: str, filename: str, upload_id: str) -> bool:
+    part = _part_path(_target_path(current_path, filename), upload_id)
+    if os.path.isfile(part):
+        os.remove(part)
+    return True
+
+
+def read_chunk(path: str, offset: int, size: int = CHUNK_SIZE) -> dict:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        content = f.read(size)
+        eof = f.tell() >= os.fstat(f.fileno()).st_size
+    return {
+        "data": base64.b64encode(content).decode("utf-8"),
+        "checksum": checksum(content),
+        "eof": eof or not content,
+    }
+
+
+def zip_entries(path: str) -> list[dict]:
+    return list(files.zip_entries(path))
+
+
+def _target_path(current_path: str, filename: str) -> str:
+    base_dir = FileBrowser().base_dir
+    target = (base_dir / current_path / filename).resolve()
+    if not str(target).startswith(str(base_dir)):
+        raise ValueError("Invalid target directory")
+    return str(target)
+
+
+def _part_path(target: str, upload_id: str) -> str:
+    if not upload_id.isalnum():
+        raise ValueError("Invalid upload id")
+    return f"{target}.{upload_id}{PART_SUFFIX}"
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+# --- callers ---
+
+
+async def upload(stream: IO[bytes], current_path: str, filename: str) -> bool:
+    upload_id = uuid.uuid4().hex
+    offset = await _resume_offset(stream, current_path, filename, upload_id)
+    while True:
+        content = stream.read(CHUNK_SIZE)
+        if not content:
+            break
+        offset = await _retry(
+            upload_chunk,
+            current_path,
+            filename,
+            upload_id,
+            offset,
+            base64.b64encode(content).decode("utf-8"),
+            checksum(content),
+        )
+    return await runtime.call_development_function(
+        upload_finish, current_path, filename, upload_id, offset
+    )
+
+
+async def _resume_offset(
+    stream: IO[bytes], current_path: str, filename: str, upload_id: str
+) -> int:
+    status = await runtime.call_development_function(
+        upload_status, current_path, filename, upload_id
+    )
+    if not status["offset"]:
+        return 0
+    # the part file is kept only if it matches the start of this upload
+    hash = hashlib.sha256()
+    remaining = status["offset"]
+    while remaining > 0:
+        content = stream.read(min(CHUNK_SIZE, remaining))
+        if not content:
+            break
+        hash.update(content)
+        remaining -= len(content)
+    if remaining == 0 and hash.hexdigest() == status["checksum"]:
+        return status["offset"]
+    stream.seek(0)
+    await runtime.call_development_function(upload_discard, current_path, filename, upload_id)
+    return 0
+
+
+def download(path: str) -> Iterator[bytes]:
+    # sync generator for a streamed flask response, the next chunk is fetched
+    # on the transfer thread while the current one is sent
+    future = _thread.run_coroutine(_fetch_chunk(path, 0))
+    offset = 0
+    while True:
+        chunk = future.result()
+        content = base64.b64decode(chunk["data"])
+        offset += len(content)
+        if not chunk["eof"]:
+            future = _thread.run_coroutine(_fetch_chunk(path, offset))
+        if content:
+            yield content
+        if chunk["eof"]:
+            return
+
+
+def download_zip(path: str) -> Iterator[bytes]:
+    # folder zipped on this side while its files are downloaded in chunks
+    entries = _thread.run_coroutine(_retry(zip_entries, path)).result()
+    yield from files.zip_stream(entries, download)
+
+
+async def _fetch_chunk(path: str, offset: int) -> dict:
+    for _ in range(MAX_RETRIES):
+        chunk = await _retry(read_chunk, path, offset)
+        if checksum(base64.b64decode(chunk["data"])) == chunk["checksum"]:
+            return chunk
+    raise ValueError(f"Checksum mismatch in {path} at offset {offset}")
+
+
+async def _retry(func, *args):
+    for attempt in range(MAX_RETRIES):
+        try:
+            return await runtime.call_development_function(func, *args)
+        except Exception:
+            if attempt == MAX_RETRIES - 1:
+                raise
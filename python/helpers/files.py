@@ -5,7 +5,9 @@ import os, re
 import re
 import shutil
 import tempfile
+import time
 import zipfile
+from typing import Callable, Iterable, Iterator
 
 
 def parse_file(_relative_path, _backup_dirs=None, _encoding="utf-8", **kwargs):
@@ -240,6 +242,94 @@ def zip_dir(dir_path: str):
     return zip_file_path
 
 
+# already compressed formats, deflating them again only costs cpu
+ZIP_STORED_EXTENSIONS = {
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar", ".whl", ".jar",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif", ".heic",
+    ".mp3", ".m4a", ".ogg", ".flac", ".mp4", ".mkv", ".mov", ".avi", ".webm",
+    ".pdf", ".docx", ".xlsx", ".pptx", ".odt", ".epub",
+}
+ZIP_CHUNK_SIZE = 1024 * 1024
+
+
+def zip_entries(dir_path: str) -> Iterator[dict]:
+    # files of a folder for zip_stream, names inside the zip start with the folder name
+    full_path = os.path.normpath(get_abs_path(dir_path))
+    base_name = os.path.basename(full_path)
+    for root, _, files in os.walk(full_path):
+        for file in files:
+            file_path = os.path.join(root, file)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue  # broken links, files removed meanwhile
+            yield {
+                "path": file_path,
+                "name": os.path.join(base_name, os.path.relpath(file_path, full_path)),
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "mode": stat.st_mode,
+            }
+
+
+def read_chunks(path: str, chunk_size: int = ZIP_CHUNK_SIZE) -> Iterator[bytes]:
+    with open(path, "rb") as file:
+        while data := file.read(chunk_size):
+            yield data
+
+
+def zip_stream(
+    entries: Iterable[dict], read: Callable[[str], Iterable[bytes]] = read_chunks
+) -> Iterator[bytes]:
+    # zip archive produced while it is sent, memory stays at about one chunk per entry
+    # and nothing is written to disk, sizes and crc go to data descriptors after each entry
+    buffer = _ZipBuffer()
+    with zipfile.ZipFile(buffer, "w") as zip:
+        for entry in entries:
+            info = zipfile.ZipInfo(entry["name"], _zip_date_time(entry["mtime"]))
+            info.file_size = entry["size"]  # lets zipfile choose zip64 for large files
+            info.external_attr = (entry.get("mode", 0o100644) & 0xFFFF) << 16
+            stored = os.path.splitext(entry["name"])[1].lower() in ZIP_STORED_EXTENSIONS
+            info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+            with zip.open(info, "w") as dest:
+                for data in read(entry["path"]):
+                    dest.write(data)
+                    if buffer.size:
+                        yield buffer.take()
+            if buffer.size:
+                yield buffer.take()
+    yield buffer.take()  # central directory
+
+
+def zip_dir_stream(dir_path: str) -> Iterator[bytes]:
+    return zip_stream(zip_entries(dir_path))
+
+
+def _zip_date_time(mtime: float) -> tuple:
+    return max(time.localtime(mtime)[:6], (1980, 1, 1, 0, 0, 0))  # zip dates start in 1980
+
+
+class _ZipBuffer:
+    # write only, unseekable target for zipfile, emptied by zip_stream after each write
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        self.size = 0
+        return data
+
+
 def move_file(relative_path: str, new_path: str):
     abs_path = get_abs_path(relative_path)
     new_abs_path = get_abs_path(new_path)
@@ -1,7 +1,9 @@
 from git import Repo
 from datetime import datetime
 import os
-from python.helpers import files
+from python.helpers import errors, files
+
+_cached: tuple[dict | None, str | None] | None = None
 
 def get_git_info():
     # Get the current working directory (assuming the repo is in the same folder as the script)
@@ -47,4 +49,15 @@ def get_git_info():
         "version": version
     }
 
-    return git_info
\ No newline at end of file
+    return git_info
+
+
+def get_git_info_cached() -> tuple[dict | None, str | None]:
+    # (info, error) read once per process, git describe runs a subprocess
+    global _cached
+    if _cached is None:
+        try:
+            _cached = (get_git_info(), None)
+        except Exception as e:
+            _cached = (None, errors.error_text(e))
+    return _cached
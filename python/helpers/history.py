@@ -65,12 +65,21 @@ class Record:
     def output_text(self, human_label="user", ai_label="ai"):
         return output_text(self.output(), ai_label, human_label)
 
+    def last_no(self) -> int:
+        # sequence number of the newest message in this record
+        return 0
+
+    def output_since(self, no: int) -> list[OutputMessage]:
+        # only content containing messages newer than no, summaries stand in for their messages
+        return self.output() if self.last_no() > no else []
+
 
 class Message(Record):
     def __init__(self, ai: bool, content: MessageContent):
         self.ai = ai
         self.content = content
         self.summary: MessageContent = ""
+        self.no = 0  # sequence number within history, see History.add_message
 
     async def compress(self):
         return False
@@ -84,18 +93,23 @@ class Message(Record):
     def output_text(self, human_label="user", ai_label="ai"):
         return output_text(self.output(), ai_label, human_label)
 
+    def last_no(self) -> int:
+        return self.no
+
     def to_dict(self):
         return {
             "_cls": "Message",
             "ai": self.ai,
             "content": self.content,
             "summary": self.summary,
+            "no": self.no,
         }
 
     @staticmethod
     def from_dict(data: dict, history: "History"):
         msg = Message(ai=data["ai"], content=data.get("content", "Content lost"))
         msg.summary = data.get("summary", "")
+        msg.no = data.get("no", 0)
         return msg
 
 
@@ -117,6 +131,15 @@ class Topic(Record):
             msgs = [m for r in self.messages for m in r.output()]
             return group_outputs_abab(msgs)
 
+    def last_no(self) -> int:
+        return max((m.no for m in self.messages), default=0)
+
+    def output_since(self, no: int) -> list[OutputMessage]:
+        if self.summary:
+            return super().output_since(no)
+        msgs = [m for r in self.messages for m in r.output_since(no)]
+        return group_outputs_abab(msgs)
+
     async def summarize(self):
         self.summary = await self.summarize_messages(self.messages)
         return self.summary
@@ -167,6 +190,7 @@ class Topic(Record):
                 "fw.msg_summary.md", summary=summary
             )
             sum_msg = Message(False, sum_msg_content)
+            sum_msg.no = msg_to_sum[-1].no  # counts as new only if it covers new messages
             self.messages[1 : cnt_to_sum + 1] = [sum_msg]
             return True
         return False
@@ -213,6 +237,15 @@ class Bulk(Record):
             msgs = [m for r in self.records for m in r.output()]
             return group_outputs_abab(msgs)
 
+    def last_no(self) -> int:
+        return max((r.last_no() for r in self.records), default=0)
+
+    def output_since(self, no: int) -> list[OutputMessage]:
+        if self.summary:
+            return super().output_since(no)
+        msgs = [m for r in self.records for m in r.output_since(no)]
+        return group_outputs_abab(msgs)
+
     async def compress(self):
         return False
 
@@ -249,6 +282,7 @@ class History(Record):
         self.topics: list[Topic] = []
         self.current = Topic(history=self)
         self.agent: Agent = agent
+        self.counter = 0  # sequence number of the last added message
 
     def is_over_limit(self):
         limit = get_ctx_size_for_history()
@@ -272,7 +306,10 @@ class History(Record):
         )
 
     def add_message(self, ai: bool, content: MessageContent):
-        return self.current.add_message(ai, content=content)
+        msg = self.current.add_message(ai, content=content)
+        self.counter += 1
+        msg.no = self.counter
+        return msg
 
     def new_topic(self):
         if self.current.messages:
@@ -287,19 +324,49 @@ class History(Record):
         result = group_outputs_abab(result)
         return result
 
+    def last_no(self) -> int:
+        return self.counter
+
+    def output_since(self, no: int) -> list[OutputMessage]:
+        result: list[OutputMessage] = []
+        result += [m for b in self.bulks for m in b.output_since(no)]
+        result += [m for t in self.topics for m in t.output_since(no)]
+        result += self.current.output_since(no)
+        return group_outputs_abab(result)
+
     @staticmethod
     def from_dict(data: dict, history: "History"):
         history.bulks = [Bulk.from_dict(b, history=history) for b in data["bulks"]]
         history.topics = [Topic.from_dict(t, history=history) for t in data["topics"]]
         history.current = Topic.from_dict(data["current"], history=history)
+        history.counter = data.get("counter", 0)
+        if not history.counter:
+            history._number_messages()  # saved before messages were numbered
         return history
 
+    def _number_messages(self):
+        def walk(record: Record):
+            if isinstance(record, Message):
+                self.counter += 1
+                record.no = self.counter
+            elif isinstance(record, Topic):
+                for m in record.messages:
+                    walk(m)
+            elif isinstance(record, Bulk):
+                for r in record.records:
+                    walk(r)
+
+        self.counter = 0
+        for record in [*self.bulks, *self.topics, self.current]:
+            walk(record)
+
     def to_dict(self):
         return {
             "_cls": "History",
             "bulks": [b.to_dict() for b in self.bulks],
             "topics": [t.to_dict() for t in self.topics],
             "current": self.current.to_dict(),
+            "counter": self.counter,
         }
 
     def serialize(self):
@@ -439,6 +506,24 @@ def output_text(messages: list[OutputMessage], ai_label="ai", human_label="human
     return "\n".join(serialize_output(o, ai_label, human_label) for o in messages)
 
 
+def output_text_tail(
+    messages: list[OutputMessage], max_tokens: int, ai_label="ai", human_label="human"
+):
+    # newest messages that fit into max_tokens, the newest one is cut from the start if alone too long
+    texts: list[str] = []
+    total = 0
+    for o in reversed(messages):
+        text = serialize_output(o, ai_label, human_label)
+        tok = tokens.approximate_tokens(text)
+        if total + tok > max_tokens:
+            if not texts:
+                texts.append(text[-int(len(text) * max_tokens / tok) :])
+            break
+        texts.append(text)
+        total += tok
+    return "\n".join(reversed(texts))
+
+
 def merge_outputs(a: MessageContent, b: MessageContent) -> MessageContent:
     if not isinstance(a, list):
         a = [a]
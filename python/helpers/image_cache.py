@@ -0,0 +1,160 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from python.helpers import dotenv, files
+
+try:
+    from PIL import Image  # optional, originals are served without it
+except ImportError:
+    Image = None
+
+# Resized variants of screenshots and attachments, content addressed in tmp/images.
+# Requested sizes snap to a few widths so one source has a handful of variants,
+# they are encoded in a worker pool and shared by concurrent requests.
+# Old screenshots in tmp/browser and old variants are evicted by age and total size.
+
+CACHE_DIR = "tmp/images"
+SCREENSHOTS_DIR = "tmp/browser"
+MISSING_IMAGE = "webui/public/image.svg"  # served for evicted screenshots still linked from older chats
+SIZES = (160, 320, 640, 800, 1280, 1920)  # longest side in pixels
+FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+QUALITY = 75
+EVICT_INTERVAL = 60  # seconds between eviction runs
+TMP_MAX_AGE = 3600  # seconds, older .tmp files are leftovers of a crash, not variants being written
+
+
+def _max_bytes(key: str, default: float) -> int:
+    return int(float(dotenv.get_dotenv_value(key, default) or 0) * 1024 * 1024)
+
+
+class ImageCache:
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(dotenv.get_dotenv_value("IMAGE_CACHE_WORKERS", 0))
+            or min(4, os.cpu_count() or 1),
+            thread_name_prefix="ImageCache",
+        )
+        self.lock = threading.Lock()
+        self.hashes: dict[tuple, str] = {}  # (path, mtime, size) -> content hash
+        self.pending: dict[tuple, Future] = {}  # (path, size, format) -> job
+        self.last_evict = 0.0
+
+    def variant(self, path: str, size: int, format: str = "webp") -> Future:
+        # future with (variant path, etag), the original file when pillow is missing;
+        # stat, hashing and encoding all run in the pool, never on the caller's event loop
+        self.evict_later()
+        key = (path, snap_size(size), format)
+        with self.lock:
+            future = self.pending.get(key)
+            submitted = future is None
+            if submitted:
+                future = self.executor.submit(self._variant, *key)
+                self.pending[key] = future
+        if submitted:
+            # outside the lock, a job already done runs the callback right here
+            future.add_done_callback(lambda _: self._done(key))  # type: ignore
+        return future  # type: ignore
+
+    def variant_sync(self, path: str, size: int, format: str = "webp") -> tuple[str, str]:
+        return self.variant(path, size, format).result()
+
+    def _hash(self, path: str, stat: os.stat_result) -> str:
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        hash = self.hashes.get(key)
+        if hash is None:
+            digest = hashlib.sha1()
+            with open(path, "rb") as f:
+                while data := f.read(1024 * 1024):
+                    digest.update(data)
+            hash = digest.hexdigest()[:16]
+            with self.lock:
+                if len(self.hashes) > 10000:
+                    self.hashes.clear()
+                self.hashes[key] = hash
+        return hash
+
+    def _variant(self, path: str, size: int, format: str) -> tuple[str, str]:
+        hash = self._hash(path, os.stat(path))
+        if Image is None or format not in FORMATS:
+            return path, hash
+        target = os.path.join(self.cache_dir, f"{hash}-{size}.{format}")
+        if not os.path.exists(target):
+            self._encode(path, target, size, format)
+        return target, f"{hash}-{size}-{format}"
+
+    def _encode(self, path: str, target: str, size: int, format: str):
+        with Image.open(path) as img:  # type: ignore
+            img.thumbnail((size, size))
+            if format == "jpeg" and img.mode != "RGB":
+                img = img.convert("RGB")
+            elif img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA")
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{target}.{threading.get_ident()}.tmp"
+            img.save(tmp_path, format=FORMATS[format], quality=QUALITY)
+            os.replace(tmp_path, target)
+
+    def _done(self, key: tuple):
+        with self.lock:
+            self.pending.pop(key, None)
+
+    def evict_later(self):
+        now = time.monotonic()
+        if now - self.last_evict > EVICT_INTERVAL:
+            self.last_evict = now
+            self.executor.submit(self.evict)
+
+    def evict(self):
+        evict_dir(
+            files.get_abs_path(SCREENSHOTS_DIR),
+            _max_bytes("BROWSER_SCREENSHOTS_MAX_MB", 500),
+            float(dotenv.get_dotenv_value("BROWSER_SCREENSHOTS_MAX_HOURS", 24) or 0) * 3600,
+        )
+        evict_dir(self.cache_dir, _max_bytes("IMAGE_CACHE_MAX_MB", 200), 0)
+
+
+def evict_dir(dir: str, max_bytes: int, max_age: float):
+    # oldest files go first, until the directory is within its size and age limits
+    entries = []
+    for root, _, filenames in os.walk(dir):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if filename.endswith(".tmp") and time.time() - stat.st_mtime < TMP_MAX_AGE:
+                continue  # still being written, renamed into place when done
+            entries.append((max(stat.st_mtime, stat.st_atime), stat.st_size, path))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    now = time.time()
+    for used, size, path in entries:
+        too_old = max_age and now - used > max_age
+        if not too_old and (not max_bytes or total <= max_bytes):
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def snap_size(size: int) -> int:
+    for snapped in SIZES:
+        if size <= snapped:
+            return snapped
+    return SIZES[-1]
+
+
+def choose_format(accept: str, requested: str = "") -> str:
+    if requested in FORMATS:
+        return requested
+    return "webp" if "image/webp" in accept else "jpeg"
+
+
+images = ImageCache(files.get_abs_path(CACHE_DIR))
@@ -1,8 +1,14 @@
+import asyncio
 import glob
 import os
 import hashlib
 import json
-from typing import Any, Dict, Literal, TypedDict
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Dict, Literal, TypedDict
 from langchain_community.document_loaders import (
     CSVLoader,
     JSONLoader,
@@ -11,53 +17,247 @@ from langchain_community.document_loaders import (
     UnstructuredHTMLLoader,
     UnstructuredMarkdownLoader,
 )
-from python.helpers import files
+from langchain_core.documents import Document
+from python.helpers import dotenv, files
 from python.helpers.log import LogItem
 from python.helpers.print_style import PrintStyle
 
 text_loader_kwargs = {"autodetect_encoding": True}
+CHECKSUM_CHUNK_SIZE = 1024 * 1024  # read files in 1MB chunks when hashing
+
+# Mapping file extensions to corresponding loader classes
+file_types_loaders = {
+    "txt": TextLoader,
+    "pdf": PyPDFLoader,
+    "csv": CSVLoader,
+    "html": UnstructuredHTMLLoader,
+    # "json": JSONLoader,
+    "json": TextLoader,
+    # "md": UnstructuredMarkdownLoader,
+    "md": TextLoader,
+}
 
 
 class KnowledgeImport(TypedDict):
     file: str
     checksum: str
+    mtime: float
+    size: int
     ids: list[str]
     state: Literal["changed", "original", "removed"]
     documents: list[Any]
+    metadata: dict[str, Any]
+
+
+def get_import_workers() -> int:
+    return int(dotenv.get_dotenv_value("KNOWLEDGE_IMPORT_WORKERS", 0)) or (
+        os.cpu_count() or 1
+    )
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    # one pool per process, reused by all imports; workers are spawned, not forked,
+    # forking the multithreaded web server could copy locks held by other threads
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=get_import_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool(pool: ProcessPoolExecutor):
+    # a worker died, the next import starts a new pool
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def get_embed_batch_size() -> int:
+    return int(dotenv.get_dotenv_value("KNOWLEDGE_EMBED_BATCH_SIZE", 0)) or 64
 
 
 def calculate_checksum(file_path: str) -> str:
     hasher = hashlib.md5()
     with open(file_path, "rb") as f:
-        buf = f.read()
-        hasher.update(buf)
+        for chunk in iter(lambda: f.read(CHECKSUM_CHUNK_SIZE), b""):
+            hasher.update(chunk)
     return hasher.hexdigest()
 
 
+def is_unchanged(file_data: dict, stat: os.stat_result) -> bool:
+    # same size and modification time as last import means same content, no need to hash
+    return (
+        bool(file_data.get("checksum"))
+        and file_data.get("size") == stat.st_size
+        and file_data.get("mtime") == stat.st_mtime
+    )
+
+
+def load_file(file_path: str, metadata: dict[str, Any] = {}) -> list[Document]:
+    ext = file_path.split(".")[-1].lower()
+    loader_cls = file_types_loaders[ext]
+    loader = loader_cls(
+        file_path,
+        **(text_loader_kwargs if ext in ["txt", "csv", "html", "md"] else {}),
+    )
+    documents = loader.load_and_split()
+    for doc in documents:
+        doc.metadata = {**doc.metadata, **metadata}
+    return documents
+
+
+def _load_file_timed(file_path: str, metadata: dict[str, Any]):
+    # runs in worker process
+    start = time.perf_counter()
+    documents = load_file(file_path, metadata)
+    return documents, time.perf_counter() - start
+
+
+async def load_documents(
+    log_item: LogItem | None,
+    index: Dict[str, KnowledgeImport],
+    workers: int = 0,
+) -> AsyncIterator[tuple[str, list[Document]]]:
+    # load and split all changed files in a process pool, yield documents as files finish
+    # only a few files are in flight at once, so parsed documents do not pile up in memory
+    pending_files = [
+        file_key
+        for file_key, file_data in index.items()
+        if file_data.get("state") == "changed"
+    ]
+    if not pending_files:
+        return
+
+    workers = workers or get_import_workers()
+    max_in_flight = workers * 2
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    in_flight: dict[asyncio.Future, str] = {}
+
+    def submit_next():
+        while pending_files and len(in_flight) < max_in_flight:
+            file_key = pending_files.pop(0)
+            future = loop.run_in_executor(
+                pool,
+                _load_file_timed,
+                file_key,
+                index[file_key].get("metadata", {}),
+            )
+            in_flight[future] = file_key
+
+    try:
+        submit_next()
+        while in_flight:
+            done, _ = await asyncio.wait(
+                in_flight.keys(), return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                file_key = in_flight.pop(future)
+                try:
+                    documents, load_time = future.result()
+                except BrokenProcessPool:
+                    _reset_pool(pool)
+                    raise
+                except Exception as e:
+                    PrintStyle.error(f"Failed to load knowledge file {file_key}: {e}")
+                    if log_item:
+                        log_item.stream(progress=f"\nFailed to load {file_key}: {e}")
+                    documents, load_time = [], 0.0
+                    index[file_key]["checksum"] = ""  # retry on next preload
+
+                timing = f"{file_key}: loaded {len(documents)} documents in {load_time:.2f}s"
+                PrintStyle.standard(timing)
+                if log_item:
+                    log_item.stream(progress=f"\n{timing}")
+
+                submit_next()  # keep the pool busy while documents are embedded
+                yield file_key, documents
+    finally:
+        # the pool is shared, only drop what this import still has queued
+        for future in in_flight:
+            future.cancel()
+
+
+def check_file(
+    log_item: LogItem | None,
+    file_path: str,
+    index: Dict[str, KnowledgeImport],
+    metadata: dict[str, Any] = {},
+    defer_loading: bool = False,
+) -> str | None:
+    # update index entry of a single file, returns its state or "skipped" if not even hashed
+    ext = file_path.split(".")[-1].lower()
+    if ext not in file_types_loaders:
+        return None
+
+    file_key = file_path  # os.path.relpath(file_path, knowledge_dir)
+
+    # Load existing data from the index or create a new entry
+    file_data = index.get(file_key, {})
+
+    stat = os.stat(file_path)
+    if is_unchanged(file_data, stat):
+        file_data["state"] = "original"
+        index[file_key] = file_data  # type: ignore
+        return "skipped"
+
+    # size or mtime differ, compare content
+    start = time.perf_counter()
+    checksum = calculate_checksum(file_path)
+    hash_time = time.perf_counter() - start
+    file_data["mtime"] = stat.st_mtime
+    file_data["size"] = stat.st_size
+
+    if file_data.get("checksum") == checksum:
+        file_data["state"] = "original"
+    else:
+        file_data["state"] = "changed"
+
+    load_time = 0.0
+    if file_data["state"] == "changed":
+        file_data["checksum"] = checksum
+        if defer_loading:
+            # documents are loaded later by load_documents()
+            file_data["metadata"] = metadata
+        else:
+            start = time.perf_counter()
+            file_data["documents"] = load_file(file_path, metadata)
+            load_time = time.perf_counter() - start
+        # PrintStyle.standard(f"Imported {len(file_data['documents'])} documents from {file_path}")
+
+    timing = f"{file_path}: {file_data['state']}, {stat.st_size} bytes, hash {hash_time:.2f}s, load {load_time:.2f}s"
+    PrintStyle.standard(timing)
+    if log_item:
+        log_item.stream(progress=f"\n{timing}")
+
+    # Update the index
+    index[file_key] = file_data  # type: ignore
+    return file_data["state"]
+
+
 def load_knowledge(
     log_item: LogItem | None,
     knowledge_dir: str,
     index: Dict[str, KnowledgeImport],
     metadata: dict[str, Any] = {},
     filename_pattern: str = "**/*",
+    defer_loading: bool = False,
 ) -> Dict[str, KnowledgeImport]:
 
     # from python.helpers.memory import Memory
 
-    # Mapping file extensions to corresponding loader classes
-    file_types_loaders = {
-        "txt": TextLoader,
-        "pdf": PyPDFLoader,
-        "csv": CSVLoader,
-        "html": UnstructuredHTMLLoader,
-        # "json": JSONLoader,
-        "json": TextLoader,
-        # "md": UnstructuredMarkdownLoader,
-        "md": TextLoader,
-    }
-
     cnt_files = 0
     cnt_docs = 0
+    cnt_skipped = 0
 
     # for area in Memory.Area:
     #     subdir = files.get_abs_path(knowledge_dir, area.value)
@@ -80,48 +280,23 @@ def load_knowledge(
             )
 
     for file_path in kn_files:
-        ext = file_path.split(".")[-1].lower()
-        if ext in file_types_loaders:
-            checksum = calculate_checksum(file_path)
-            file_key = file_path  # os.path.relpath(file_path, knowledge_dir)
-
-            # Load existing data from the index or create a new entry
-            file_data = index.get(file_key, {})
-
-            if file_data.get("checksum") == checksum:
-                file_data["state"] = "original"
-            else:
-                file_data["state"] = "changed"
-
-            if file_data["state"] == "changed":
-                file_data["checksum"] = checksum
-                loader_cls = file_types_loaders[ext]
-                loader = loader_cls(
-                    file_path,
-                    **(
-                        text_loader_kwargs
-                        if ext in ["txt", "csv", "html", "md"]
-                        else {}
-                    ),
-                )
-                file_data["documents"] = loader.load_and_split()
-                for doc in file_data["documents"]:
-                    doc.metadata = {**doc.metadata, **metadata}
-                cnt_files += 1
-                cnt_docs += len(file_data["documents"])
-                # PrintStyle.standard(f"Imported {len(file_data['documents'])} documents from {file_path}")
-
-            # Update the index
-            index[file_key] = file_data  # type: ignore
+        state = check_file(log_item, file_path, index, metadata, defer_loading)
+        if state == "skipped":
+            cnt_skipped += 1
+        elif state == "changed":
+            cnt_files += 1
+            cnt_docs += len(index[file_path].get("documents", []))
 
     # loop index where state is not set and mark it as removed
     for file_key, file_data in index.items():
         if not file_data.get("state", ""):
             index[file_key]["state"] = "removed"
 
-    PrintStyle.standard(f"Processed {cnt_docs} documents from {cnt_files} files.")
+    if defer_loading:
+        summary = f"Found {cnt_files} changed files, {cnt_skipped} unchanged files skipped."
+    else:
+        summary = f"Processed {cnt_docs} documents from {cnt_files} files, {cnt_skipped} unchanged files skipped."
+    PrintStyle.standard(summary)
     if log_item:
-        log_item.stream(
-            progress=f"\nProcessed {cnt_docs} documents from {cnt_files} files."
-        )
+        log_item.stream(progress=f"\n{summary}")
     return index
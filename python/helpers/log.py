@@ -1,9 +1,13 @@
 from dataclasses import dataclass, field
 import json
+import os
+import threading
 from typing import Any, Literal, Optional, Dict
 import uuid
 from collections import OrderedDict  # Import OrderedDict
 
+from python.helpers.changes import notifier
+
 Type = Literal[
     "agent",
     "browser",
@@ -22,6 +26,8 @@ Type = Literal[
 
 ProgressUpdate = Literal["persistent", "temporary", "none"]
 
+MAX_ITEMS = 1000  # items kept in RAM per log, older ones spill to the journal
+
 
 @dataclass
 class LogItem:
@@ -35,6 +41,7 @@ class LogItem:
     kvps: Optional[OrderedDict] = None  # Use OrderedDict for kvps
     id: Optional[str] = None  # Add id field
     guid: str = ""
+    version: int = 0  # log version of the last change to this item
 
     def __post_init__(self):
         self.guid = self.log.guid
@@ -67,14 +74,18 @@ class LogItem:
         content: str | None = None,
         **kwargs,
     ):
-        if heading is not None:
-            self.update(heading=self.heading + heading)
-        if content is not None:
-            self.update(content=self.content + content)
-
+        # all streamed parts in one update, one version bump per chunk
+        if heading is None and content is None and not kwargs:
+            return
+        kvps = {}
         for k, v in kwargs.items():
             prev = self.kvps.get(k, "") if self.kvps else ""
-            self.update(**{k: prev + v})
+            kvps[k] = prev + v
+        self.update(
+            heading=self.heading + heading if heading is not None else None,
+            content=self.content + content if content is not None else None,
+            **kvps,
+        )
 
     def output(self):
         return {
@@ -84,7 +95,7 @@ class LogItem:
             "heading": self.heading,
             "content": self.content,
             "temp": self.temp,
-            "kvps": self.kvps,
+            "kvps": OrderedDict(self.kvps) if self.kvps is not None else None,  # copy, serialized outside the lock
         }
 
 
@@ -92,10 +103,20 @@ class Log:
 
     def __init__(self):
         self.guid: str = str(uuid.uuid4())
-        self.updates: list[int] = []
-        self.logs: list[LogItem] = []
+        self.version = 0  # bumped on every change, clients poll with the last version they saw
+        self.logs: list[LogItem] = []  # items in RAM, ordered by no
+        self.journal = ""  # jsonl file receiving items dropped from RAM
+        self.changed = 0  # notifier version of the last change, incl. progress
+        self._lock = threading.RLock()  # agents write, web requests read from other threads
+        self._init_items()
         self.set_initial_progress()
 
+    def _init_items(self):
+        self.next_no = 0
+        self._items: dict[int, LogItem] = {}
+        self._changes: OrderedDict[int, int] = OrderedDict()  # no -> version, oldest change first
+        self._temp: list[int] = []
+
     def log(
         self,
         type: Type,
@@ -112,7 +133,7 @@ class Log:
             kvps = OrderedDict(kvps)
         item = LogItem(
             log=self,
-            no=len(self.logs),
+            no=self.next_no,
             type=type,
             heading=heading or "",
             content=content or "",
@@ -123,9 +144,17 @@ class Log:
             temp=temp if temp is not None else False,
             id=id,  # Pass id to LogItem
         )
-        self.logs.append(item)
-        self.updates += [item.no]
-        self._update_progress_from_item(item)
+        with self._lock:
+            item.no = self.next_no
+            self.next_no += 1
+            self._compact_temp()
+            self.logs.append(item)
+            self._items[item.no] = item
+            if item.temp:
+                self._temp.append(item.no)
+            self._mark_changed(item)
+            self._spill()
+            self._update_progress_from_item(item)
         return item
 
     def _update_item(
@@ -139,60 +168,101 @@ class Log:
         update_progress: ProgressUpdate | None = None,
         **kwargs,
     ):
-        item = self.logs[no]
-        if type is not None:
-            item.type = type
-        if update_progress is not None:
-            item.update_progress = update_progress
-        if heading is not None:
-            item.heading = heading
-        if content is not None:
-            item.content = content
-        if kvps is not None:
-            item.kvps = OrderedDict(kvps)  # Use OrderedDict to keep the order
+        with self._lock:
+            item = self._items.get(no)
+            if item is None:
+                return  # compacted or spilled to the journal
+            if type is not None:
+                item.type = type
+            if update_progress is not None:
+                item.update_progress = update_progress
+            if heading is not None:
+                item.heading = heading
+            if content is not None:
+                item.content = content
+            if kvps is not None:
+                item.kvps = OrderedDict(kvps)  # Use OrderedDict to keep the order
 
-        if temp is not None:
-            item.temp = temp
+            if temp is not None:
+                item.temp = temp
 
-        if kwargs:
-            if item.kvps is None:
-                item.kvps = OrderedDict()  # Ensure kvps is an OrderedDict
-            for k, v in kwargs.items():
-                item.kvps[k] = v
+            if kwargs:
+                if item.kvps is None:
+                    item.kvps = OrderedDict()  # Ensure kvps is an OrderedDict
+                for k, v in kwargs.items():
+                    item.kvps[k] = v
 
-        self.updates += [item.no]
-        self._update_progress_from_item(item)
+            self._mark_changed(item)
+            self._update_progress_from_item(item)
 
     def set_progress(self, progress: str, no: int = 0, active: bool = True):
         self.progress = progress
         if not no:
-            no = len(self.logs)
+            no = self.next_no
         self.progress_no = no
         self.progress_active = active
+        self.changed = notifier.notify(self)
 
     def set_initial_progress(self):
         self.set_progress("Waiting for input", 0, False)
 
     def output(self, start=None, end=None):
+        # items changed after version start (up to version end), newest changes are at the end
         if start is None:
             start = 0
         if end is None:
-            end = len(self.updates)
+            end = self.version
 
-        out = []
-        seen = set()
-        for update in self.updates[start:end]:
-            if update not in seen:
-                out.append(self.logs[update].output())
-                seen.add(update)
-
-        return out
+        with self._lock:
+            changed = []
+            for no, version in reversed(self._changes.items()):
+                if version <= start:
+                    break
+                if version <= end:
+                    changed.append(no)
+            return [self._items[no].output() for no in sorted(changed)]
 
     def reset(self):
-        self.guid = str(uuid.uuid4())
-        self.updates = []
-        self.logs = []
-        self.set_initial_progress()
+        with self._lock:
+            self.guid = str(uuid.uuid4())
+            self.version += 1  # stays monotonic, clients detect the reset by guid
+            self.logs = []
+            self._init_items()
+            self.set_initial_progress()
+
+    def _mark_changed(self, item: LogItem):
+        self.version += 1
+        item.version = self.version
+        self._changes[item.no] = self.version
+        self._changes.move_to_end(item.no)
+        self.changed = notifier.notify(self)
+
+    def _compact_temp(self):
+        # a temp item is only shown while it is the last one, drop it once another follows
+        if not self._temp:
+            return
+        dropped = set(self._temp)
+        self._temp = []
+        self.logs = [item for item in self.logs if item.no not in dropped]
+        for no in dropped:
+            self._items.pop(no, None)
+            self._changes.pop(no, None)
+
+    def _spill(self):
+        if len(self.logs) <= MAX_ITEMS:
+            return
+        spilled, self.logs = self.logs[:-MAX_ITEMS], self.logs[-MAX_ITEMS:]
+        for item in spilled:
+            self._items.pop(item.no, None)
+            self._changes.pop(item.no, None)
+        if self.journal:
+            try:
+                os.makedirs(os.path.dirname(self.journal), exist_ok=True)
+                with open(self.journal, "a", encoding="utf-8") as f:
+                    for item in spilled:
+                        f.write(json.dumps({"guid": self.guid, **item.output()}, ensure_ascii=False) + "\n")
+            except Exception:
+                pass  # the journal is best effort, the log itself must never fail
 
     def _update_progress_from_item(self, item: LogItem):
         if item.heading and item.update_progress != "none":
@@ -1,5 +1,10 @@
+import asyncio
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
 from datetime import datetime
-from typing import Any, List, Sequence
+import threading
+import weakref
+from typing import Any, List, Literal, Sequence
 from langchain.storage import InMemoryByteStore, LocalFileStore
 from langchain.embeddings import CacheBackedEmbeddings
 
@@ -12,7 +17,8 @@ from langchain_community.vectorstores.utils import (
 )
 from langchain_core.embeddings import Embeddings
 
-import os, json
+import os, json, pickle, time
+from collections import OrderedDict
 
 import numpy as np
 
@@ -20,14 +26,54 @@ from python.helpers.print_style import PrintStyle
 from . import files
 from langchain_core.documents import Document
 import uuid
-from python.helpers import knowledge_import
+from python.helpers import dotenv, knowledge_import, memory_client, memory_index, memory_retention
+from python.helpers.memory_dedup import DedupIndex, stats as dedup_stats
+from python.helpers.embedding_cache import (
+    QueryCachedEmbeddings,
+    get_namespace,
+    get_query_store_items,
+)
 from python.helpers.log import Log, LogItem
 from enum import Enum
 from agent import Agent
 import models
 
 
+RERANK_FACTOR = 4  # candidates fetched per result from quantized indexes
+AREA_FETCH_MAX = 1000  # widest over-fetch for an area rare among the nearest vectors
+HIDDEN_METADATA = {"last_recalled"}  # retention bookkeeping, kept out of prompts
+
+
 class MyFaiss(FAISS):
+    mmap_path: str = ""  # set while the index is memory-mapped read-only
+    dedup: DedupIndex  # lexical fingerprints of memorized fragments and solutions
+    docstore_bytes: int = 0  # text and metadata size, updated by the writes below under the subdir lock
+
+    def add_embeddings(self, text_embeddings, metadatas=None, ids=None, **kwargs) -> List[str]:
+        ids = super().add_embeddings(text_embeddings, metadatas=metadatas, ids=ids, **kwargs)
+        self.docstore_bytes += sum(doc_size(doc) for doc in self.get_by_ids(ids))
+        return ids
+
+    def delete(self, ids: list[str] | None = None, **kwargs: Any) -> bool | None:
+        removed = self._docs_size(ids or [])
+        result = super().delete(ids, **kwargs)
+        self.docstore_bytes -= removed
+        return result
+
+    def delete_unindexed(self, ids: list[str]):
+        # documents without a vector, faiss delete would refuse them
+        self.docstore_bytes -= self._docs_size(ids)
+        self.docstore.delete(ids)
+
+    def measure_docstore(self) -> int:
+        # full scan, only on load and compaction
+        self.docstore_bytes = self._docs_size(list(self.docstore._dict))  # type: ignore
+        return self.docstore_bytes
+
+    def _docs_size(self, ids: list[str]) -> int:
+        docs = self.docstore._dict  # type: ignore
+        return sum(doc_size(docs[id]) for id in ids if id in docs)
+
     # override aget_by_ids
     def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
         # return all self.docstore._dict[id] in ids
@@ -36,6 +82,155 @@ class MyFaiss(FAISS):
     async def aget_by_ids(self, ids: Sequence[str], /) -> List[Document]:
         return self.get_by_ids(ids)
 
+    @classmethod
+    def load_local_mmap(
+        cls, folder_path: str, embeddings: Embeddings, **kwargs: Any
+    ) -> "MyFaiss":
+        # same as load_local, but vectors stay on disk and are paged in by the OS
+        index_path = os.path.join(folder_path, "index.faiss")
+        index = None
+        if hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+            try:
+                # IO_FLAG_MMAP alone still copies flat codes into RAM, IFC maps them in place
+                index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP_IFC)
+            except RuntimeError:
+                pass  # index type without mmap support
+        mmap_path = index_path if index is not None and is_mapped(index) else ""
+        if not mmap_path:
+            index = faiss.read_index(index_path)  # resident, counted in the budget
+        with open(os.path.join(folder_path, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        db = cls(embeddings, index, docstore, index_to_docstore_id, **kwargs)
+        db.mmap_path = mmap_path
+        return db
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Any = None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ):
+        if memory_index.is_exact(self.index) or not use_rerank():
+            return super().similarity_search_with_score_by_vector(
+                embedding, k=k, filter=filter, fetch_k=fetch_k, **kwargs
+            )
+
+        # quantized index: over-fetch candidates, then re-score them with the original vectors
+        # from the on-disk embeddings cache, the model is never called here
+        candidates = super().similarity_search_with_score_by_vector(
+            embedding,
+            k=k * RERANK_FACTOR,
+            filter=filter,
+            fetch_k=max(fetch_k, k * RERANK_FACTOR),
+            **kwargs,
+        )
+        if not candidates:
+            return candidates
+        docs = [doc for doc, _ in candidates]
+        cached = self.embedding_function.cached_documents([doc.page_content for doc in docs])  # type: ignore
+        if any(vector is None for vector in cached):
+            return candidates[:k]  # cache miss, keep the quantized ranking
+        vectors = np.array(cached, dtype=np.float32)
+        scores = vectors @ np.array(embedding, dtype=np.float32)
+        ranked = sorted(zip(docs, scores.tolist()), key=lambda x: x[1], reverse=True)
+        return ranked[:k]
+
+    def ensure_writable(self):
+        # mmapped indexes are read-only (faiss aborts on writes), copy into RAM before the first write
+        if self.mmap_path:
+            self.index = faiss.read_index(self.mmap_path)
+            self.mmap_path = ""
+
+    def compact(self) -> int:
+        # rebuild index, docstore and mapping contiguously, drop orphans on either side;
+        # the new state is built on the side, the caller holds the subdir lock
+        docs: dict[str, Document] = self.docstore._dict  # type: ignore
+        positions = sorted(self.index_to_docstore_id)
+        orphans = [pos for pos in positions if self.index_to_docstore_id[pos] not in docs]
+        kept = [self.index_to_docstore_id[pos] for pos in positions if self.index_to_docstore_id[pos] in docs]
+        removed = len(orphans) + len(docs) - len(kept)
+
+        # a mapped index is copied from its file, clones of it would still share the mapping
+        index = faiss.read_index(self.mmap_path) if self.mmap_path else faiss.clone_index(self.index)
+        if orphans:
+            index.remove_ids(np.array(orphans, dtype=np.int64))
+            # copying releases the capacity faiss keeps after deletes, without re-encoding vectors
+            index = faiss.clone_index(index)
+        docstore = InMemoryDocstore({id: docs[id] for id in kept})
+        mapping = {i: id for i, id in enumerate(kept)}
+        self.index, self.docstore, self.index_to_docstore_id, self.mmap_path = index, docstore, mapping, ""
+        self.measure_docstore()
+        return removed
+
+    def resident_size(self) -> dict[str, int]:
+        # mmap_path is only set when the codes really are mapped, otherwise they are in RAM
+        vectors = 0 if self.mmap_path else self.index.ntotal * self.index.sa_code_size()
+        return {"vectors": vectors, "docstore": self.docstore_bytes, "total": vectors + self.docstore_bytes}
+
+
+def doc_size(doc: Document) -> int:
+    # hidden metadata changes on recall without the subdir lock, it is left out of the count
+    return len(doc.page_content) + sum(
+        len(key) + len(str(value)) for key, value in doc.metadata.items() if key not in HIDDEN_METADATA
+    )
+
+
+class SubdirLock:
+    """Lock of one memory subdir for index writes, usable from any thread and event loop
+    (every agent runs its own loop), reentrant for the task or thread holding it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._owner: Any = None
+        self._depth = 0
+
+    async def __aenter__(self):
+        owner = asyncio.current_task()
+        if self._owner != owner:
+            # polled, a waiting task can be cancelled without leaking the lock
+            while not self._lock.acquire(blocking=False):
+                await asyncio.sleep(0.01)
+            self._owner = owner
+        self._depth += 1
+
+    async def __aexit__(self, *exc):
+        self._release()
+
+    def __enter__(self):
+        owner = threading.get_ident()
+        if self._owner != owner:
+            self._lock.acquire()
+            self._owner = owner
+        self._depth += 1
+
+    def __exit__(self, *exc):
+        self._release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def _release(self):
+        self._depth -= 1
+        if not self._depth:
+            self._owner = None
+            self._lock.release()
+
+
+@dataclass
+class MemoryStatus:
+    state: Literal["pending", "initializing", "ready", "error"] = "pending"
+    log_item: LogItem | None = None
+    error: str = ""
+
+    def output(self):
+        return {
+            "state": self.state,
+            "progress": self.log_item.heading if self.log_item else "",
+            "error": self.error,
+        }
+
 
 class Memory:
 
@@ -45,17 +240,62 @@ class Memory:
         SOLUTIONS = "solutions"
         INSTRUMENTS = "instruments"
 
-    index: dict[str, "MyFaiss"] = {}
+    index: OrderedDict[str, "MyFaiss"] = OrderedDict()  # least recently used first
+    status: dict[str, "MemoryStatus"] = {}
+    last_used: dict[str, float] = {}
+    _initializing: dict[str, Future] = {}
+    _init_lock = threading.Lock()
+    _warmup_pending: set[str] | None = None  # None until warmup has registered its subdirs
+    _locks: dict[str, SubdirLock] = {}  # index, docstore and knowledge_import.json writes
+    _import_locks: dict[str, SubdirLock] = {}  # one knowledge import at a time
+    _instances: dict[str, "weakref.WeakSet[Memory]"] = {}  # live instances, their index is not unloaded
 
     @staticmethod
     async def get(agent: Agent):
         memory_subdir = agent.config.memory_subdir or "default"
-        if Memory.index.get(memory_subdir) is None:
-            log_item = agent.context.log.log(
-                type="util",
-                heading=f"Initializing VectorDB in '/{memory_subdir}'",
-            )
-            db = Memory.initialize(
+        server = memory_client.get_server_address()
+        if server:
+            # indexes are owned by the memory server process, see run_memory.py
+            return memory_client.RemoteMemory(agent, memory_subdir, server)  # type: ignore
+        # single-flight: the first caller initializes, concurrent callers (from any thread or loop) wait for it;
+        # instances are created under the lock, so the budget never unloads an index that is being handed out
+        with Memory._init_lock:
+            db = Memory.index.get(memory_subdir)
+            if db is not None:
+                Memory._touch(memory_subdir)
+                return Memory(agent=agent, db=db, memory_subdir=memory_subdir)
+            future = Memory._initializing.get(memory_subdir)
+            owner = future is None
+            if owner:
+                future = Future()
+                Memory._initializing[memory_subdir] = future
+        if owner:
+            try:
+                db = await Memory._initialize_subdir(agent, memory_subdir)
+                future.set_result(db)  # type: ignore
+            except BaseException as e:
+                future.set_exception(e)  # type: ignore
+                raise
+            finally:
+                with Memory._init_lock:
+                    Memory._initializing.pop(memory_subdir, None)
+        else:
+            db = await asyncio.wrap_future(future)  # type: ignore
+        with Memory._init_lock:
+            return Memory(agent=agent, db=db, memory_subdir=memory_subdir)
+
+    @staticmethod
+    async def _initialize_subdir(agent: Agent, memory_subdir: str) -> "MyFaiss":
+        log_item = agent.context.log.log(
+            type="util",
+            heading=f"Initializing VectorDB in '/{memory_subdir}'",
+        )
+        status = Memory.status[memory_subdir] = MemoryStatus(
+            state="initializing", log_item=log_item
+        )
+        try:
+            db = await asyncio.to_thread(
+                Memory.initialize,
                 log_item,
                 models.get_model(
                     models.ModelType.EMBEDDING,
@@ -66,20 +306,160 @@ class Memory:
                 memory_subdir,
                 False,
             )
-            Memory.index[memory_subdir] = db
             wrap = Memory(agent, db, memory_subdir=memory_subdir)
             if agent.config.knowledge_subdirs:
                 await wrap.preload_knowledge(
                     log_item, agent.config.knowledge_subdirs, memory_subdir
                 )
-            return wrap
-        else:
-            return Memory(
-                agent=agent,
-                db=Memory.index[memory_subdir],
-                memory_subdir=memory_subdir,
+        except BaseException as e:
+            status.state = "error"
+            status.error = str(e)
+            raise
+        # only publish the index once knowledge is loaded
+        Memory.index[memory_subdir] = db
+        Memory._touch(memory_subdir)
+        Memory._enforce_budget(keep=memory_subdir)
+        status.state = "ready"
+        return db
+
+    @staticmethod
+    def get_lock(memory_subdir: str) -> SubdirLock:
+        with Memory._init_lock:
+            return Memory._locks.setdefault(memory_subdir, SubdirLock())
+
+    @staticmethod
+    def get_import_lock(memory_subdir: str) -> SubdirLock:
+        with Memory._init_lock:
+            return Memory._import_locks.setdefault(memory_subdir, SubdirLock())
+
+    def lock(self) -> SubdirLock:
+        return Memory.get_lock(self.memory_subdir)
+
+    @staticmethod
+    def _touch(memory_subdir: str):
+        if memory_subdir in Memory.index:
+            Memory.index.move_to_end(memory_subdir)
+        Memory.last_used[memory_subdir] = time.time()
+
+    @staticmethod
+    def _enforce_budget(keep: str):
+        # unload least recently used idle indexes until the resident size fits the budget
+        budget = get_index_budget()
+        if not budget:
+            return
+        sizes = Memory.get_resident_sizes()
+        total = sum(size["total"] for size in sizes.values())
+        idle_after = get_index_idle_seconds()
+        now = time.time()
+        unloaded = []
+        with Memory._init_lock:
+            for subdir in list(Memory.index.keys()):
+                if total <= budget:
+                    break
+                if subdir == keep or now - Memory.last_used.get(subdir, 0) < idle_after:
+                    continue
+                # an instance still holding the index would keep writing to an unloaded copy
+                lock = Memory._locks.get(subdir)
+                if Memory._instances.get(subdir) or (lock and lock.locked()):
+                    continue
+                del Memory.index[subdir]
+                Memory.status.pop(subdir, None)
+                total -= sizes[subdir]["total"]
+                unloaded.append(subdir)
+        for subdir in unloaded:
+            PrintStyle.standard(
+                f"Unloaded memory index '{subdir}' ({sizes[subdir]['total']} bytes) to stay within budget"
             )
 
+    @staticmethod
+    def get_resident_sizes() -> dict[str, dict[str, int]]:
+        return {subdir: db.resident_size() for subdir, db in Memory.index.items()}
+
+    @staticmethod
+    async def warmup(memory_subdirs: list[str] | None = None):
+        # initialize memory indexes in background before the first request needs them
+        from agent import AgentContext
+        from initialize import initialize
+
+        config = initialize()
+        # the configured subdir always, plus the extra ones from MEMORY_WARMUP_SUBDIRS
+        subdirs = list(dict.fromkeys([config.memory_subdir or "default", *(memory_subdirs or [])]))
+        Memory._warmup_pending = set(subdirs)
+        for subdir in subdirs:
+            Memory.status.setdefault(subdir, MemoryStatus())
+
+        async def warm(subdir: str):
+            context = AgentContext(replace(config, memory_subdir=subdir))
+            AgentContext.remove(context.id)  # internal context, do not list it in the UI
+            try:
+                db = await Memory.get(context.agent0)
+                if isinstance(db, memory_client.RemoteMemory):
+                    # the server owns the index, its answer is the status of the subdir here
+                    remote = await db.status()
+                    Memory.status[subdir] = MemoryStatus(state=remote["state"], error=remote["error"])
+            except Exception as e:
+                # warm-up is done either way, the error is reported in the subdir status
+                PrintStyle.error(f"Memory warm-up of '{subdir}' failed: {e}")
+                status = Memory.status[subdir]
+                status.state, status.error = "error", str(e)
+            finally:
+                Memory._warmup_pending.discard(subdir)  # type: ignore
+
+        await asyncio.gather(*[warm(subdir) for subdir in subdirs])
+
+    @staticmethod
+    def maintain(
+        memory_subdir: str, dry_run: bool = False
+    ) -> list[memory_retention.Eviction]:
+        # apply retention policies and compact a loaded index, dry run only reports;
+        # runs in a worker thread and holds the subdir lock against searches and writes
+        with Memory.get_lock(memory_subdir):
+            db = Memory.index.get(memory_subdir)
+            if db is None:
+                return []
+            docs = db.docstore._dict  # type: ignore
+            policies = memory_retention.get_policies([area.value for area in Memory.Area])
+            evictions = memory_retention.select_evictions(docs, policies)
+            PrintStyle.standard(memory_retention.format_report(memory_subdir, evictions, docs))
+            if dry_run:
+                return evictions
+
+            if evictions:
+                ids = [eviction.id for eviction in evictions]
+                indexed = set(db.index_to_docstore_id.values())
+                db.ensure_writable()
+                db.delete(ids=[id for id in ids if id in indexed])  # the rest are orphans, see compact
+                db.delete_unindexed([id for id in ids if id not in indexed])
+                db.dedup.remove(ids)
+            orphans = db.compact()
+            db.save_local(folder_path=Memory._abs_db_dir(memory_subdir))
+            db.dedup.save()
+        PrintStyle.standard(
+            f"Compacted memory '{memory_subdir}': {len(evictions)} evicted, {orphans} orphans removed, {db.index.ntotal} vectors"
+        )
+        return evictions
+
+    @staticmethod
+    async def maintenance_loop():
+        # periodic retention and compaction of all loaded indexes
+        interval = get_maintenance_interval()
+        if not interval:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            for memory_subdir in list(Memory.index.keys()):
+                try:
+                    await asyncio.to_thread(
+                        Memory.maintain, memory_subdir, use_retention_dry_run()
+                    )
+                except Exception as e:
+                    PrintStyle.error(f"Memory maintenance of '{memory_subdir}' failed: {e}")
+
+    @staticmethod
+    def is_ready() -> bool:
+        # warm-up finished for all its subdirs, on-demand loads and reloads do not count
+        return Memory._warmup_pending is not None and not Memory._warmup_pending
+
     @staticmethod
     async def reload(agent: Agent):
         memory_subdir = agent.config.memory_subdir or "default"
@@ -115,14 +495,16 @@ class Memory:
             store = LocalFileStore(em_dir)
 
         # here we setup the embeddings model with the chosen cache storage
-        embedder = CacheBackedEmbeddings.from_bytes_store(
-            embeddings_model,
-            store,
-            namespace=getattr(
+        namespace = get_namespace(embeddings_model)
+        embedder = QueryCachedEmbeddings(
+            CacheBackedEmbeddings.from_bytes_store(
                 embeddings_model,
-                "model",
-                getattr(embeddings_model, "model_name", "default"),
+                store,
+                namespace=namespace,
             ),
+            namespace=namespace,
+            store=store,  # dimension survives restarts, query vectors too if enabled
+            store_items=get_query_store_items(),
         )
 
         # self.db = Chroma(
@@ -130,7 +512,15 @@ class Memory:
         #     persist_directory=db_dir)
 
         # if db folder exists and is not empty:
-        if os.path.exists(db_dir) and files.exists(db_dir, "index.faiss"):
+        if os.path.exists(db_dir) and files.exists(db_dir, "index.faiss") and use_mmap():
+            db = MyFaiss.load_local_mmap(
+                folder_path=db_dir,
+                embeddings=embedder,
+                distance_strategy=DistanceStrategy.COSINE,
+                # normalize_L2=True,
+                relevance_score_fn=Memory._cosine_normalizer,
+            )
+        elif os.path.exists(db_dir) and files.exists(db_dir, "index.faiss"):
             db = MyFaiss.load_local(
                 folder_path=db_dir,
                 embeddings=embedder,
@@ -140,7 +530,7 @@ class Memory:
                 relevance_score_fn=Memory._cosine_normalizer,
             )
         else:
-            index = faiss.IndexFlatIP(len(embedder.embed_query("example")))
+            index = memory_index.create_index(embedder.get_dimension(), get_index_type())
 
             db = MyFaiss(
                 embedding_function=embedder,
@@ -151,6 +541,9 @@ class Memory:
                 # normalize_L2=True,
                 relevance_score_fn=Memory._cosine_normalizer,
             )
+
+        db.dedup = DedupIndex.load(db_dir, db.docstore._dict)  # type: ignore
+        db.measure_docstore()
         return db  # type: ignore
 
     def __init__(
@@ -162,6 +555,7 @@ class Memory:
         self.agent = agent
         self.db = db
         self.memory_subdir = memory_subdir
+        Memory._instances.setdefault(memory_subdir, weakref.WeakSet()).add(self)
 
     async def preload_knowledge(
         self, log_item: LogItem | None, kn_dirs: list[str], memory_subdir: str
@@ -169,20 +563,14 @@ class Memory:
         if log_item:
             log_item.update(heading="Preloading knowledge...")
 
-        # db abs path
-        db_dir = Memory._abs_db_dir(memory_subdir)
-
-        # Load the index file if it exists
-        index_path = files.get_abs_path(db_dir, "knowledge_import.json")
+        # knowledge_import.json is read, updated and written by one import at a time
+        async with Memory.get_import_lock(memory_subdir):
+            await self._preload_knowledge(log_item, kn_dirs, memory_subdir)
 
-        # make sure directory exists
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir)
-
-        index: dict[str, knowledge_import.KnowledgeImport] = {}
-        if os.path.exists(index_path):
-            with open(index_path, "r") as f:
-                index = json.load(f)
+    async def _preload_knowledge(
+        self, log_item: LogItem | None, kn_dirs: list[str], memory_subdir: str
+    ):
+        index = Memory._read_knowledge_index(memory_subdir)
 
         # preload knowledge folders
         index = self._preload_knowledge_folders(log_item, kn_dirs, index)
@@ -194,22 +582,134 @@ class Memory:
                 await self.delete_documents_by_ids(
                     index[file]["ids"]
                 )  # remove original version
-            if index[file]["state"] == "changed":
-                index[file]["ids"] = await self.insert_documents(
-                    index[file]["documents"]
-                )  # insert new version
+
+        # insert new versions, parsed in worker processes and embedded in batches as they arrive
+        await self._import_documents(log_item, index)
 
         # remove index where state="removed"
         index = {k: v for k, v in index.items() if v["state"] != "removed"}
 
+        async with self.lock():
+            Memory._write_knowledge_index(memory_subdir, index)
+
+    @staticmethod
+    async def import_knowledge(
+        agent: Agent,
+        file_paths: list[str],
+        metadata: dict[str, Any],
+        log_item: LogItem | None = None,
+    ):
+        # add or update only the given files in the live index, no reload of the whole memory
+        db = await Memory.get(agent)
+        return await db.import_knowledge_files(log_item, file_paths, metadata)
+
+    async def import_knowledge_files(
+        self,
+        log_item: LogItem | None,
+        file_paths: list[str],
+        metadata: dict[str, Any],
+    ):
+        async with Memory.get_import_lock(self.memory_subdir):
+            return await self._import_knowledge_files(log_item, file_paths, metadata)
+
+    async def _import_knowledge_files(
+        self,
+        log_item: LogItem | None,
+        file_paths: list[str],
+        metadata: dict[str, Any],
+    ):
+        index = Memory._read_knowledge_index(self.memory_subdir)
+
+        changed = []
+        for file_path in file_paths:
+            state = knowledge_import.check_file(
+                log_item, file_path, index, metadata, defer_loading=True
+            )
+            if state == "changed":
+                changed.append(file_path)
+                if index[file_path].get("ids"):
+                    await self.delete_documents_by_ids(index[file_path]["ids"])
+
+        cnt_docs = await self._import_documents(log_item, index)
+        async with self.lock():
+            Memory._write_knowledge_index(self.memory_subdir, index)
+
+        if log_item:
+            log_item.update(
+                heading=f"Imported {cnt_docs} documents from {len(changed)} changed files",
+            )
+        return changed
+
+    @staticmethod
+    def _read_knowledge_index(
+        memory_subdir: str,
+    ) -> dict[str, knowledge_import.KnowledgeImport]:
+        # db abs path
+        db_dir = Memory._abs_db_dir(memory_subdir)
+
+        # Load the index file if it exists
+        index_path = files.get_abs_path(db_dir, "knowledge_import.json")
+
+        # make sure directory exists
+        if not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        index: dict[str, knowledge_import.KnowledgeImport] = {}
+        if os.path.exists(index_path):
+            with open(index_path, "r") as f:
+                index = json.load(f)
+        return index
+
+    @staticmethod
+    def _write_knowledge_index(
+        memory_subdir: str, index: dict[str, knowledge_import.KnowledgeImport]
+    ):
         # strip state and documents from index and save it
         for file in index:
-            if "documents" in index[file]:
-                del index[file]["documents"]  # type: ignore
-            if "state" in index[file]:
-                del index[file]["state"]  # type: ignore
-        with open(index_path, "w") as f:
+            for key in ["documents", "state", "metadata"]:
+                if key in index[file]:
+                    del index[file][key]  # type: ignore
+        index_path = files.get_abs_path(
+            Memory._abs_db_dir(memory_subdir), "knowledge_import.json"
+        )
+        # written aside and swapped in, a crash never leaves a truncated file
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "w") as f:
             json.dump(index, f)
+        os.replace(tmp_path, index_path)
+
+    async def _import_documents(
+        self,
+        log_item: LogItem | None,
+        index: dict[str, knowledge_import.KnowledgeImport],
+    ):
+        batch_size = knowledge_import.get_embed_batch_size()
+        batch: list[tuple[str, Document]] = []
+        cnt_docs = 0
+
+        async def flush():
+            nonlocal cnt_docs
+            ids = await self.insert_documents([doc for _, doc in batch], save=False)
+            for (file, _), id in zip(batch, ids):
+                index[file]["ids"].append(id)
+            cnt_docs += len(batch)
+            batch.clear()
+            if log_item:
+                log_item.update(heading=f"Preloading knowledge... {cnt_docs} documents embedded")
+
+        async for file, docs in knowledge_import.load_documents(log_item, index):
+            index[file]["ids"] = []
+            for doc in docs:
+                batch.append((file, doc))
+                if len(batch) >= batch_size:
+                    await flush()
+        if batch:
+            await flush()
+
+        if cnt_docs:
+            async with self.lock():
+                self._save_db()  # persist
+        return cnt_docs
 
     def _preload_knowledge_folders(
         self,
@@ -225,6 +725,7 @@ class Memory:
                     files.get_abs_path("knowledge", kn_dir, area.value),
                     index,
                     {"area": area.value},
+                    defer_loading=True,
                 )
 
         # load instruments descriptions
@@ -234,6 +735,7 @@ class Memory:
             index,
             {"area": Memory.Area.INSTRUMENTS.value},
             filename_pattern="**/*.md",
+            defer_loading=True,
         )
 
         return index
@@ -247,13 +749,59 @@ class Memory:
         await self.agent.rate_limiter(
             model_config=self.agent.config.embeddings_model, input=query)
 
-        return await self.db.asearch(
-            query,
-            search_type="similarity_score_threshold",
-            k=limit,
-            score_threshold=threshold,
-            filter=comparator,
-        )
+        # embedded before taking the lock, so a slow model never blocks writes or maintenance
+        embedding = await self.db.embedding_function.aembed_query(query)  # type: ignore
+        normalizer = self.db._select_relevance_score_fn()
+        async with self.lock():
+            results = await asyncio.to_thread(
+                self.db.similarity_search_with_score_by_vector,
+                embedding,
+                k=limit,
+                filter=comparator,
+            )
+            docs = [doc for doc, score in results if normalizer(score) >= threshold]
+            self.mark_recalled(docs)
+        return docs
+
+    def mark_recalled(self, docs: list[Document]):
+        # used by least-recently-recalled retention, persisted with the next save
+        timestamp = self.get_timestamp()
+        for doc in docs:
+            stored = self.db.docstore._dict.get(doc.metadata.get("id", ""))  # type: ignore
+            if stored:
+                stored.metadata["last_recalled"] = timestamp
+
+    async def search_candidates(
+        self, query: str, k: int, areas: list[str]
+    ) -> list[tuple[Document, float]]:
+        # single embedding, up to k results per area so a busy area cannot crowd out the others;
+        # scores normalized like search_similarity_threshold, best first
+        await self.agent.rate_limiter(
+            model_config=self.agent.config.embeddings_model, input=query)
+
+        embedding = await self.db.embedding_function.aembed_query(query)  # type: ignore
+        async with self.lock():
+            results = await asyncio.to_thread(self._search_areas, embedding, k, areas)
+        normalizer = self.db._select_relevance_score_fn()
+        results = [(doc, normalizer(score)) for doc, score in results]
+        return sorted(results, key=lambda x: x[1], reverse=True)
+
+    def _search_areas(
+        self, embedding: list[float], k: int, areas: list[str]
+    ) -> list[tuple[Document, float]]:
+        results = []
+        for area in areas:
+            # the area filter applies after fetching, widen the fetch while the area is rare
+            fetch_k = k * RERANK_FACTOR
+            while True:
+                found = self.db.similarity_search_with_score_by_vector(
+                    embedding, k=k, filter={"area": area}, fetch_k=fetch_k
+                )
+                if len(found) >= k or fetch_k >= min(self.db.index.ntotal, AREA_FETCH_MAX):
+                    break
+                fetch_k *= 4
+            results += found
+        return results
 
     async def delete_documents_by_query(
         self, query: str, threshold: float, filter: str = ""
@@ -262,42 +810,46 @@ class Memory:
         tot = 0
         removed = []
 
-        while True:
-            # Perform similarity search with score
-            docs = await self.search_similarity_threshold(
-                query, limit=k, threshold=threshold, filter=filter
-            )
-            removed += docs
-
-            # Extract document IDs and filter based on score
-            # document_ids = [result[0].metadata["id"] for result in docs if result[1] < score_limit]
-            document_ids = [result.metadata["id"] for result in docs]
-
-            # Delete documents with IDs over the threshold score
-            if document_ids:
-                # fnd = self.db.get(where={"id": {"$in": document_ids}})
-                # if fnd["ids"]: self.db.delete(ids=fnd["ids"])
-                # tot += len(fnd["ids"])
-                self.db.delete(ids=document_ids)
-                tot += len(document_ids)
-
-            # If fewer than K document IDs, break the loop
-            if len(document_ids) < k:
-                break
-
-        if tot:
-            self._save_db()  # persist
+        async with self.lock():
+            while True:
+                # Perform similarity search with score
+                docs = await self.search_similarity_threshold(
+                    query, limit=k, threshold=threshold, filter=filter
+                )
+                removed += docs
+
+                # Extract document IDs and filter based on score
+                # document_ids = [result[0].metadata["id"] for result in docs if result[1] < score_limit]
+                document_ids = [result.metadata["id"] for result in docs]
+
+                # Delete documents with IDs over the threshold score
+                if document_ids:
+                    # fnd = self.db.get(where={"id": {"$in": document_ids}})
+                    # if fnd["ids"]: self.db.delete(ids=fnd["ids"])
+                    # tot += len(fnd["ids"])
+                    self.db.ensure_writable()
+                    self.db.delete(ids=document_ids)
+                    self.db.dedup.remove(document_ids)
+                    tot += len(document_ids)
+
+                # If fewer than K document IDs, break the loop
+                if len(document_ids) < k:
+                    break
+
+            if tot:
+                self._save_db()  # persist
         return removed
 
     async def delete_documents_by_ids(self, ids: list[str]):
-        # aget_by_ids is not yet implemented in faiss, need to do a workaround
-        rem_docs = self.db.get_by_ids(ids)  # existing docs to remove (prevents error)
-        if rem_docs:
-            rem_ids = [doc.metadata["id"] for doc in rem_docs]  # ids to remove
-            await self.db.adelete(ids=rem_ids)
-
-        if rem_docs:
-            self._save_db()  # persist
+        async with self.lock():
+            # aget_by_ids is not yet implemented in faiss, need to do a workaround
+            rem_docs = self.db.get_by_ids(ids)  # existing docs to remove (prevents error)
+            if rem_docs:
+                rem_ids = [doc.metadata["id"] for doc in rem_docs]  # ids to remove
+                self.db.ensure_writable()
+                self.db.delete(ids=rem_ids)
+                self.db.dedup.remove(rem_ids)
+                self._save_db()  # persist
         return rem_docs
 
     async def insert_text(self, text, metadata: dict = {}):
@@ -305,7 +857,7 @@ class Memory:
         ids = await self.insert_documents([doc])
         return ids[0]
 
-    async def insert_documents(self, docs: list[Document]):
+    async def insert_documents(self, docs: list[Document], save: bool = True):
         ids = [str(uuid.uuid4()) for _ in range(len(docs))]
         timestamp = self.get_timestamp()
 
@@ -322,12 +874,35 @@ class Memory:
             await self.agent.rate_limiter(
                 model_config=self.agent.config.embeddings_model, input=docs_txt)
 
-            self.db.add_documents(documents=docs, ids=ids)
-            self._save_db()  # persist
+            # embedded before taking the lock, other writes and imports go on meanwhile
+            texts = [doc.page_content for doc in docs]
+            embeddings = await self.db.embedding_function.aembed_documents(texts)  # type: ignore
+            async with self.lock():
+                self.db.ensure_writable()
+                self.db.add_embeddings(
+                    list(zip(texts, embeddings)),
+                    metadatas=[doc.metadata for doc in docs],
+                    ids=ids,
+                )
+                for doc, id in zip(docs, ids):
+                    self.db.dedup.add(id, doc.page_content, doc.metadata["area"])
+                if save:
+                    self._save_db()  # persist
         return ids
 
     def _save_db(self):
         self.db.save_local(folder_path=self._abs_db_dir(self.memory_subdir))
+        self.db.dedup.save()
+
+    async def find_duplicate(self, text: str, area: str) -> Document | None:
+        # cheap lexical check before anything gets embedded
+        max_distance = get_dedup_distance()
+        if max_distance < 0:
+            return None
+        id = self.db.dedup.find(text, area, max_distance)
+        docs = self.db.get_by_ids([id]) if id else []
+        dedup_stats.add(checked=1, skipped=1 if docs else 0)
+        return docs[0] if docs else None
 
     @staticmethod
     def _get_comparator(condition: str):
@@ -363,7 +938,8 @@ class Memory:
         for doc in docs:
             text = ""
             for k, v in doc.metadata.items():
-                text += f"{k}: {v}\n"
+                if k not in HIDDEN_METADATA:
+                    text += f"{k}: {v}\n"
             text += f"Content: {doc.page_content}"
             result.append(text)
         return result
@@ -373,6 +949,48 @@ class Memory:
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
+def is_mapped(index: faiss.Index) -> bool:
+    # codes are a view of the mmapped file, not a copy owned by the index
+    codes = getattr(index, "codes", None)
+    return codes is not None and hasattr(codes, "is_owned") and not codes.is_owned
+
+
+def get_index_type() -> str:
+    # flat, sqfp16, sq8 or pq; sq8 and pq need training, see memory_index migrate
+    return dotenv.get_dotenv_value("MEMORY_INDEX_TYPE", "flat").lower()
+
+
+def use_rerank() -> bool:
+    return dotenv.get_dotenv_value("MEMORY_INDEX_RERANK", "true").lower() == "true"
+
+
+def get_dedup_distance() -> int:
+    # max differing simhash bits for two memories to count as duplicates, -1 = off
+    return int(dotenv.get_dotenv_value("MEMORY_DEDUP_DISTANCE", 3))
+
+
+def get_maintenance_interval() -> float:
+    # seconds between retention and compaction runs, 0 = off
+    return float(dotenv.get_dotenv_value("MEMORY_MAINTENANCE_HOURS", 0)) * 3600
+
+
+def use_retention_dry_run() -> bool:
+    return dotenv.get_dotenv_value("MEMORY_RETENTION_DRY_RUN", "false").lower() == "true"
+
+
+def use_mmap() -> bool:
+    return dotenv.get_dotenv_value("MEMORY_INDEX_MMAP", "false").lower() == "true"
+
+
+def get_index_budget() -> int:
+    # resident bytes of all loaded memory indexes, 0 = unlimited
+    return int(float(dotenv.get_dotenv_value("MEMORY_INDEX_BUDGET_MB", 0)) * 1024 * 1024)
+
+
+def get_index_idle_seconds() -> float:
+    return float(dotenv.get_dotenv_value("MEMORY_INDEX_IDLE_SECONDS", 60))
+
+
 def get_memory_subdir_abs(agent: Agent) -> str:
     return files.get_abs_path("memory", agent.config.memory_subdir or "default")
 
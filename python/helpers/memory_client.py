@@ -0,0 +1,202 @@
+import asyncio
+import itertools
+import json
+import struct
+from typing import Any
+
+from langchain_core.documents import Document
+
+from python.helpers import dotenv
+from python.helpers.defer import EventLoopThread
+
+# Client side of the shared memory server, see memory_server.py
+# Frames are a 4 byte big-endian length followed by a JSON object.
+
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+is_server = False  # set in the server process, it must own its indexes
+
+
+def get_server_address() -> str:
+    # unix:/path/to/socket or host:port, empty = every process owns its indexes
+    if is_server:
+        return ""
+    return dotenv.get_dotenv_value("MEMORY_SERVER", "")
+
+
+def get_server_password() -> str:
+    return dotenv.get_dotenv_value("MEMORY_SERVER_PASSWORD", "")
+
+
+async def open_connection(address: str):
+    if address.startswith("unix:"):
+        return await asyncio.open_unix_connection(address[len("unix:") :])
+    host, _, port = address.rpartition(":")
+    return await asyncio.open_connection(host or "127.0.0.1", int(port))
+
+
+async def read_frame(reader: asyncio.StreamReader) -> dict | None:
+    try:
+        header = await reader.readexactly(4)
+    except asyncio.IncompleteReadError:
+        return None  # connection closed
+    (size,) = struct.unpack(">I", header)
+    if size > MAX_FRAME_SIZE:
+        raise ValueError(f"Memory server frame too large: {size} bytes")
+    return json.loads(await reader.readexactly(size))
+
+
+def write_frame(writer: asyncio.StreamWriter, data: dict):
+    payload = json.dumps(data).encode("utf-8")
+    writer.write(struct.pack(">I", len(payload)) + payload)
+
+
+def doc_to_dict(doc: Document) -> dict:
+    return {"page_content": doc.page_content, "metadata": doc.metadata}
+
+
+def doc_from_dict(data: dict) -> Document:
+    return Document(data["page_content"], metadata=data["metadata"])
+
+
+class MemoryConnection:
+    """One multiplexed connection per process, owned by its own event loop thread."""
+
+    _instances: dict[str, "MemoryConnection"] = {}
+
+    def __init__(self, address: str):
+        self.address = address
+        self.thread = EventLoopThread("MemoryClient")
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future] = {}
+        self._writer: asyncio.StreamWriter | None = None
+        self._connecting: asyncio.Lock | None = None
+
+    @staticmethod
+    def get(address: str) -> "MemoryConnection":
+        if address not in MemoryConnection._instances:
+            MemoryConnection._instances[address] = MemoryConnection(address)
+        return MemoryConnection._instances[address]
+
+    async def call(self, op: str, subdir: str, **args: Any) -> Any:
+        # callers run on many event loops, the connection lives on the client thread
+        future = self.thread.run_coroutine(self._call(op, subdir, args))
+        return await asyncio.wrap_future(future)
+
+    async def _call(self, op: str, subdir: str, args: dict) -> Any:
+        writer = await self._ensure_connected()
+        id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[id] = future
+        write_frame(writer, {"id": id, "op": op, "subdir": subdir, "args": args})
+        await writer.drain()
+        response = await future
+        if "error" in response:
+            raise Exception(f"Memory server: {response['error']}")
+        return response.get("result")
+
+    async def _ensure_connected(self) -> asyncio.StreamWriter:
+        if self._connecting is None:
+            self._connecting = asyncio.Lock()
+        async with self._connecting:
+            if self._writer is None or self._writer.is_closing():
+                reader, writer = await open_connection(self.address)
+                password = get_server_password()
+                if password:
+                    write_frame(writer, {"auth": password})
+                self._writer = writer
+                asyncio.create_task(self._read_responses(reader))
+            return self._writer
+
+    async def _read_responses(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                response = await read_frame(reader)
+                if response is None:
+                    break
+                future = self._pending.pop(response.get("id", 0), None)
+                if future and not future.done():
+                    future.set_result(response)
+        except Exception:
+            pass
+        finally:
+            # fail all requests in flight, the next call reconnects
+            self._writer = None
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Memory server connection lost"))
+
+
+class RemoteMemory:
+    """Same interface as Memory for callers, backed by the memory server."""
+
+    def __init__(self, agent, memory_subdir: str, address: str):
+        self.agent = agent
+        self.memory_subdir = memory_subdir
+        self.connection = MemoryConnection.get(address)
+
+    async def _call(self, op: str, **args: Any) -> Any:
+        return await self.connection.call(op, self.memory_subdir, **args)
+
+    async def search_similarity_threshold(
+        self, query: str, limit: int, threshold: float, filter: str = ""
+    ):
+        docs = await self._call(
+            "search", query=query, limit=limit, threshold=threshold, filter=filter
+        )
+        return [doc_from_dict(doc) for doc in docs]
+
+    async def search_candidates(
+        self, query: str, k: int, areas: list[str]
+    ) -> list[tuple[Document, float]]:
+        results = await self._call("candidates", query=query, k=k, areas=areas)
+        return [(doc_from_dict(doc), score) for doc, score in results]
+
+    async def status(self) -> dict:
+        # answered once the server has loaded the subdir, or failed to
+        return await self._call("status")
+
+    def mark_recalled(self, docs: list[Document]):
+        ids = [doc.metadata.get("id", "") for doc in docs]
+        if ids:
+            # fire and forget, recall bookkeeping must not delay the prompt
+            self.connection.thread.run_coroutine(
+                self.connection._call("mark_recalled", self.memory_subdir, {"ids": ids})
+            )
+
+    async def delete_documents_by_query(
+        self, query: str, threshold: float, filter: str = ""
+    ):
+        docs = await self._call(
+            "delete_query", query=query, threshold=threshold, filter=filter
+        )
+        return [doc_from_dict(doc) for doc in docs]
+
+    async def delete_documents_by_ids(self, ids: list[str]):
+        docs = await self._call("delete_ids", ids=ids)
+        return [doc_from_dict(doc) for doc in docs]
+
+    async def insert_text(self, text, metadata: dict = {}):
+        doc = Document(text, metadata=metadata)
+        ids = await self.insert_documents([doc])
+        return ids[0]
+
+    async def insert_documents(self, docs: list[Document], save: bool = True):
+        ids = await self._call("insert", docs=[doc_to_dict(doc) for doc in docs])
+        for doc, id in zip(docs, ids):
+            doc.metadata["id"] = id
+        return ids
+
+    async def find_duplicate(self, text: str, area: str) -> Document | None:
+        doc = await self._call("find_duplicate", text=text, area=area)
+        return doc_from_dict(doc) if doc else None
+
+    async def import_knowledge_files(
+        self, log_item, file_paths: list[str], metadata: dict[str, Any]
+    ):
+        changed = await self._call(
+            "import_knowledge", file_paths=file_paths, metadata=metadata
+        )
+        if log_item:
+            log_item.update(heading=f"Imported {len(changed)} changed files")
+        return changed
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3  # words per shingle
+BANDS = 4  # fingerprints within BANDS - 1 bits share at least one band exactly
+DEDUP_AREAS = ["fragments", "solutions"]  # areas written by memorize extensions
+
+_normalize_re = re.compile(r"[^\w]+")
+
+
+class DedupStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.skipped = 0  # duplicates dropped before embedding = embeddings saved
+
+    def add(self, checked: int = 0, skipped: int = 0):
+        with self._lock:
+            self.checked += checked
+            self.skipped += skipped
+
+    def output(self):
+        return {"checked": self.checked, "embeddings_saved": self.skipped}
+
+
+# process wide counters over all memory indexes
+stats = DedupStats()
+
+
+def normalize(text: str) -> list[str]:
+    return _normalize_re.sub(" ", text.lower()).split()
+
+
+def simhash(text: str) -> int:
+    words = normalize(text)
+    if len(words) >= SHINGLE_SIZE:
+        features = [
+            " ".join(words[i : i + SHINGLE_SIZE])
+            for i in range(len(words) - SHINGLE_SIZE + 1)
+        ]
+    else:
+        features = [" ".join(words)]
+    hashes = np.array(
+        [
+            int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "little")
+            for f in features
+        ],
+        dtype=np.uint64,
+    )
+    # every feature votes +1/-1 on each bit, the fingerprint keeps the majority
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0) * 2 > len(features)
+    return int.from_bytes(np.packbits(votes, bitorder="little").tobytes(), "little")
+
+
+def distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def bands(fingerprint: int) -> list[tuple[int, int]]:
+    width = SIMHASH_BITS // BANDS
+    mask = (1 << width) - 1
+    return [(band, (fingerprint >> (band * width)) & mask) for band in range(BANDS)]
+
+
+class DedupIndex:
+    """SimHash fingerprints of memorized documents, kept next to the FAISS docstore."""
+
+    FILE = "dedup.json"
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.fingerprints: dict[str, tuple[int, str]] = {}  # doc id -> (simhash, area)
+        self.buckets: dict[tuple[str, int, int], set[str]] = {}  # (area, band, bits) -> doc ids
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def load(db_dir: str, docstore: dict) -> "DedupIndex":
+        index = DedupIndex(os.path.join(db_dir, DedupIndex.FILE))
+        if os.path.exists(index.path):
+            with open(index.path, "r") as f:
+                for id, (fp, area) in json.load(f).items():
+                    index._set(id, int(fp, 16), area)
+        index.sync(docstore)
+        return index
+
+    def sync(self, docstore: dict):
+        # fingerprint documents missing from the file, drop ones no longer in the docstore
+        with self._lock:
+            changed = False
+            for id in [id for id in self.fingerprints if id not in docstore]:
+                self._pop(id)
+                changed = True
+            for id, doc in docstore.items():
+                area = doc.metadata.get("area", "")
+                if id not in self.fingerprints and area in DEDUP_AREAS:
+                    self._set(id, simhash(doc.page_content), area)
+                    changed = True
+        if changed:
+            self.save()
+
+    def find(self, text: str, area: str, max_distance: int) -> str | None:
+        # id of a stored document near-identical to text, if any
+        fingerprint = simhash(text)
+        with self._lock:
+            if max_distance >= BANDS:
+                # too far for the bands to guarantee a shared one, scan everything
+                candidates = [id for id, (_, fp_area) in self.fingerprints.items() if fp_area == area]
+            else:
+                candidates = set()
+                for band, bits in bands(fingerprint):
+                    candidates.update(self.buckets.get((area, band, bits), ()))
+            for id in candidates:
+                if distance(self.fingerprints[id][0], fingerprint) <= max_distance:
+                    return id
+        return None
+
+    def add(self, id: str, text: str, area: str):
+        if area in DEDUP_AREAS:
+            fingerprint = simhash(text)
+            with self._lock:
+                self._set(id, fingerprint, area)
+
+    def remove(self, ids: list[str]):
+        with self._lock:
+            for id in ids:
+                self._pop(id)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {id: [f"{fp:016x}", area] for id, (fp, area) in self.fingerprints.items()}
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def _set(self, id: str, fingerprint: int, area: str):
+        self._pop(id)
+        self.fingerprints[id] = (fingerprint, area)
+        for band, bits in bands(fingerprint):
+            self.buckets.setdefault((area, band, bits), set()).add(id)
+
+    def _pop(self, id: str):
+        entry = self.fingerprints.pop(id, None)
+        if entry is None:
+            return
+        fingerprint, area = entry
+        for band, bits in bands(fingerprint):
+            bucket = self.buckets.get((area, band, bits))
+            if bucket is not None:
+                bucket.discard(id)
+                if not bucket:
+                    del self.buckets[(area, band, bits)]
@@ -0,0 +1,249 @@
+import argparse
+import os
+import pickle
+import shutil
+import sys
+import time
+from typing import Literal
+
+import faiss
+import numpy as np
+
+IndexType = Literal["flat", "sqfp16", "sq8", "pq"]
+INDEX_TYPES: list[IndexType] = ["flat", "sqfp16", "sq8", "pq"]
+
+PQ_SUBVECTOR_DIM = 16  # dimensions per PQ sub-quantizer, 1536 dims -> 96 bytes per vector
+PQ_MIN_TRAIN = 256 * 39  # faiss wants ~39 training points per centroid
+
+
+def create_index(dim: int, index_type: str = "flat") -> faiss.Index:
+    # new empty index, types that need training start as fp16 until migrated
+    if index_type == "flat":
+        return faiss.IndexFlatIP(dim)
+    return faiss.IndexScalarQuantizer(
+        dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT
+    )
+
+
+def is_exact(index: faiss.Index) -> bool:
+    return isinstance(index, faiss.IndexFlat)
+
+
+def get_index_type(index: faiss.Index) -> str:
+    if isinstance(index, faiss.IndexFlat):
+        return "flat"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16:
+            return "sqfp16"
+        return "sq8"
+    if isinstance(index, faiss.IndexPQ):
+        return "pq"
+    return type(index).__name__
+
+
+def get_vectors(index: faiss.Index) -> np.ndarray:
+    # exact for flat indexes, decoded approximation for quantized ones
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype="float32")
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def build_index(vectors: np.ndarray, index_type: str) -> faiss.Index:
+    dim = vectors.shape[1]
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dim)
+    elif index_type == "sqfp16":
+        index = faiss.IndexScalarQuantizer(
+            dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT
+        )
+    elif index_type == "sq8":
+        index = faiss.IndexScalarQuantizer(
+            dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+        )
+    elif index_type == "pq":
+        if dim % PQ_SUBVECTOR_DIM:
+            raise ValueError(
+                f"PQ needs dimension divisible by {PQ_SUBVECTOR_DIM}, got {dim}"
+            )
+        if len(vectors) < PQ_MIN_TRAIN:
+            raise ValueError(
+                f"PQ needs at least {PQ_MIN_TRAIN} vectors to train, got {len(vectors)}"
+            )
+        index = faiss.IndexPQ(
+            dim, dim // PQ_SUBVECTOR_DIM, 8, faiss.METRIC_INNER_PRODUCT
+        )
+    else:
+        raise ValueError(f"Unknown index type '{index_type}'")
+
+    if not index.is_trained:
+        index.train(vectors)
+    # same insertion order keeps index_to_docstore_id valid
+    index.add(vectors)
+    return index
+
+
+def index_bytes(index: faiss.Index) -> int:
+    return index.ntotal * index.sa_code_size()
+
+
+def migrate(db_dir: str, index_type: str) -> tuple[str, str]:
+    index_path = os.path.join(db_dir, "index.faiss")
+    index = faiss.read_index(index_path)
+    source_type = get_index_type(index)
+    if source_type == index_type:
+        return source_type, index_type
+    if not is_exact(index):
+        print(
+            f"Warning: source index is {source_type}, vectors are decoded approximations."
+        )
+
+    converted = build_index(get_vectors(index), index_type)
+    shutil.copyfile(index_path, index_path + ".bak")
+    # written aside and swapped in, processes that mapped the old file keep reading its inode
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    faiss.write_index(converted, tmp_path)
+    os.replace(tmp_path, index_path)
+    return source_type, index_type
+
+
+def find_users(index_path: str) -> list[str]:
+    # running processes that have the index mapped (linux only) or a reachable memory server
+    users = []
+    real_path = os.path.realpath(index_path)
+    if os.path.isdir("/proc"):
+        for pid in filter(str.isdigit, os.listdir("/proc")):
+            if int(pid) == os.getpid():
+                continue
+            try:
+                with open(f"/proc/{pid}/maps") as f:
+                    if any(line.rstrip().endswith(real_path) for line in f):
+                        users.append(f"process {pid} has the index mapped")
+            except OSError:
+                continue
+    from python.helpers import memory_client
+
+    address = memory_client.get_server_address()
+    if address and _is_listening(address):
+        users.append(f"memory server is running on {address}")
+    return users
+
+
+def _is_listening(address: str) -> bool:
+    import socket
+
+    try:
+        if address.startswith("unix:"):
+            with socket.socket(socket.AF_UNIX) as sock:
+                sock.connect(address[len("unix:") :])
+        else:
+            host, _, port = address.rpartition(":")
+            socket.create_connection((host or "127.0.0.1", int(port)), timeout=1).close()
+        return True
+    except OSError:
+        return False
+
+
+def compare(
+    db_dir: str, queries: int = 100, k: int = 10, rerank_factor: int = 4
+) -> list[dict[str, float | str]]:
+    # recall@k against exact search, using stored vectors as queries
+    index = faiss.read_index(os.path.join(db_dir, "index.faiss"))
+    vectors = get_vectors(index)
+    if len(vectors) == 0:
+        return []
+    rng = np.random.default_rng(0)
+    sample = vectors[rng.choice(len(vectors), min(queries, len(vectors)), replace=False)]
+    k = min(k, len(vectors))
+
+    exact = build_index(vectors, "flat")
+    _, truth = exact.search(sample, k)
+
+    with open(os.path.join(db_dir, "index.pkl"), "rb") as f:
+        docstore, _ = pickle.load(f)
+    docstore_bytes = len(pickle.dumps(docstore))
+
+    results = []
+    for index_type in INDEX_TYPES:
+        try:
+            candidate = build_index(vectors, index_type)
+        except ValueError as e:
+            results.append({"type": index_type, "error": str(e)})
+            continue
+        for rerank in [False, True] if index_type != "flat" else [False]:
+            start = time.perf_counter()
+            if rerank:
+                found = _search_reranked(candidate, vectors, sample, k, rerank_factor)
+            else:
+                _, found = candidate.search(sample, k)
+            latency = (time.perf_counter() - start) / len(sample)
+            recall = np.mean(
+                [len(set(f) & set(t)) / k for f, t in zip(found.tolist(), truth.tolist())]
+            )
+            results.append(
+                {
+                    "type": index_type + ("+rerank" if rerank else ""),
+                    "recall": float(recall),
+                    "latency_ms": latency * 1000,
+                    "vector_bytes": index_bytes(candidate),
+                    "docstore_bytes": docstore_bytes,
+                }
+            )
+    return results
+
+
+def _search_reranked(
+    index: faiss.Index,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    rerank_factor: int,
+) -> np.ndarray:
+    # same strategy as MyFaiss: over-fetch from the quantized index, re-score exactly
+    _, candidates = index.search(queries, k * rerank_factor)
+    found = np.zeros((len(queries), k), dtype="int64")
+    for row, (query, ids) in enumerate(zip(queries, candidates)):
+        ids = ids[ids >= 0]
+        scores = vectors[ids] @ query
+        found[row, : min(k, len(ids))] = ids[np.argsort(-scores)[:k]]
+    return found
+
+
+def main():
+    # python -m python.helpers.memory_index compare <memory_subdir>
+    # python -m python.helpers.memory_index migrate <memory_subdir> --type sq8
+    from python.helpers import files
+
+    parser = argparse.ArgumentParser(description="Memory index compression tools")
+    parser.add_argument("command", choices=["migrate", "compare"])
+    parser.add_argument("memory_subdir")
+    parser.add_argument("--type", choices=INDEX_TYPES, default="sqfp16")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--force", action="store_true", help="migrate even if the index is in use")
+    args = parser.parse_args()
+
+    db_dir = files.get_abs_path("memory", args.memory_subdir)
+    if not os.path.exists(os.path.join(db_dir, "index.faiss")):
+        sys.exit(f"No memory index in {db_dir}")
+
+    if args.command == "migrate":
+        users = find_users(os.path.join(db_dir, "index.faiss"))
+        if users and not args.force:
+            sys.exit("Index is in use, stop the ui and memory server first:\n  " + "\n  ".join(users))
+        # a ui that loaded the index into RAM is not detectable, its next save would undo the migration
+        print("Warning: restart any running ui or memory server after migrating.")
+        source, target = migrate(db_dir, args.type)
+        print(f"Migrated {db_dir} from {source} to {target}")
+    else:
+        print(f"{'type':<15} {'recall@10':>10} {'ms/query':>10} {'vector MB':>10} {'docstore MB':>12}")
+        for row in compare(db_dir, args.queries):
+            if "error" in row:
+                print(f"{row['type']:<15} {row['error']}")
+                continue
+            print(
+                f"{row['type']:<15} {row['recall']:>10.3f} {row['latency_ms']:>10.3f}"
+                f" {row['vector_bytes'] / 1e6:>10.2f} {row['docstore_bytes'] / 1e6:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
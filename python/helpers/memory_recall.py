@@ -0,0 +1,65 @@
+import asyncio
+
+from langchain_core.documents import Document
+
+from agent import Agent, LoopData
+from python.helpers import dotenv
+from python.helpers.history import serialize_output
+from python.helpers.memory import Memory
+
+DIGEST_MESSAGES = 6  # last messages of the current topic embedded as recall query
+DIGEST_MESSAGE_CHARS = 500  # long tool outputs would drown the user's intent
+DIGEST_CHARS = 3000
+AREA_CANDIDATES = 10  # per area, one embedding and search shared by all recall extensions
+
+DATA_NAME_SEARCH = "_recall_search_task"
+
+
+def use_fast_recall() -> bool:
+    # "fast" embeds a digest of recent messages directly, "llm" asks the utility model for a query
+    return dotenv.get_dotenv_value("MEMORY_RECALL_MODE", "llm").lower() == "fast"
+
+
+def get_digest(agent: Agent, loop_data: LoopData) -> str:
+    parts = []
+    if loop_data.user_message:
+        parts.append(loop_data.user_message.output_text()[:DIGEST_MESSAGE_CHARS])
+    outputs = agent.history.current.output()[-DIGEST_MESSAGES:]
+    for output in reversed(outputs):  # newest first, oldest get cut by the size limit
+        parts.append(serialize_output(output, ai_label="ai", human_label="user")[:DIGEST_MESSAGE_CHARS])
+    return "\n".join(parts)[:DIGEST_CHARS]
+
+
+async def recall(
+    agent: Agent,
+    loop_data: LoopData,
+    areas: list[str],
+    limit: int,
+    threshold: float,
+) -> list[Document]:
+    # memories and solutions extensions share one embedding and search per iteration
+    results = await _get_search(agent, loop_data)
+    docs = [
+        doc
+        for doc, score in results
+        if score >= threshold and doc.metadata.get("area", "") in areas
+    ][:limit]
+    db = await Memory.get(agent)
+    db.mark_recalled(docs)
+    return docs
+
+
+def _get_search(agent: Agent, loop_data: LoopData) -> asyncio.Task:
+    # iteration numbers restart with every monologue, so match the loop data too
+    cached = agent.get_data(DATA_NAME_SEARCH)
+    if cached and cached[0] is loop_data and cached[1] == loop_data.iteration:
+        return cached[2]
+    task = asyncio.create_task(_search(agent, get_digest(agent, loop_data)))
+    agent.set_data(DATA_NAME_SEARCH, (loop_data, loop_data.iteration, task))
+    return task
+
+
+async def _search(agent: Agent, digest: str) -> list[tuple[Document, float]]:
+    db = await Memory.get(agent)
+    areas = [area.value for area in Memory.Area]
+    return await db.search_candidates(digest, AREA_CANDIDATES, areas)
@@ -0,0 +1,175 @@
+import argparse
+import os
+import pickle
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Literal
+
+from langchain_core.documents import Document
+
+from python.helpers import dotenv
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"  # same as Memory.get_timestamp
+
+
+@dataclass
+class RetentionPolicy:
+    max_count: int = 0  # 0 = unlimited
+    max_age_days: float = 0  # by "timestamp" metadata, 0 = unlimited
+    evict: Literal["oldest", "recalled"] = "recalled"  # order when over max_count
+
+
+@dataclass
+class Eviction:
+    id: str
+    area: str
+    reason: str
+    timestamp: str
+    last_recalled: str
+    content: str
+
+
+def get_policy(area: str) -> RetentionPolicy | None:
+    # MEMORY_RETENTION_FRAGMENTS=max_count=5000,max_age_days=180,evict=recalled
+    value = dotenv.get_dotenv_value(f"MEMORY_RETENTION_{area.upper()}", "")
+    if not value:
+        return None
+    return parse_policy(value)
+
+
+def parse_policy(value: str) -> RetentionPolicy:
+    policy = RetentionPolicy()
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        key, _, val = part.partition("=")
+        key, val = key.strip(), val.strip()
+        if key == "max_count":
+            policy.max_count = int(val)
+        elif key == "max_age_days":
+            policy.max_age_days = float(val)
+        elif key == "evict" and val in ["oldest", "recalled"]:
+            policy.evict = val  # type: ignore
+        else:
+            raise ValueError(f"Invalid memory retention setting '{part}'")
+    return policy
+
+
+def get_policies(areas: list[str]) -> dict[str, RetentionPolicy]:
+    policies = {}
+    for area in areas:
+        policy = get_policy(area)
+        if policy:
+            policies[area] = policy
+    return policies
+
+
+def select_evictions(
+    docs: dict[str, Document],
+    policies: dict[str, RetentionPolicy],
+    now: datetime | None = None,
+) -> list[Eviction]:
+    now = now or datetime.now()
+    by_area: dict[str, list[tuple[str, Document]]] = {}
+    for id, doc in docs.items():
+        # imported knowledge files are managed by knowledge_import, never evict them
+        if doc.metadata.get("source"):
+            continue
+        by_area.setdefault(doc.metadata.get("area", ""), []).append((id, doc))
+
+    evictions = []
+    for area, policy in policies.items():
+        entries = by_area.get(area, [])
+
+        if policy.max_age_days:
+            cutoff = (now - timedelta(days=policy.max_age_days)).strftime(TIMESTAMP_FORMAT)
+            expired = [(id, doc) for id, doc in entries if _timestamp(doc) < cutoff]
+            evictions += [_eviction(id, doc, "max_age") for id, doc in expired]
+            expired_ids = {id for id, _ in expired}
+            entries = [(id, doc) for id, doc in entries if id not in expired_ids]
+
+        if policy.max_count and len(entries) > policy.max_count:
+            if policy.evict == "recalled":
+                # least recently used first, saving a memory counts as its first use
+                key = lambda e: (max(_last_recalled(e[1]), _timestamp(e[1])), _timestamp(e[1]))
+            else:
+                key = lambda e: _timestamp(e[1])
+            entries.sort(key=key)
+            excess = entries[: len(entries) - policy.max_count]
+            evictions += [_eviction(id, doc, f"max_count ({policy.evict})") for id, doc in excess]
+
+    return evictions
+
+
+def format_report(memory_subdir: str, evictions: list[Eviction], docs: dict[str, Document]) -> str:
+    counts: dict[str, int] = {}
+    for doc in docs.values():
+        area = doc.metadata.get("area", "")
+        counts[area] = counts.get(area, 0) + 1
+    evicted: dict[str, int] = {}
+    for eviction in evictions:
+        evicted[eviction.area] = evicted.get(eviction.area, 0) + 1
+
+    lines = [f"Memory '{memory_subdir}': {len(evictions)} of {len(docs)} documents to evict"]
+    for area, count in sorted(counts.items()):
+        lines.append(f"  {area or '-'}: {count} documents, {evicted.get(area, 0)} to evict")
+    for e in evictions:
+        preview = e.content[:80].replace("\n", " ")
+        lines.append(
+            f"  - [{e.area}] {e.reason}, created {e.timestamp}, recalled {e.last_recalled or 'never'}: {preview}"
+        )
+    return "\n".join(lines)
+
+
+def _timestamp(doc: Document) -> str:
+    return doc.metadata.get("timestamp", "")
+
+
+def _last_recalled(doc: Document) -> str:
+    return doc.metadata.get("last_recalled", "")
+
+
+def _eviction(id: str, doc: Document, reason: str) -> Eviction:
+    return Eviction(
+        id=id,
+        area=doc.metadata.get("area", ""),
+        reason=reason,
+        timestamp=_timestamp(doc),
+        last_recalled=_last_recalled(doc),
+        content=doc.page_content,
+    )
+
+
+def main():
+    # dry run against the saved index: python -m python.helpers.memory_retention <memory_subdir>
+    from python.helpers import files
+
+    parser = argparse.ArgumentParser(description="Memory retention dry run")
+    parser.add_argument("memory_subdir")
+    parser.add_argument(
+        "--policy",
+        action="append",
+        default=[],
+        help="area:settings, e.g. fragments:max_count=1000,evict=recalled, overrides .env",
+    )
+    args = parser.parse_args()
+
+    db_dir = files.get_abs_path("memory", args.memory_subdir)
+    if not os.path.exists(os.path.join(db_dir, "index.pkl")):
+        sys.exit(f"No memory index in {db_dir}")
+    with open(os.path.join(db_dir, "index.pkl"), "rb") as f:
+        docstore, _ = pickle.load(f)
+    docs = docstore._dict
+
+    areas = {doc.metadata.get("area", "") for doc in docs.values()}
+    policies = get_policies([area for area in areas if area])
+    for override in args.policy:
+        area, _, settings = override.partition(":")
+        policies[area] = parse_policy(settings)
+
+    print(format_report(args.memory_subdir, select_evictions(docs, policies), docs))
+
+
+if __name__ == "__main__":
+    main()
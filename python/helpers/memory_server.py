@@ -0,0 +1,210 @@
+import asyncio
+import hmac
+import os
+from dataclasses import replace
+from typing import Any, Awaitable, Callable
+
+from langchain_core.documents import Document
+
+from python.helpers import files, memory_client
+from python.helpers.memory import Memory, MemoryStatus
+from python.helpers.memory_client import (
+    doc_from_dict,
+    doc_to_dict,
+    read_frame,
+    write_frame,
+)
+from python.helpers.print_style import PrintStyle
+
+# Shared memory server: one process owns the FAISS indexes and the embeddings cache,
+# web workers and replicas on the same host use it through memory_client.RemoteMemory
+
+BATCH_WINDOW = 0.005  # seconds to collect concurrent requests into one batch
+BATCH_MAX = 256
+
+
+def get_default_address() -> str:
+    return "unix:" + files.get_abs_path("tmp/memory.sock")
+
+
+class Batcher:
+    """Collects items per key for a short window and processes them in one call."""
+
+    def __init__(self, process: Callable[[str, list[Any]], Awaitable[list[Any]]]):
+        self.process = process
+        self.pending: dict[str, list[tuple[Any, asyncio.Future]]] = {}
+
+    async def add(self, key: str, item: Any) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        batch = self.pending.setdefault(key, [])
+        batch.append((item, future))
+        if len(batch) == 1:
+            asyncio.get_running_loop().call_later(
+                BATCH_WINDOW, lambda: asyncio.create_task(self.flush(key))
+            )
+        elif len(batch) >= BATCH_MAX:
+            asyncio.create_task(self.flush(key))
+        return await future
+
+    async def flush(self, key: str):
+        batch = self.pending.pop(key, [])
+        if not batch:
+            return
+        try:
+            results = await self.process(key, [item for item, _ in batch])
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+
+class MemoryServer:
+    def __init__(self, address: str, password: str = ""):
+        self.address = address
+        self.password = password
+        self.contexts: dict[str, Any] = {}  # internal agent context per memory subdir
+        self.queries = Batcher(self._embed_queries)
+        self.inserts = Batcher(self._insert_documents)
+
+    async def serve(self):
+        if self.address.startswith("unix:"):
+            path = self.address[len("unix:") :]
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if os.path.exists(path):
+                os.remove(path)  # stale socket from a previous run
+            server = await asyncio.start_unix_server(self._handle_client, path)
+            os.chmod(path, 0o600)
+        else:
+            host, _, port = self.address.rpartition(":")
+            server = await asyncio.start_server(
+                self._handle_client, host or "127.0.0.1", int(port)
+            )
+        PrintStyle.standard(f"Memory server listening on {self.address}")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        write_lock = asyncio.Lock()
+        try:
+            if self.password:
+                auth = await read_frame(reader)
+                if not auth or not hmac.compare_digest(
+                    str(auth.get("auth", "")).encode("utf-8"), self.password.encode("utf-8")
+                ):
+                    return
+            while True:
+                request = await read_frame(reader)
+                if request is None:
+                    break
+                # requests of one connection run concurrently, responses carry their id
+                asyncio.create_task(self._respond(request, writer, write_lock))
+        except Exception as e:
+            PrintStyle.error(f"Memory server connection error: {e}")
+        finally:
+            writer.close()
+
+    async def _respond(
+        self, request: dict, writer: asyncio.StreamWriter, write_lock: asyncio.Lock
+    ):
+        response: dict[str, Any] = {"id": request.get("id")}
+        try:
+            response["result"] = await self._dispatch(
+                request["op"], request.get("subdir") or "default", request.get("args", {})
+            )
+        except Exception as e:
+            response["error"] = str(e)
+        async with write_lock:
+            write_frame(writer, response)
+            await writer.drain()
+
+    async def _dispatch(self, op: str, subdir: str, args: dict) -> Any:
+        memory = await self._memory(subdir)
+
+        if op == "status":
+            # the subdir is loaded at this point, or _memory raised
+            status = Memory.status.get(subdir)
+            return status.output() if status else MemoryStatus(state="ready").output()
+        if op == "insert":
+            return await self.inserts.add(
+                subdir, [doc_from_dict(doc) for doc in args["docs"]]
+            )
+        if op == "import_knowledge":
+            # loads and embeds first, Memory locks the index only to merge and save
+            return await memory.import_knowledge_files(
+                None, args["file_paths"], args["metadata"]
+            )
+        if op in ["search", "candidates", "delete_query"]:
+            # embed outside the lock, concurrent queries share one embeddings call
+            await self.queries.add(subdir, args["query"])
+
+        # Memory takes its subdir lock around index access, embeddings stay outside it
+        if op == "search":
+            docs = await memory.search_similarity_threshold(
+                args["query"], args["limit"], args["threshold"], args.get("filter", "")
+            )
+            return [doc_to_dict(doc) for doc in docs]
+        if op == "candidates":
+            results = await memory.search_candidates(
+                args["query"], args["k"], args["areas"]
+            )
+            return [(doc_to_dict(doc), score) for doc, score in results]
+        if op == "delete_query":
+            docs = await memory.delete_documents_by_query(
+                args["query"], args["threshold"], args.get("filter", "")
+            )
+            return [doc_to_dict(doc) for doc in docs]
+        if op == "delete_ids":
+            docs = await memory.delete_documents_by_ids(args["ids"])
+            return [doc_to_dict(doc) for doc in docs]
+        if op == "find_duplicate":
+            doc = await memory.find_duplicate(args["text"], args["area"])
+            return doc_to_dict(doc) if doc else None
+        if op == "mark_recalled":
+            async with memory.lock():
+                memory.mark_recalled(memory.db.get_by_ids(args["ids"]))
+            return None
+        raise Exception(f"Unknown memory operation '{op}'")
+
+    async def _memory(self, subdir: str) -> Memory:
+        from agent import AgentContext
+        from initialize import initialize
+
+        context = self.contexts.get(subdir)
+        if context is None:
+            context = AgentContext(replace(initialize(), memory_subdir=subdir))
+            AgentContext.remove(context.id)
+            self.contexts[subdir] = context
+        return await Memory.get(context.agent0)  # type: ignore
+
+    async def _embed_queries(self, subdir: str, queries: list[str]) -> list[None]:
+        # fills the query cache, the following searches do not call the model again
+        memory = await self._memory(subdir)
+        await memory.agent.rate_limiter(
+            model_config=memory.agent.config.embeddings_model, input="".join(queries)
+        )
+        await memory.db.embedding_function.aembed_queries(list(set(queries)))  # type: ignore
+        return [None] * len(queries)
+
+    async def _insert_documents(
+        self, subdir: str, batches: list[list[Document]]
+    ) -> list[list[str]]:
+        # one embeddings call and one save for all concurrent inserts
+        memory = await self._memory(subdir)
+        docs = [doc for batch in batches for doc in batch]
+        ids = await memory.insert_documents(docs)  # embeds first, locks the index only to add
+        results, start = [], 0
+        for batch in batches:
+            results.append(ids[start : start + len(batch)])
+            start += len(batch)
+        return results
+
+
+async def serve(address: str, password: str = "", warmup_subdirs: list[str] = []):
+    memory_client.is_server = True  # Memory.get must not forward to itself
+    asyncio.create_task(Memory.warmup(warmup_subdirs))
+    asyncio.create_task(Memory.maintenance_loop())
+    await MemoryServer(address, password).serve()
@@ -6,7 +6,7 @@ from python.helpers import files, history
 import json
 from initialize import initialize
 
-from python.helpers.log import Log, LogItem
+from python.helpers.log import Log
 
 CHATS_FOLDER = "tmp/chats"
 LOG_SIZE = 1000
@@ -191,22 +191,16 @@ def _deserialize_log(data: dict[str, Any]) -> "Log":
     log.guid = data.get("guid", str(uuid.uuid4()))
     log.set_initial_progress()
 
-    # Deserialize the list of LogItem objects
-    i = 0
+    # Deserialize the list of LogItem objects, numbered from 0 again
     for item_data in data.get("logs", []):
-        log.logs.append(
-            LogItem(
-                log=log,  # restore the log reference
-                no=i,  # item_data["no"],
-                type=item_data["type"],
-                heading=item_data.get("heading", ""),
-                content=item_data.get("content", ""),
-                kvps=OrderedDict(item_data["kvps"]) if item_data["kvps"] else None,
-                temp=item_data.get("temp", False),
-            )
+        log.log(
+            type=item_data["type"],
+            heading=item_data.get("heading", ""),
+            content=item_data.get("content", ""),
+            kvps=OrderedDict(item_data["kvps"]) if item_data["kvps"] else None,
+            temp=item_data.get("temp", False),
         )
-        log.updates.append(i)
-        i += 1
+    log.set_initial_progress()
 
     return log
 
@@ -1,7 +1,174 @@
 import os, webcolors, html
 import sys
+import atexit, gzip, queue, shutil, threading, time
 from datetime import datetime
-from . import files
+from functools import lru_cache
+from . import files, dotenv
+
+LOG_QUEUE_SIZE = 10000  # pending html chunks, more are dropped rather than blocking the agent
+LOG_HTML_HEADER = "<html><body style='background-color:black;font-family: Arial, Helvetica, sans-serif;'><pre>\n"
+LOG_HTML_FOOTER = "</pre></body></html>"
+
+
+class LogWriter:
+    """Writes the html log from a background thread, callers only enqueue."""
+
+    def __init__(self):
+        self.queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.thread: threading.Thread | None = None
+        self.lock = threading.Lock()
+        self.path: str | None = None
+        self.dropped = 0
+        self._file = None
+        self._opened_at = 0.0
+        self._size = 0
+
+    def enabled(self) -> bool:
+        # html mirror of the console, can be switched off in production
+        return dotenv.get_dotenv_value("LOG_HTML", "true").lower() == "true"
+
+    def write(self, html):
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self._start()
+        try:
+            self.queue.put_nowait(html)
+        except queue.Full:
+            with self.lock:  # writers on several threads
+                self.dropped += 1
+
+    def close(self):
+        # writes everything still queued and the footer, registered with atexit on start
+        if self.thread is None:
+            return
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout=5)
+        if not self.thread.is_alive() and self._file:
+            # writer thread died on an error, write the rest from here
+            chunks = []
+            while not self.queue.empty():
+                chunks.append(self.queue.get_nowait())
+            self._write("".join(c for c in chunks if c))
+            self._close_file()
+
+    def _start(self):
+        self.flush_seconds = float(dotenv.get_dotenv_value("LOG_FLUSH_SECONDS", 1) or 1)
+        self.max_bytes = int(float(dotenv.get_dotenv_value("LOG_MAX_MB", 10) or 0) * 1024 * 1024)
+        self.max_age = float(dotenv.get_dotenv_value("LOG_MAX_HOURS", 24) or 0) * 3600
+        self.compress = dotenv.get_dotenv_value("LOG_COMPRESS", "true").lower() == "true"
+        self.keep_files = int(dotenv.get_dotenv_value("LOG_KEEP_FILES", 50) or 0)
+        self._open()
+        self._prune()  # logs of previous runs count too
+        self.thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)  # the daemon thread would die with unflushed lines
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                chunk = self.queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                chunk = ""
+            # drain everything queued meanwhile into one write
+            chunks = [chunk]
+            while chunk is not None and not self.queue.empty():
+                chunk = self.queue.get_nowait()
+                chunks.append(chunk)
+            closing = chunks[-1] is None
+            with self.lock:
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                chunks.insert(0, f"<br>[{dropped} log entries dropped]<br>\n")
+            self._write("".join(c for c in chunks if c))
+            if closing:
+                self._close_file()
+                return
+            if time.monotonic() - last_flush >= self.flush_seconds:
+                self._file.flush()  # type: ignore
+                last_flush = time.monotonic()
+                self._rotate_if_needed()
+
+    def _write(self, text):
+        if not text:
+            return
+        data = text.encode("utf-8")
+        self._file.write(data)  # type: ignore
+        self._size += len(data)
+
+    def _open(self):
+        logs_dir = files.get_abs_path("logs")
+        os.makedirs(logs_dir, exist_ok=True)
+        path = os.path.join(logs_dir, datetime.now().strftime("log_%Y%m%d_%H%M%S.html"))
+        no = 1
+        while os.path.exists(path) or os.path.exists(path + ".gz"):
+            # rotated within the same second
+            no += 1
+            path = os.path.join(logs_dir, datetime.now().strftime(f"log_%Y%m%d_%H%M%S_{no}.html"))
+        self.path = path
+        PrintStyle.log_file_path = path
+        self._file = open(path, "wb")
+        self._opened_at = time.monotonic()
+        self._size = 0
+        self._write(LOG_HTML_HEADER)
+
+    def _close_file(self):
+        if self._file:
+            self._write(LOG_HTML_FOOTER)
+            self._file.close()
+            self._file = None
+
+    def _rotate_if_needed(self):
+        if (self.max_bytes and self._size >= self.max_bytes) or (
+            self.max_age and time.monotonic() - self._opened_at >= self.max_age
+        ):
+            old_path = self.path
+            self._close_file()
+            self._open()
+            if self.compress and old_path:
+                try:
+                    with open(old_path, "rb") as src, gzip.open(old_path + ".gz", "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                    os.remove(old_path)
+                except Exception:
+                    pass  # keep the uncompressed file
+            self._prune()
+
+    def _prune(self):
+        # oldest logs beyond LOG_KEEP_FILES go, the current one is not counted
+        if not self.keep_files:
+            return
+        logs_dir = os.path.dirname(self.path)  # type: ignore
+        try:
+            old = [
+                os.path.join(logs_dir, name)
+                for name in os.listdir(logs_dir)
+                if name.startswith("log_") and name.endswith((".html", ".html.gz"))
+            ]
+            old = [path for path in old if path != self.path]
+            old.sort(key=os.path.getmtime)
+            for path in old[: max(len(old) - self.keep_files, 0)]:
+                os.remove(path)
+        except OSError:
+            pass  # removed meanwhile, try again with the next rotation
+
+
+@lru_cache(maxsize=None)
+def _rgb(color):
+    # webcolors lookups are slow, every color is resolved once per process
+    try:
+        if color.startswith("#") and len(color) == 7:
+            return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+        rgb_color = webcolors.name_to_rgb(color)
+        return rgb_color.red, rgb_color.green, rgb_color.blue
+    except ValueError:
+        return None
+
+
+log_writer = LogWriter()
+
 
 class PrintStyle:
     last_endline = True
@@ -17,34 +184,22 @@ class PrintStyle:
         self.padding_added = False  # Flag to track if padding was added
         self.log_only = log_only
 
-        if PrintStyle.log_file_path is None:
-            logs_dir = files.get_abs_path("logs")
-            os.makedirs(logs_dir, exist_ok=True)
-            log_filename = datetime.now().strftime("log_%Y%m%d_%H%M%S.html")
-            PrintStyle.log_file_path = os.path.join(logs_dir, log_filename)
-            with open(PrintStyle.log_file_path, "w") as f:
-                f.write("<html><body style='background-color:black;font-family: Arial, Helvetica, sans-serif;'><pre>\n")
+        # style prefixes computed once per instance, not per printed chunk
+        self._ansi_start = self._get_ansi_start()
+        self._html_style = self._get_html_style()
 
     def _get_rgb_color_code(self, color, is_background=False):
-        try:
-            if color.startswith("#") and len(color) == 7:
-                r = int(color[1:3], 16)
-                g = int(color[3:5], 16)
-                b = int(color[5:7], 16)
-            else:
-                rgb_color = webcolors.name_to_rgb(color)
-                r, g, b = rgb_color.red, rgb_color.green, rgb_color.blue
-            
-            if is_background:
-                return f"\033[48;2;{r};{g};{b}m", f"background-color: rgb({r}, {g}, {b});"
-            else:
-                return f"\033[38;2;{r};{g};{b}m", f"color: rgb({r}, {g}, {b});"
-        except ValueError:
+        rgb = _rgb(color)
+        if rgb is None:
             return "", ""
+        r, g, b = rgb
+        if is_background:
+            return f"\033[48;2;{r};{g};{b}m", f"background-color: rgb({r}, {g}, {b});"
+        else:
+            return f"\033[38;2;{r};{g};{b}m", f"color: rgb({r}, {g}, {b});"
 
-    def _get_styled_text(self, text):
+    def _get_ansi_start(self):
         start = ""
-        end = "\033[0m"  # Reset ANSI code
         if self.bold:
             start += "\033[1m"
         if self.italic:
@@ -55,9 +210,9 @@ class PrintStyle:
         background_color_code, _ = self._get_rgb_color_code(self.background_color, True)
         start += font_color_code
         start += background_color_code
-        return start + text + end
+        return start
 
-    def _get_html_styled_text(self, text):
+    def _get_html_style(self):
         styles = []
         if self.bold:
             styles.append("font-weight: bold;")
@@ -69,9 +224,15 @@ class PrintStyle:
         _, background_color_code = self._get_rgb_color_code(self.background_color, True)
         styles.append(font_color_code)
         styles.append(background_color_code)
-        style_attr = " ".join(styles)
+        return " ".join(styles)
+
+    def _get_styled_text(self, text):
+        end = "\033[0m"  # Reset ANSI code
+        return self._ansi_start + text + end
+
+    def _get_html_styled_text(self, text):
         escaped_text = html.escape(text).replace("\n", "<br>")  # Escape HTML special characters
-        return f'<span style="{style_attr}">{escaped_text}</span>'
+        return f'<span style="{self._html_style}">{escaped_text}</span>'
 
     def _add_padding_if_needed(self):
         if self.padding and not self.padding_added:
@@ -81,14 +242,8 @@ class PrintStyle:
             self.padding_added = True
 
     def _log_html(self, html):
-        with open(PrintStyle.log_file_path, "a", encoding='utf-8') as f: # type: ignore # add encoding='utf-8'
-            f.write(html)
-
-    @staticmethod
-    def _close_html_log():
-        if PrintStyle.log_file_path:
-            with open(PrintStyle.log_file_path, "a") as f:
-                f.write("</pre></body></html>")            
+        if log_writer.enabled():
+            log_writer.write(html)
 
     def get(self, *args, sep=' ', **kwargs):
         text = sep.join(map(str, args))
@@ -128,7 +283,3 @@ class PrintStyle:
     @staticmethod
     def error(text:str):
         PrintStyle(font_color="red", padding=True).print("Error: "+text)
-
-# Ensure HTML file is closed properly when the program exits
-import atexit
-atexit.register(PrintStyle._close_html_log)
@@ -1,4 +1,8 @@
-from typing import List
+import mmap
+import re
+from typing import Iterator
+
+import numpy as np
 
 from langchain_core.documents import Document
 from python.helpers import files
@@ -12,49 +16,91 @@ from langchain_community.document_loaders import (
     UnstructuredMarkdownLoader,
 )
 
+BINARY_MARKER = "[BINARY]"
+BINARY_RATIO = 0.3  # share of control characters that makes a chunk binary
+BOUNDARY_LOOKAHEAD = 100  # bytes searched for a space or newline to end a chunk on
+WINDOW_SIZE = 1024 * 1024  # bytes classified at once
+
+_text_controls = np.array([ord("\t"), ord("\n"), ord("\r")], dtype=np.uint8)
+_boundary_re = re.compile(rb"[ \n\r]")  # one C-level scan instead of a find per separator
+
 # def extract_file(path: str) -> List[Document]:
 #     pass  # TODO finish implementing
 
-def extract_text(content: bytes, chunk_size: int = 128) -> List[str]:
-    result = []
 
-    def is_binary_chunk(chunk: bytes) -> bool:
-        # Check for high concentration of control chars
-        try:
-            text = chunk.decode("utf-8", errors="ignore")
-            control_chars = sum(1 for c in text if ord(c) < 32 and c not in "\n\r\t")
-            return control_chars / len(text) > 0.3
-        except UnicodeDecodeError:
-            return True
+def extract_file_text(path: str, chunk_size: int = 128) -> Iterator[str]:
+    # file is memory-mapped, only the pages being classified are read
+    with open(path, "rb") as f:
+        if not f.seek(0, 2):
+            return  # empty files cannot be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            yield from extract_text(content, chunk_size)
 
-    # Process the content in overlapping chunks to handle boundaries
+
+def extract_text(
+    content: bytes | bytearray | memoryview | mmap.mmap, chunk_size: int = 128
+) -> Iterator[str]:
+    # yields text chunks ending on a word boundary, runs of binary chunks become one marker
+    data = np.frombuffer(content, dtype=np.uint8)
+    length = len(data)
+    margin = chunk_size + BOUNDARY_LOOKAHEAD
+    last_binary = False
     pos = 0
-    while pos < len(content):
-        # Get current chunk with overlap
-        chunk_end = min(pos + chunk_size, len(content))
-
-        # Add overlap to catch word boundaries, unless at end of content
-        if chunk_end < len(content):
-            # Look ahead for next newline or space to avoid splitting words
-            for i in range(chunk_end, min(chunk_end + 100, len(content))):
-                if content[i : i + 1] in [b" ", b"\n", b"\r"]:
-                    chunk_end = i + 1
-                    break
-
-        chunk = content[pos:chunk_end]
-
-        if is_binary_chunk(chunk):
-            if not result or result[-1] != "[BINARY]":
-                result.append("[BINARY]")
-        else:
-            try:
-                text = chunk.decode("utf-8", errors="ignore").strip()
-                if text:  # Only add non-empty text chunks
-                    result.append(text)
-            except UnicodeDecodeError:
-                if not result or result[-1] != "[BINARY]":
-                    result.append("[BINARY]")
-
-        pos = chunk_end
-
-    return result
+
+    while pos < length:
+        # chunk boundaries of one window first, then all chunks are classified at once
+        window_start = pos
+        window_end = min(length, pos + WINDOW_SIZE + margin)
+        starts, ends = [], []
+        while pos < length and pos < window_start + WINDOW_SIZE:
+            chunk_end = min(pos + chunk_size, length)
+            if chunk_end < length:
+                # end the chunk after the nearest space or line break, if one is close
+                boundary = _boundary_re.search(
+                    content, chunk_end, min(chunk_end + BOUNDARY_LOOKAHEAD, length)
+                )
+                if boundary:
+                    chunk_end = boundary.end()
+            starts.append(pos - window_start)
+            ends.append(chunk_end - window_start)
+            pos = chunk_end
+
+        window = data[window_start:window_end]
+        control = (window < 32) & ~np.isin(window, _text_controls)
+        lengths = _sequence_lengths(window)
+        control_sum = np.concatenate(([0], np.cumsum(control, dtype=np.int64)))
+        chars_sum = np.concatenate(([0], np.cumsum(lengths > 0, dtype=np.int64)))
+        starts_np, ends_np = np.array(starts), np.array(ends)
+        n_control = control_sum[ends_np] - control_sum[starts_np]
+        n_chars = chars_sum[ends_np] - chars_sum[starts_np]
+        # a character cut off by the chunk end is not decoded, it can only start in the last 3 bytes
+        for back in range(1, 4):
+            last = ends_np - back
+            n_chars -= (last >= starts_np) & (lengths[np.maximum(last, 0)] > back)
+
+        for start, end, chunk_control, chunk_chars in zip(starts, ends, n_control.tolist(), n_chars.tolist()):
+            chunk = content[window_start + start : window_start + end]
+            if not chunk_chars or chunk_control / chunk_chars > BINARY_RATIO:
+                if not last_binary:
+                    yield BINARY_MARKER
+                last_binary = True
+            else:
+                text = bytes(chunk).decode("utf-8", errors="ignore").strip()
+                if text:
+                    yield text
+                    last_binary = False
+
+
+def _sequence_lengths(window: np.ndarray) -> np.ndarray:
+    # bytes of the valid utf-8 sequence starting at each position, 0 where none starts;
+    # the decoder drops everything else, so these are exactly the decoded characters
+    following = np.concatenate((window, np.zeros(3, dtype=np.uint8)))
+    b1, b2, b3 = (following[i : i + len(window)] for i in range(1, 4))
+    c1, c2, c3 = ((b >= 0x80) & (b <= 0xBF) for b in (b1, b2, b3))
+    two = (window >= 0xC2) & (window <= 0xDF) & c1
+    three = (window >= 0xE0) & (window <= 0xEF) & c1 & c2
+    three &= ~((window == 0xE0) & (b1 < 0xA0)) & ~((window == 0xED) & (b1 > 0x9F))  # overlong, surrogates
+    four = (window >= 0xF0) & (window <= 0xF4) & c1 & c2 & c3
+    four &= ~((window == 0xF0) & (b1 < 0x90)) & ~((window == 0xF4) & (b1 > 0x8F))  # overlong, above U+10FFFF
+    return (window < 0x80) + two * 2 + three * 3 + four * 4
+
@@ -1,17 +1,25 @@
+import asyncio
+import gzip
 import importlib
 import inspect
 import json
+import threading
+import time
 from typing import Any, TypedDict
 import aiohttp
 from python.helpers import crypto
 
 from python.helpers import dotenv
+from python.helpers.defer import EventLoopThread
 
 
 # Remote Function Call library
 # Call function via http request
 # Secured by pre-shared key
 
+COMPRESS_MIN_SIZE = 64 * 1024  # larger bodies (file contents) are sent gzipped
+POOL_SIZE = 16  # concurrent keep-alive connections to the other side
+
 
 class RFCInput(TypedDict):
     module: str
@@ -34,10 +42,15 @@ async def call_rfc(
         args=args,
         kwargs=kwargs,
     )
-    call = RFCCall(
-        rfc_input=json.dumps(input), hash=crypto.hash_data(json.dumps(input), password)
-    )
-    result = await _send_json_data(url, call)
+    rfc_input = json.dumps(input)
+    call = RFCCall(rfc_input=rfc_input, hash=crypto.hash_data(rfc_input, password))
+    start = time.perf_counter()
+    try:
+        result = await client.send(url, call)
+    except Exception:
+        metrics.add(module, function_name, time.perf_counter() - start, error=True)
+        raise
+    metrics.add(module, function_name, time.perf_counter() - start)
     return result
 
 
@@ -67,15 +80,83 @@ def _get_function(module: str, function_name: str):
     return func
 
 
-async def _send_json_data(url: str, data):
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            url,
-            json=data,
-        ) as response:
+def encode_body(data: Any) -> tuple[bytes, dict[str, str]]:
+    # used both ways, the receiving side reads Content-Encoding
+    body = json.dumps(data).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if len(body) >= COMPRESS_MIN_SIZE:
+        body = gzip.compress(body, compresslevel=1)  # fast level, the link is local
+        # not json for ApiHandler, it must not parse the compressed body
+        headers = {"Content-Type": "application/octet-stream", "Content-Encoding": "gzip"}
+    return body, headers
+
+
+def decode_body(body: bytes, content_encoding: str | None) -> Any:
+    if content_encoding == "gzip":
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+class RFCClient:
+    """One keep-alive connection pool per process, owned by its own event loop thread."""
+
+    def __init__(self):
+        self.thread = EventLoopThread("RFCClient")
+        self._session: aiohttp.ClientSession | None = None
+
+    async def send(self, url: str, data: Any) -> Any:
+        # callers run on many short-lived loops, the session lives on the client thread
+        future = self.thread.run_coroutine(self._send(url, data))
+        return await asyncio.wrap_future(future)
+
+    async def _send(self, url: str, data: Any) -> Any:
+        body, headers = encode_body(data)
+        async with self._get_session().post(url, data=body, headers=headers) as response:
             if response.status == 200:
-                result = await response.json()
-                return result
+                # gzip responses are decoded by aiohttp
+                return json.loads(await response.read())
             else:
                 error = await response.text()
                 raise Exception(error)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=POOL_SIZE, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=10),
+            )
+        return self._session
+
+
+class RFCMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.functions: dict[str, dict[str, float]] = {}
+
+    def add(self, module: str, function_name: str, seconds: float, error: bool = False):
+        with self._lock:
+            item = self.functions.setdefault(
+                f"{module}.{function_name}",
+                {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0},
+            )
+            item["calls"] += 1
+            item["errors"] += 1 if error else 0
+            item["total_ms"] += seconds * 1000
+            item["max_ms"] = max(item["max_ms"], seconds * 1000)
+
+    def output(self):
+        with self._lock:
+            return {
+                name: {
+                    "calls": item["calls"],
+                    "errors": item["errors"],
+                    "avg_ms": round(item["total_ms"] / item["calls"], 2),
+                    "max_ms": round(item["max_ms"], 2),
+                }
+                for name, item in self.functions.items()
+            }
+
+
+# process wide, shared by all callers
+client = RFCClient()
+metrics = RFCMetrics()
@@ -1,14 +1,26 @@
+import threading
 from python.helpers import runtime, crypto, dotenv
 
+# one keypair per process, generating a 2048 bit RSA key takes tens of milliseconds
+_keypair = None
+_keypair_lock = threading.Lock()
+
 async def get_root_password():
     if runtime.is_dockerized():
         pswd = _get_root_password()
     else:
-        priv = crypto._generate_private_key()
-        pub = crypto._generate_public_key(priv)
+        priv, pub = _get_keypair()
         enc = await runtime.call_development_function(_provide_root_password, pub)
         pswd = crypto.decrypt_data(enc, priv)
     return pswd
+
+def _get_keypair():
+    global _keypair
+    with _keypair_lock:
+        if _keypair is None:
+            priv = crypto._generate_private_key()
+            _keypair = (priv, crypto._generate_public_key(priv))
+        return _keypair
     
 def _provide_root_password(public_key_pem: str):
     pswd = _get_root_password()
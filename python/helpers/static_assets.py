@@ -0,0 +1,160 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+import threading
+from dataclasses import dataclass, field
+
+from flask import Request, Response, send_file
+
+from python.helpers import files
+
+try:
+    import brotli  # optional, gzip only without it
+except ImportError:
+    brotli = None
+
+# Static files of the web UI with content hashed ETags and precompressed variants.
+# Variants are stored content addressed in tmp/static, "python -m python.helpers.static_assets"
+# builds them ahead (docker build), otherwise they are built on first request.
+
+ASSETS_DIR = "webui"
+CACHE_DIR = "tmp/static"
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_EXTENSIONS = {".js", ".css", ".html", ".svg", ".json", ".map", ".txt", ".md", ".mjs"}
+IMMUTABLE = "public, max-age=31536000, immutable"  # urls with ?v=<hash> never change
+REVALIDATE = "no-cache"  # plain urls, the browser asks with If-None-Match and gets a 304
+
+
+@dataclass
+class Asset:
+    path: str
+    hash: str
+    mtime: float
+    size: int
+    mimetype: str
+    variants: dict[str, str] = field(default_factory=dict)  # encoding -> path
+
+
+class AssetCache:
+    def __init__(self, root: str, cache_dir: str):
+        self.root = root
+        self.cache_dir = cache_dir
+        self.assets: dict[str, Asset] = {}
+        self.lock = threading.Lock()
+
+    def get(self, rel_path: str) -> Asset | None:
+        path = os.path.realpath(os.path.join(self.root, rel_path))
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        asset = self.assets.get(path)
+        if asset and asset.mtime == stat.st_mtime and asset.size == stat.st_size:
+            return asset
+        with self.lock:
+            asset = self._load(path, stat)
+            self.assets[path] = asset
+        return asset
+
+    def build(self) -> int:
+        count = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if self.get(os.path.relpath(os.path.join(dirpath, filename), self.root)):
+                    count += 1
+        return count
+
+    def _load(self, path: str, stat: os.stat_result) -> Asset:
+        with open(path, "rb") as f:
+            content = f.read()
+        asset = Asset(
+            path=path,
+            hash=hashlib.sha1(content).hexdigest()[:16],
+            mtime=stat.st_mtime,
+            size=stat.st_size,
+            mimetype=mimetypes.guess_type(path)[0] or "application/octet-stream",
+        )
+        if len(content) >= COMPRESS_MIN_SIZE and os.path.splitext(path)[1] in COMPRESS_EXTENSIONS:
+            asset.variants["gzip"] = self._variant(asset.hash, "gz", content, gzip.compress)
+            if brotli:
+                asset.variants["br"] = self._variant(asset.hash, "br", content, brotli.compress)
+        return asset
+
+    def _variant(self, hash: str, extension: str, content: bytes, compress) -> str:
+        # content addressed, an unchanged file is never compressed twice
+        path = os.path.join(self.cache_dir, f"{hash}.{extension}")
+        if not os.path.exists(path):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(compress(content))
+            os.replace(tmp_path, path)
+        return path
+
+
+assets = AssetCache(files.get_abs_path(ASSETS_DIR), files.get_abs_path(CACHE_DIR))
+
+
+def serve(request: Request, rel_path: str) -> Response:
+    asset = assets.get(rel_path)
+    if asset is None:
+        return Response("Not found", status=404, mimetype="text/plain")
+
+    encoding = choose_encoding(request, asset)
+    etag = asset.hash + (f"-{encoding}" if encoding else "")
+    headers = {
+        "ETag": f'"{etag}"',
+        "Cache-Control": IMMUTABLE if request.args.get("v") == asset.hash else REVALIDATE,
+        "Vary": "Accept-Encoding",
+    }
+    if etag in request.if_none_match:
+        return Response(status=304, headers=headers)
+
+    response = send_file(
+        asset.variants[encoding] if encoding else asset.path,
+        mimetype=asset.mimetype,
+        etag=False,
+        conditional=False,
+        max_age=None,
+    )
+    response.headers.update(headers)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def choose_encoding(request: Request, asset: Asset) -> str:
+    accepted = request.headers.get("Accept-Encoding", "")
+    for encoding in ("br", "gzip"):
+        if encoding in asset.variants and encoding in accepted:
+            return encoding
+    return ""
+
+
+_local_url = re.compile(r'(\s(?:src|href)=")(?!https?:|//|#|data:)\.?/?([^"?#]+)(")')
+
+
+def add_versions(html: str) -> str:
+    # local src/href urls get ?v=<hash>, the browser caches them until the file changes
+    def replace(match: re.Match) -> str:
+        asset = assets.get(match.group(2))
+        if asset is None:
+            return match.group(0)
+        return f"{match.group(1)}{match.group(2)}?v={asset.hash}{match.group(3)}"
+
+    return _local_url.sub(replace, html)
+
+
+def versions_key(html: str) -> tuple:
+    # hashes of all local files referenced by html, changes when any of them changes
+    return tuple(
+        asset.hash if (asset := assets.get(match.group(2))) else ""
+        for match in _local_url.finditer(html)
+    )
+
+
+if __name__ == "__main__":
+    count = assets.build()
+    print(f"{count} assets hashed, variants in {assets.cache_dir}", file=sys.stderr)
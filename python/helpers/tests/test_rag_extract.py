@@ -0,0 +1,44 @@
+import random
+import unittest
+
+from python.helpers.rag import extract_text
+from python.helpers.tests.rag_legacy import extract_text_legacy
+
+
+def legacy_or_none(content: bytes) -> list[str] | None:
+    try:
+        return extract_text_legacy(content)
+    except ZeroDivisionError:
+        return None  # chunk without a single decodable character, the legacy code crashed
+
+
+class TestExtractText(unittest.TestCase):
+    def assert_same(self, content: bytes):
+        expected = legacy_or_none(content)
+        if expected is not None:
+            self.assertEqual(list(extract_text(content)), expected, content)
+
+    def test_partial_utf8_near_threshold(self):
+        self.assertEqual(list(extract_text(bytes([1] * 10 + [0xE0] * 118))), ["[BINARY]"])
+
+    def test_random_inputs_match_legacy(self):
+        rng = random.Random(38)
+        alphabets = [
+            bytes(range(256)),
+            b"abc \n\t\x00\x01\x02\x1b",
+            b"\x01\x02\x03 ab" + bytes(range(0x80, 0x100)),
+            "žluťoučký kůň ódy 日本語 \x01\x02\x03".encode("utf-8"),
+        ]
+        for _ in range(3000):
+            alphabet = rng.choice(alphabets)
+            size = rng.randrange(1, 1200)
+            self.assert_same(bytes(rng.choice(alphabet) for _ in range(size)))
+
+    def test_mixed_text_and_binary(self):
+        text = "lorem ipsum příliš žluťoučký kůň\n".encode("utf-8") * 2000
+        binary = random.Random(1).randbytes(len(text))
+        self.assert_same(text + binary + text)
+
+
+if __name__ == "__main__":
+    unittest.main()
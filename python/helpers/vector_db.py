@@ -9,6 +9,7 @@ from langchain_community.vectorstores.utils import (
     DistanceStrategy,
 )
 from langchain.embeddings import CacheBackedEmbeddings
+from python.helpers.embedding_cache import QueryCachedEmbeddings, get_namespace
 
 from agent import Agent
 
@@ -29,17 +30,17 @@ class VectorDB:
         self.store = InMemoryByteStore()
         self.model = agent.get_embedding_model()
 
-        self.embedder = CacheBackedEmbeddings.from_bytes_store(
-            self.model,
-            self.store,
-            namespace=getattr(
+        namespace = get_namespace(self.model)
+        self.embedder = QueryCachedEmbeddings(
+            CacheBackedEmbeddings.from_bytes_store(
                 self.model,
-                "model",
-                getattr(self.model, "model_name", "default"),
+                self.store,
+                namespace=namespace,
             ),
+            namespace=namespace,
         )
 
-        self.index = faiss.IndexFlatIP(len(self.embedder.embed_query("example")))
+        self.index = faiss.IndexFlatIP(self.embedder.get_dimension())
 
         self.db = MyFaiss(
             embedding_function=self.embedder,
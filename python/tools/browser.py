@@ -4,6 +4,7 @@ import time
 from python.helpers.tool import Tool, Response
 from python.helpers import files, rfc_exchange
 from python.helpers.print_style import PrintStyle
+from python.helpers.image_cache import images
 from python.helpers.browser import Browser as BrowserManager
 import uuid
 
@@ -33,6 +34,7 @@ class Browser(Tool):
         await self.prepare_state()
         path = files.get_abs_path("tmp/browser", f"{uuid.uuid4()}.png")
         await self.state.browser.screenshot(path, True)
+        images.evict_later()  # old screenshots are removed by age and total size
         return "img://" + path
 
     async def prepare_state(self, reset=False):
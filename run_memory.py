@@ -0,0 +1,41 @@
+import asyncio
+from python.helpers import dotenv, memory_client, runtime
+from python.helpers.memory_server import get_default_address, serve
+from python.helpers.print_style import PrintStyle
+
+
+# Shared memory server for several web workers or replicas on one host.
+# Start it with: python run_memory.py [--address=unix:/path/memory.sock | --address=127.0.0.1:50101]
+# and set MEMORY_SERVER to the same address in .env of the web workers.
+# TCP is plaintext, password and memories included, use it on loopback or a trusted network only.
+
+
+def run():
+    address = (
+        runtime.get_arg("address")
+        or dotenv.get_dotenv_value("MEMORY_SERVER")
+        or get_default_address()
+    )
+    password = memory_client.get_server_password()
+    if not address.startswith("unix:"):
+        host = address.rpartition(":")[0].strip("[]") or "127.0.0.1"
+        if host not in ["127.0.0.1", "localhost", "::1"]:
+            PrintStyle.hint(
+                "Memory server TCP traffic is not encrypted, expose it on a trusted network only."
+            )
+        if not password:
+            PrintStyle.hint(
+                "Memory server is listening on TCP without MEMORY_SERVER_PASSWORD, bind it to localhost only."
+            )
+    subdirs = [
+        subdir.strip()
+        for subdir in dotenv.get_dotenv_value("MEMORY_WARMUP_SUBDIRS", "").split(",")
+        if subdir.strip()
+    ]
+    asyncio.run(serve(address, password, subdirs))
+
+
+if __name__ == "__main__":
+    runtime.initialize()
+    dotenv.load_dotenv()
+    run()
@@ -1,23 +1,28 @@
 from functools import wraps
+import hashlib
 import os
 import threading
 from flask import Flask, request, Response
 from flask_basicauth import BasicAuth
 from python.helpers import errors, files, git
 from python.helpers.files import get_abs_path
-from python.helpers import persist_chat, runtime, dotenv, process
+from python.helpers import persist_chat, runtime, dotenv, process, static_assets
 from python.helpers.cloudflare_tunnel import CloudflareTunnel
 from python.helpers.extract_tools import load_classes_from_folder
 from python.helpers.api import ApiHandler
+from python.helpers.defer import DeferredTask
 from python.helpers.print_style import PrintStyle
 from python.collaboration import init_collaboration
 
 
-# initialize the internal Flask server
-app = Flask("app", static_folder=get_abs_path("./webui"), static_url_path="/")
+# initialize the internal Flask server, webui files are served by static_assets
+app = Flask("app", static_folder=None)
 app.config["JSON_SORT_KEYS"] = False  # Disable key sorting in jsonify
 
 lock = threading.Lock()
+warmup_task: DeferredTask | None = None
+maintenance_task: DeferredTask | None = None
+index_cache: dict = {}
 
 # Set up basic authentication
 basic_auth = BasicAuth(app)
@@ -43,23 +48,97 @@ def requires_auth(f):
     return decorated
 
 
+def load_git_info() -> dict:
+    gitinfo, _ = git.get_git_info_cached()
+    return gitinfo or {
+        "version": "unknown",
+        "commit_time": "unknown",
+    }
+
+
+def render_index() -> tuple[str, str]:
+    # re-rendered only when index.html or one of the files it links changes
+    mtime = os.path.getmtime(get_abs_path("./webui/index.html"))
+    cached = index_cache.get("template")
+    if not cached or cached[0] != mtime:
+        info = load_git_info()
+        template = files.read_file(
+            "./webui/index.html",
+            version_no=info["version"],
+            version_time=info["commit_time"],
+        )
+        cached = index_cache["template"] = (mtime, template)
+    key = (mtime, static_assets.versions_key(cached[1]))
+    rendered = index_cache.get("html")
+    if not rendered or rendered[0] != key:
+        html = static_assets.add_versions(cached[1])
+        etag = hashlib.sha1(html.encode("utf-8")).hexdigest()[:16]
+        rendered = index_cache["html"] = (key, html, etag)
+    return rendered[1], rendered[2]
+
+
 # handle default address, load index
 @app.route("/", methods=["GET"])
 @requires_auth
 async def serve_index():
-    gitinfo = None
-    try:
-        gitinfo = git.get_git_info()
-    except Exception as e:
-        gitinfo = {
-            "version": "unknown",
-            "commit_time": "unknown",
-        }
-    return files.read_file(
-        "./webui/index.html",
-        version_no=gitinfo["version"],
-        version_time=gitinfo["commit_time"],
+    html, etag = render_index()
+    if etag in request.if_none_match:
+        return Response(status=304, headers={"ETag": f'"{etag}"'})
+    return Response(
+        html,
+        mimetype="text/html",
+        headers={"ETag": f'"{etag}"', "Cache-Control": "no-cache"},
+    )
+
+
+# webui files, content hashed etags and precompressed variants
+@app.route("/<path:filename>", methods=["GET"])
+def serve_static(filename):
+    return static_assets.serve(request, filename)
+
+
+def warmup_memory():
+    from python.helpers.memory import Memory
+
+    subdirs = [
+        subdir.strip()
+        for subdir in dotenv.get_dotenv_value("MEMORY_WARMUP_SUBDIRS", "").split(",")
+        if subdir.strip()
+    ]
+    global warmup_task
+    warmup_task = DeferredTask(thread_name="MemoryWarmup")
+    warmup_task.start_task(Memory.warmup, subdirs)
+
+    # retention and compaction, only runs if MEMORY_MAINTENANCE_HOURS is set
+    global maintenance_task
+    maintenance_task = DeferredTask(thread_name="MemoryMaintenance")
+    maintenance_task.start_task(Memory.maintenance_loop)
+
+
+def register_api_handler(app: Flask, handler: type[ApiHandler], api_routes: dict):
+    name = handler.__module__.split(".")[-1]
+    instance = handler(app, lock)
+
+    @requires_auth
+    async def handle_request():
+        return await instance.handle_request(request=request)
+
+    app.add_url_rule(
+        f"/{name}",
+        f"/{name}",
+        handle_request,
+        methods=["POST", "GET"],
     )
+    # for the ASGI mode: path -> (handler, runs on the event loop)
+    api_routes[f"/{name}"] = (handle_request, handler.on_event_loop)
+
+
+def register_api_handlers(app: Flask) -> dict:
+    api_routes = {}
+    handlers = load_classes_from_folder("python/api", "*.py", ApiHandler)
+    for handler in handlers:
+        register_api_handler(app, handler, api_routes)
+    return api_routes
 
 
 def run():
@@ -82,6 +161,11 @@ def run():
     host = (
         runtime.get_arg("host") or dotenv.get_dotenv_value("WEB_UI_HOST") or "localhost"
     )
+    # ASGI mode: API handlers share one long-lived event loop instead of a loop per request
+    use_asgi = (
+        runtime.get_arg("asgi")
+        or dotenv.get_dotenv_value("WEB_UI_ASGI", "false").lower()
+    ) == "true"
     use_cloudflare = (
         runtime.get_arg("cloudflare_tunnel")
         or dotenv.get_dotenv_value("USE_CLOUDFLARE", "false").lower()
@@ -102,42 +186,36 @@ def run():
         # initialize contexts from persisted chats
         persist_chat.load_tmp_chats()
 
+        # version shown in the ui, computed once
+        load_git_info()
+
+        # warm up memory indexes in background, /health reports readiness
+        warmup_memory()
+
     except Exception as e:
         PrintStyle().error(errors.format_error(e))
 
     server = None
 
-    def register_api_handler(app, handler: type[ApiHandler]):
-        name = handler.__module__.split(".")[-1]
-        instance = handler(app, lock)
-
-        @requires_auth
-        async def handle_request():
-            return await instance.handle_request(request=request)
-
-        app.add_url_rule(
-            f"/{name}",
-            f"/{name}",
-            handle_request,
-            methods=["POST", "GET"],
-        )
-
     # initialize and register API handlers
-    handlers = load_classes_from_folder("python/api", "*.py", ApiHandler)
-    for handler in handlers:
-        register_api_handler(app, handler)
+    api_routes = register_api_handlers(app)
 
     # Initialize collaboration (SocketIO)
     socketio = init_collaboration(app)
 
     try:
-        server = make_server(
-            host=host,
-            port=port,
-            app=app,
-            request_handler=NoRequestLoggingWSGIRequestHandler,
-            threaded=True,
-        )
+        if use_asgi:
+            from python.helpers.asgi import AsgiApp, AsgiServer
+
+            server = AsgiServer(AsgiApp(app, api_routes), host, port)
+        else:
+            server = make_server(
+                host=host,
+                port=port,
+                app=app,
+                request_handler=NoRequestLoggingWSGIRequestHandler,
+                threaded=True,
+            )
         process.set_server(server)
         server.log_startup()
         server.serve_forever()
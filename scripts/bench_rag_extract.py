@@ -0,0 +1,52 @@
+# Benchmark of python.helpers.rag.extract_text on mixed binary and text files.
+# Usage: python scripts/bench_rag_extract.py [size_mb]
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from python.helpers.rag import extract_file_text, extract_text
+from python.helpers.tests.rag_legacy import extract_text_legacy
+
+
+def make_samples(size: int) -> dict[str, bytes]:
+    words = "lorem ipsum dolor sit amet příliš žluťoučký kůň úpěl ďábelské ódy 42\n".encode("utf-8")
+    text = (words * (size // len(words) + 1))[:size]
+    binary = os.urandom(size)
+    # text with embedded binary blobs, like a pdf or a log with attachments
+    mixed = b"".join(
+        text[i : i + 64 * 1024] if (i // (64 * 1024)) % 2 == 0 else binary[i : i + 64 * 1024]
+        for i in range(0, size, 64 * 1024)
+    )
+    return {"text": text, "binary": binary, "mixed": mixed}
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    size = int(float(sys.argv[1]) * 1024 * 1024) if len(sys.argv) > 1 else 4 * 1024 * 1024
+    print(f"{'sample':<8} {'legacy s':>10} {'bytes s':>10} {'mmap s':>10} {'chunks':>8} {'same':>5}")
+    for name, content in make_samples(size).items():
+        legacy, legacy_time = timed(extract_text_legacy, content)
+        current, current_time = timed(lambda c: list(extract_text(c)), content)
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(content)
+        try:
+            mapped, mmap_time = timed(lambda p: list(extract_file_text(p)), f.name)
+        finally:
+            os.remove(f.name)
+        same = legacy == current == mapped
+        print(
+            f"{name:<8} {legacy_time:>10.3f} {current_time:>10.3f} {mmap_time:>10.3f} {len(current):>8} {str(same):>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Throughput of the web UI server modes: threaded werkzeug vs ASGI (uvicorn).
+# Serves the real app and API route table of run_ui, each request is a /poll long poll
+# that waits like the web UI does while the agent works.
+# Usage: python scripts/bench_ui_server.py [clients] [requests_per_client] [wait_ms]
+# Needs flask[async] and uvicorn installed.
+
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from python.helpers import dotenv, runtime
+from python.helpers.asgi import AsgiApp, AsgiServer
+
+WAIT_MS = 50
+
+
+def create_app():
+    # the same app and routes serve both modes, handlers are registered once
+    import run_ui
+
+    return run_ui.app, run_ui.register_api_handlers(run_ui.app)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, code="-", size="-"):
+        pass
+
+
+def start_threaded(port: int, app, api_routes):
+    server = make_server("127.0.0.1", port, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_asgi(port: int, app, api_routes):
+    server = AsgiServer(AsgiApp(app, api_routes), "127.0.0.1", port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def wait_ready(port: int):
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health").read()
+            return
+        except Exception:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def run_clients(port: int, clients: int, requests: int) -> tuple[float, int]:
+    peak_threads = threading.active_count()
+
+    def poll(body: dict) -> dict:
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{port}/poll",
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        return json.loads(urllib.request.urlopen(request).read())
+
+    def client():
+        nonlocal peak_threads
+        # the first poll answers right away, the next ones wait for a change that never comes
+        state = poll({"context": "bench"})
+        for _ in range(requests):
+            state = poll(
+                {
+                    "context": "bench",
+                    "log_from": state["log_version"],
+                    "changes": state["changes"],
+                    "wait": WAIT_MS / 1000,
+                }
+            )
+            peak_threads = max(peak_threads, threading.active_count())
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        for future in [pool.submit(client) for _ in range(clients)]:
+            future.result()
+    return time.perf_counter() - start, peak_threads
+
+
+def main():
+    global WAIT_MS
+    runtime.initialize()
+    dotenv.load_dotenv()
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    WAIT_MS = int(sys.argv[3]) if len(sys.argv) > 3 else WAIT_MS
+    total = clients * requests
+
+    print(f"{clients} clients x {requests} requests, long poll {WAIT_MS} ms")
+    app, api_routes = create_app()
+    for name, start, port in [("threaded", start_threaded, 50991), ("asgi", start_asgi, 50992)]:
+        server = start(port, app, api_routes)
+        wait_ready(port)
+        elapsed, peak_threads = run_clients(port, clients, requests)
+        server.shutdown()
+        print(
+            f"{name:>9}: {total / elapsed:8.1f} req/s  {elapsed:6.2f} s  peak threads {peak_threads}"
+        )
+
+
+if __name__ == "__main__":
+    main()
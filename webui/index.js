@@ -280,7 +280,7 @@ window.loadKnowledge = async function () {
             toast(await response.text(), "error");
         } else {
             const data = await response.json();
-            toast("Knowledge files imported: " + data.filenames.join(", "), "success");
+            toast("Knowledge files importing: " + data.filenames.join(", "), "success");
         }
         } catch (e) {
             toastFetchError("Error loading knowledge", e)
@@ -296,13 +296,14 @@ function adjustTextareaHeight() {
     chatInput.style.height = (chatInput.scrollHeight) + 'px';
 }
 
-export const sendJsonData = async function (url, data) {
+export const sendJsonData = async function (url, data, signal = undefined) {
     const response = await fetch(url, {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json'
         },
-        body: JSON.stringify(data)
+        body: JSON.stringify(data),
+        signal
     });
 
     if (!response.ok) {
@@ -335,50 +336,74 @@ function setConnectionStatus(connected) {
 let lastLogVersion = 0;
 let lastLogGuid = ""
 let lastSpokenNo = 0
+let lastChanges = 0 // server change counter of the last poll
+let pollAbort = null
+const pollWait = 25 // seconds the server may hold a poll until something changes
 
 async function poll() {
-    let updated = false
     try {
-        const response = await sendJsonData("/poll", { log_from: lastLogVersion, context });
+        pollAbort = new AbortController()
+        const response = await sendJsonData("/poll", { log_from: lastLogVersion, context, changes: lastChanges, wait: pollWait }, pollAbort.signal);
         //console.log(response)
+        if (response.unchanged) {
+            if (response.context == context) lastChanges = response.changes
+            setConnectionStatus(true)
+            return false
+        }
+        const updated = applyUpdate(response)
+        if (response.context == context) lastChanges = response.changes
+        return updated
+    } catch (error) {
+        if (error.name == 'AbortError') return false // chat switched during a long poll
+        console.error('Error:', error);
+        setConnectionStatus(false)
+        throw error
+    }
+}
 
-        if (!context) setContext(response.context)
-        if (response.context != context) return //skip late polls after context change
+// same payload from /poll and /poll_stream
+function applyUpdate(response) {
+    let updated = false
+    if (!context) setContext(response.context)
+    if (response.context != context) return false //skip late polls after context change
 
-        if (lastLogGuid != response.log_guid) {
-            chatHistory.innerHTML = ""
-            lastLogVersion = 0
-        }
+    if (lastLogGuid != response.log_guid) {
+        chatHistory.innerHTML = ""
+        lastLogVersion = 0
+    }
 
-        if (lastLogVersion != response.log_version) {
-            updated = true
-            for (const log of response.logs) {
-                const messageId = log.id || log.no; // Use log.id if available
-                setMessage(messageId, log.type, log.heading, log.content, log.temp, log.kvps);
-            }
-            afterMessagesUpdate(response.logs)
+    if (lastLogVersion != response.log_version) {
+        updated = true
+        for (const log of response.logs) {
+            const messageId = log.id || log.no; // Use log.id if available
+            setMessage(messageId, log.type, log.heading, log.content, log.temp, log.kvps);
         }
+        afterMessagesUpdate(response.logs)
+    }
 
-        updateProgress(response.log_progress, response.log_progress_active)
+    updateProgress(response.log_progress, response.log_progress_active)
 
-        //set ui model vars from backend
-        const inputAD = Alpine.$data(inputSection);
-        inputAD.paused = response.paused;
+    //set ui model vars from backend
+    const inputAD = Alpine.$data(inputSection);
+    inputAD.paused = response.paused;
 
-        // Update status icon state
-        setConnectionStatus(true)
+    // Update status icon state
+    setConnectionStatus(true)
 
+    // the stream only sends the chat list when it changed, long polls only the changed chats
+    if (response.contexts) {
         const chatsAD = Alpine.$data(chatsSection);
-        chatsAD.contexts = response.contexts;
-
-        lastLogVersion = response.log_version;
-        lastLogGuid = response.log_guid;
-
-    } catch (error) {
-        console.error('Error:', error);
-        setConnectionStatus(false)
+        if (response.contexts_partial) {
+            const changed = Object.fromEntries(response.contexts.map(ctx => [ctx.id, ctx]))
+            chatsAD.contexts = chatsAD.contexts.map(ctx => changed[ctx.id] || ctx)
+        } else {
+            chatsAD.contexts = response.contexts;
+        }
     }
 
+    lastLogVersion = response.log_version;
+    lastLogGuid = response.log_guid;
+
     return updated
 }
 
@@ -480,8 +505,11 @@ export const setContext = function (id) {
     lastLogGuid = ""
     lastLogVersion = 0
     lastSpokenNo = 0
+    lastChanges = 0
+    if (pollAbort) pollAbort.abort() // a pending long poll waits for the old chat
     const chatsAD = Alpine.$data(chatsSection);
     chatsAD.selected = id
+    if (eventSource && streamContext != id) openStream() // the stream is bound to one chat
 }
 
 export const getContext = function () {
@@ -847,20 +875,16 @@ chatInput.addEventListener('input', adjustTextareaHeight);
 
 async function startPolling() {
     const shortInterval = 25
-    const longInterval = 250
-    const shortIntervalPeriod = 100
-    let shortIntervalCount = 0
+    const errorInterval = 1000
 
     async function _doPoll() {
-        let nextInterval = longInterval
+        // the server holds the poll until something changes, so poll again right away
+        let nextInterval = shortInterval
 
         try {
-            const result = await poll();
-            if (result) shortIntervalCount = shortIntervalPeriod; // Reset the counter when the result is true
-            if (shortIntervalCount > 0) shortIntervalCount--; // Decrease the counter on each call
-            nextInterval = shortIntervalCount > 0 ? shortInterval : longInterval;
+            await poll();
         } catch (error) {
-            console.error('Error:', error);
+            nextInterval = errorInterval
         }
 
         // Call the function again after the selected interval
@@ -870,7 +894,45 @@ async function startPolling() {
     _doPoll();
 }
 
-document.addEventListener("DOMContentLoaded", startPolling);
+// server push, falls back to polling if the stream never connects
+let eventSource = null
+let streamContext = ""
+
+function openStream() {
+    if (eventSource) eventSource.close()
+    streamContext = context || ""
+    const params = new URLSearchParams({ context: context || "", log_guid: lastLogGuid, log_from: lastLogVersion })
+    const source = new EventSource("/poll_stream?" + params.toString())
+    eventSource = source
+    let opened = false
+
+    source.onopen = () => {
+        opened = true
+        setConnectionStatus(true)
+    }
+    source.onmessage = (event) => {
+        const response = JSON.parse(event.data)
+        if (!streamContext) streamContext = response.context // server picked the chat
+        applyUpdate(response)
+    }
+    source.onerror = () => {
+        setConnectionStatus(false)
+        if (!opened && eventSource === source) {
+            // endpoint not reachable as a stream (proxy, old server), poll instead
+            source.close()
+            eventSource = null
+            startPolling()
+        }
+        // otherwise the browser reconnects and resumes from the last event id
+    }
+}
+
+function startUpdates() {
+    if (window.EventSource) openStream()
+    else startPolling()
+}
+
+document.addEventListener("DOMContentLoaded", startUpdates);
 
 document.addEventListener('DOMContentLoaded', () => {
     const dragDropOverlay = document.getElementById('dragdrop-overlay');
@@ -9,7 +9,12 @@ const fileBrowserModalProxy = {
     parentPath: "",
     sortBy: "name",
     sortDirection: "asc",
+    filter: "",
+    total: 0,
+    nextCursor: "",
   },
+  isLoadingMore: false,
+  filterTimeout: null,
 
   // Initialize navigation history
   history: [],
@@ -36,35 +41,65 @@ const fileBrowserModalProxy = {
     return archiveExts.includes(ext);
   },
 
-  async fetchFiles(path = "") {
-    this.isLoading = true;
+  listingParams() {
+    // sorting and filtering happen on the server, the listing comes in pages
+    return {
+      sort: this.browser.sortBy,
+      direction: this.browser.sortDirection,
+      filter: this.browser.filter,
+    };
+  },
+
+  async fetchFiles(path = "", cursor = "") {
+    if (cursor) this.isLoadingMore = true;
+    else this.isLoading = true;
     try {
-      const response = await fetch(
-        `/get_work_dir_files?path=${encodeURIComponent(path)}`
-      );
+      const params = new URLSearchParams({ path, cursor, ...this.listingParams() });
+      const response = await fetch(`/get_work_dir_files?${params}`);
 
       if (response.ok) {
         const data = await response.json();
-        this.browser.entries = data.data.entries;
+        this.browser.entries = cursor
+          ? [...this.browser.entries, ...data.data.entries]
+          : data.data.entries;
         this.browser.currentPath = data.data.current_path;
         this.browser.parentPath = data.data.parent_path;
+        this.browser.total = data.data.total;
+        this.browser.nextCursor = data.data.next_cursor;
       } else {
         console.error("Error fetching files:", await response.text());
-        this.browser.entries = [];
+        if (!cursor) this.browser.entries = [];
       }
     } catch (error) {
       window.toastFetchError("Error fetching files", error);
-      this.browser.entries = [];
+      if (!cursor) this.browser.entries = [];
     } finally {
       this.isLoading = false;
+      this.isLoadingMore = false;
     }
   },
 
+  async loadMore() {
+    if (this.browser.nextCursor && !this.isLoadingMore) {
+      await this.fetchFiles(this.browser.currentPath, this.browser.nextCursor);
+    }
+  },
+
+  setFilter(value) {
+    this.browser.filter = value;
+    clearTimeout(this.filterTimeout);
+    this.filterTimeout = setTimeout(
+      () => this.fetchFiles(this.browser.currentPath),
+      300
+    );
+  },
+
   async navigateToFolder(path) {
     // Push current path to history before navigating
     if (this.browser.currentPath !== path) {
       this.history.push(this.browser.currentPath);
     }
+    this.browser.filter = "";
     await this.fetchFiles(path);
   },
 
@@ -72,31 +107,11 @@ const fileBrowserModalProxy = {
     if (this.browser.parentPath !== "") {
       // Push current path to history before navigating up
       this.history.push(this.browser.currentPath);
+      this.browser.filter = "";
       await this.fetchFiles(this.browser.parentPath);
     }
   },
 
-  sortFiles(entries) {
-    return [...entries].sort((a, b) => {
-      // Folders always come first
-      if (a.is_dir !== b.is_dir) {
-        return a.is_dir ? -1 : 1;
-      }
-
-      const direction = this.browser.sortDirection === "asc" ? 1 : -1;
-      switch (this.browser.sortBy) {
-        case "name":
-          return direction * a.name.localeCompare(b.name);
-        case "size":
-          return direction * (a.size - b.size);
-        case "date":
-          return direction * (new Date(a.modified) - new Date(b.modified));
-        default:
-          return 0;
-      }
-    });
-  },
-
   toggleSort(column) {
     if (this.browser.sortBy === column) {
       this.browser.sortDirection =
@@ -105,6 +120,7 @@ const fileBrowserModalProxy = {
       this.browser.sortBy = column;
       this.browser.sortDirection = "asc";
     }
+    this.fetchFiles(this.browser.currentPath);
   },
 
   async deleteFile(file) {
@@ -129,6 +145,7 @@ const fileBrowserModalProxy = {
         this.browser.entries = this.browser.entries.filter(
           (entry) => entry.path !== file.path
         );
+        this.browser.total--;
         alert("File deleted successfully.");
       } else {
         alert(`Error deleting file: ${await response.text()}`);
@@ -146,6 +163,9 @@ const fileBrowserModalProxy = {
 
       const formData = new FormData();
       formData.append("path", this.browser.currentPath);
+      for (const [key, value] of Object.entries(this.listingParams())) {
+        formData.append(key, value);
+      }
 
       for (let i = 0; i < files.length; i++) {
         const ext = files[i].name.split(".").pop().toLowerCase();
@@ -176,6 +196,8 @@ const fileBrowserModalProxy = {
         }));
         this.browser.currentPath = data.data.current_path;
         this.browser.parentPath = data.data.parent_path;
+        this.browser.total = data.data.total;
+        this.browser.nextCursor = data.data.next_cursor;
 
         // Show success message
         if (data.failed && data.failed.length > 0) {
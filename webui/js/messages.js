@@ -509,14 +509,15 @@ function drawKvps(container, kvps, latex) {
         if (typeof value === "string" && value.startsWith("img://")) {
           const imgElement = document.createElement("img");
           imgElement.classList.add("kvps-img");
-          imgElement.src = value.replace("img://", "/image_get?path=");
+          const fullSrc = value.replace("img://", "/image_get?path=");
+          imgElement.src = `${fullSrc}&size=320`; // thumbnail, full size in the modal
           imgElement.alt = "Image Attachment";
           td.appendChild(imgElement);
 
           // Add click handler and cursor change
           imgElement.style.cursor = "pointer";
           imgElement.addEventListener("click", () => {
-            openImageModal(imgElement.src, 1000);
+            openImageModal(fullSrc, 1000);
           });
 
           td.appendChild(imgElement);